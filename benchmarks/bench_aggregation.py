@@ -0,0 +1,63 @@
+""" Time of grouped sums over vouchers with the aggregators (NumPy and pure Python) compared to summing floats in a
+dict per group, and the cents the float sums are off.
+
+Run from the repository root: python -m benchmarks.bench_aggregation [vouchers]
+"""
+import sys
+import time
+from decimal import Decimal
+
+from benchmarks import fixtures
+from src.lexoffice.aggregation import VoucherAggregator
+
+GROUPINGS = [(), ('currency', 'voucher_status'), ('month', 'voucher_status'), ('contact_id', 'currency')]
+_KEYS = {'contact_id': 'contactId', 'currency': 'currency', 'voucher_status': 'voucherStatus'}
+
+
+def float_sums(vouchers: list[dict], keys: tuple) -> dict:
+    """ Straightforward grouping: sum the float amounts per group in a dict """
+    sums = {}
+    for voucher in vouchers:
+        key = tuple(voucher['voucherDate'][:7] if key == 'month' else voucher[_KEYS[key]] for key in keys)
+        group = sums.get(key)
+        if group is None:
+            group = sums[key] = [0, 0.0, 0.0]
+        group[0] += 1
+        group[1] += voucher['totalAmount']
+        group[2] += voucher['openAmount']
+    return sums
+
+
+def timed(fn) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main(count: int = 500000):
+    vouchers = fixtures.vouchers(count)
+    aggregators = {}
+    for name, use_numpy in (('numpy', True), ('python', False)):
+        elapsed, aggregators[name] = timed(lambda: VoucherAggregator(vouchers, use_numpy=use_numpy))
+        print(f'build {name:<6} {count} vouchers: {elapsed:.2f} s')
+    exact_total = sum(Decimal(str(voucher['totalAmount'])) for voucher in vouchers)
+    for keys in GROUPINGS:
+        times = {}
+        for name, aggregator in aggregators.items():
+            times[name], groups = timed(lambda: aggregator.group_by(*keys))
+        times['float'], floats = timed(lambda: float_sums(vouchers, keys))
+        assert aggregators['numpy'].group_by(*keys) == groups
+        # Deviation of the float sums from the exact sums, before rounding
+        off = max(abs(Decimal(total) * 100 - groups[key]['total_amount']) for key, (_, total, _) in floats.items())
+        label = ', '.join(keys) or 'all'
+        print(f'{label:<28} {len(groups):6d} groups  numpy {times["numpy"] * 1e3:7.1f} ms  '
+              f'python {times["python"] * 1e3:7.1f} ms  float dict {times["float"] * 1e3:7.1f} ms  '
+              f'float off by up to {off:.1e} cents')
+    total = aggregators['numpy'].totals()['total_amount']
+    float_total = sum(voucher['totalAmount'] for voucher in vouchers)
+    print(f'total {total} cents, exact: {Decimal(total).scaleb(-2) == exact_total}, '
+          f'float sum: {float_total!r}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,41 @@
+""" Row-by-row DataFrame construction vs. columnar conversion of vouchers.
+
+Run from the repository root: python -m benchmarks.bench_columnar [vouchers]
+"""
+import sys
+import time
+
+import pandas as pd
+
+from src.lexoffice import columnar
+from src.lexoffice.datatypes import Voucher
+from benchmarks import fixtures
+
+
+def rows(vouchers: list[Voucher]) -> pd.DataFrame:
+    return pd.DataFrame([{
+        'id': str(v.id), 'voucher_type': v.voucher_type.value, 'voucher_status': v.voucher_status.value,
+        'voucher_date': v.voucher_date, 'due_date': v.due_date, 'contact_name': v.contact_name,
+        'total_amount': v.total_amount, 'open_amount': v.open_amount, 'currency': v.currency
+    } for v in vouchers])
+
+
+def run(name: str, convert, payload):
+    start = time.perf_counter()
+    convert(payload)
+    print(f'{name:<32} {time.perf_counter() - start:8.3f} s')
+
+
+def main(count: int = 200000):
+    content = fixtures.vouchers(count)
+    objects = [Voucher(v) for v in content]
+    print(f'{count} vouchers')
+    run('parse + row by row', lambda c: rows([Voucher(v) for v in c]), content)
+    run('row by row from Voucher objects', rows, objects)
+    run('to_pandas from Voucher objects', columnar.vouchers_to_pandas, objects)
+    run('to_pandas from JSON dicts', columnar.vouchers_to_pandas, content)
+    run('to_arrow from JSON dicts', columnar.vouchers_to_arrow, content)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,42 @@
+""" Requests and time to join vouchers with their contacts against a local stub server: one get_contact per
+distinct contact compared to the bulk-loaded ContactCache.
+
+Run from the repository root: python -m benchmarks.bench_contacts [vouchers] [contacts] [latency]
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.lexoffice.api import LexofficeClient
+from src.lexoffice.contacts import ContactCache
+from src.lexoffice.datatypes import VoucherList
+from tests.stub_server import StubServer
+
+
+def run(name: str, join, server: StubServer):
+    requests_before = server.requests
+    start = time.perf_counter()
+    pairs = join()
+    elapsed = time.perf_counter() - start
+    print(f'{name:<26} {len(pairs):7d} vouchers  {server.requests - requests_before:6d} requests  {elapsed:7.2f} s')
+
+
+def single_lookups(client: LexofficeClient, vouchers: list) -> list:
+    contact_ids = list({voucher.contact_id for voucher in vouchers})
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        contacts = dict(zip(contact_ids, executor.map(client.get_contact, contact_ids)))
+    return [(voucher, contacts[voucher.contact_id]) for voucher in vouchers]
+
+
+def main(count: int = 20000, contacts: int = 2000, latency: float = 0.005):
+    with StubServer(voucher_count=count, contact_count=contacts, latency=latency) as server:
+        vouchers = VoucherList({'content': server.httpd.vouchers}).content
+        with LexofficeClient('key', base_url=server.url, rate_limit=None) as client:
+            run('get_contact per contact', lambda: single_lookups(client, vouchers), server)
+            cache = ContactCache(client)
+            run('ContactCache.join', lambda: cache.join(vouchers), server)
+            run('ContactCache.join (warm)', lambda: cache.join(vouchers), server)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]], *[float(arg) for arg in sys.argv[3:4]])
@@ -0,0 +1,40 @@
+""" Parse throughput of the response decoders, from raw response bytes to VoucherList and Invoice objects.
+
+Run from the repository root: python -m benchmarks.bench_decoding [pages] [invoices] [line_items]
+"""
+import json
+import sys
+import time
+
+from benchmarks import fixtures
+from src.lexoffice.decoding import DECODERS
+
+
+def run(name: str, decode, bodies: list[bytes], objects: int):
+    decode(bodies[0])
+    start = time.perf_counter()
+    for body in bodies:
+        decode(body)
+    elapsed = time.perf_counter() - start
+    print(f'{name:<8} {objects / elapsed:12.0f} objects/s')
+
+
+def main(pages: int = 40, invoices: int = 2000, line_items: int = 10):
+    page_bodies = [json.dumps(fixtures.voucherlist(250, seed)).encode() for seed in range(pages)]
+    invoice_bodies = [json.dumps(invoice).encode() for invoice in fixtures.invoices(invoices, line_items)]
+    decoders = {}
+    for name, decoder in DECODERS.items():
+        try:
+            decoders[name] = decoder()
+        except ImportError:
+            print(f'{name} is not installed')
+    print(f'{pages} voucherlist pages with 250 vouchers')
+    for name, decoder in decoders.items():
+        run(name, decoder.voucherlist, page_bodies, pages * 250)
+    print(f'{invoices} invoices with {line_items} line items')
+    for name, decoder in decoders.items():
+        run(name, decoder.invoice, invoice_bodies, invoices)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
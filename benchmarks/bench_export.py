@@ -0,0 +1,76 @@
+""" Peak memory and time of exporting all invoices, streamed vs. collected in a list and written at the end.
+
+The stub server runs in its own process, so its allocations are not included in the peak memory of the client.
+The peak of the streamed export should not grow with the number of invoices.
+
+Run from the repository root: python -m benchmarks.bench_export [invoices ...] [--format csv|jsonl|parquet]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+import tracemalloc
+
+from src.lexoffice.api import LexofficeClient
+from src.lexoffice.columnar import INVOICE_SCHEMA, LINE_ITEM_SCHEMA, invoice_columns, line_item_columns
+from src.lexoffice.datatypes import VoucherType
+from src.lexoffice.export import open_writer, export_invoices
+from tests.stub_server import StubServer
+
+
+def collected(client: LexofficeClient, directory: str, format: str) -> int:
+    ids = [voucher.id for voucher in client.iter_vouchers(VoucherType.INVOICE)]
+    invoices = [result.invoice for result in client.get_invoices(ids) if result.ok]
+    with open_writer(os.path.join(directory, f'invoices.{format}'), INVOICE_SCHEMA) as writer:
+        writer.write(invoice_columns(invoices))
+    with open_writer(os.path.join(directory, f'line_items.{format}'), LINE_ITEM_SCHEMA) as writer:
+        writer.write(line_item_columns(invoices))
+    return len(invoices)
+
+
+def streamed(client: LexofficeClient, directory: str, format: str) -> int:
+    with open_writer(os.path.join(directory, f'invoices.{format}'), INVOICE_SCHEMA) as invoices, \
+            open_writer(os.path.join(directory, f'line_items.{format}'), LINE_ITEM_SCHEMA) as line_items:
+        return export_invoices(client, invoices, line_items).invoices
+
+
+def run(name: str, export, url: str, format: str):
+    with LexofficeClient('key', base_url=url, rate_limit=None) as client, \
+            tempfile.TemporaryDirectory() as directory:
+        tracemalloc.start()
+        start = time.perf_counter()
+        count = export(client, directory, format)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    print(f'{name:<10} {count:6d} invoices {elapsed:7.2f} s  peak {peak / 1024:9.1f} KiB')
+
+
+def serve(count: int, urls: multiprocessing.Queue, stop):
+    with StubServer(voucher_count=count) as server:
+        urls.put(server.url)
+        stop.wait()
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('invoices', type=int, nargs='*', default=[500, 2000], help='numbers of invoices')
+    parser.add_argument('--format', default='csv', choices=['csv', 'jsonl', 'parquet'])
+    args = parser.parse_args(argv)
+    for count in args.invoices:
+        urls = multiprocessing.Queue()
+        stop = multiprocessing.Event()
+        server = multiprocessing.Process(target=serve, args=(count, urls, stop))
+        server.start()
+        try:
+            url = urls.get()
+            run('collected', collected, url, args.format)
+            run('streamed', streamed, url, args.format)
+        finally:
+            stop.set()
+            server.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+""" Build time of a VoucherIndex and query latency compared to a linear scan over all vouchers.
+
+The vouchers are parsed in chunks from generated payloads with an Interner, like pages of a large account.
+Run from the repository root: python -m benchmarks.bench_index [vouchers]
+"""
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from benchmarks import fixtures
+from src.lexoffice.datatypes import Voucher, VoucherStatus, VoucherType
+from src.lexoffice.index import VoucherIndex
+from src.lexoffice.interning import Interner
+
+CHUNK = 10000
+
+
+def load(count: int) -> list[Voucher]:
+    interner = Interner()
+    vouchers = []
+    for seed, start in enumerate(range(0, count, CHUNK), 1):
+        chunk = [Voucher(voucher) for voucher in fixtures.vouchers(min(CHUNK, count - start), seed=seed)]
+        interner.vouchers(chunk)
+        vouchers.extend(chunk)
+    return vouchers
+
+
+def timed(fn, repeat: int) -> tuple[float, object]:
+    """ :return: Best time of `repeat` calls in seconds and the result """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(count: int = 500000):
+    vouchers = load(count)
+    start = time.perf_counter()
+    index = VoucherIndex(vouchers)
+    print(f'build {len(index)} vouchers: {time.perf_counter() - start:.2f} s')
+
+    contact = vouchers[0].contact_id
+    now = datetime(2023, 6, 1, tzinfo=timezone.utc)
+    open_statuses = {VoucherStatus.OPEN, VoucherStatus.OVERDUE}
+    queries = {
+        'open/overdue of contact due before date': (
+            dict(contact_id=contact, status=open_statuses, due_date=(None, now)),
+            lambda v: v.contact_id == contact and v.voucher_status in open_statuses
+            and v.due_date is not None and v.due_date < now),
+        'overdue invoices of one week': (
+            dict(status=VoucherStatus.OVERDUE, voucher_type=VoucherType.INVOICE,
+                 voucher_date=(now - timedelta(days=7), now)),
+            lambda v: v.voucher_status == VoucherStatus.OVERDUE and v.voucher_type == VoucherType.INVOICE
+            and now - timedelta(days=7) <= v.voucher_date < now),
+        'updated in the last day': (
+            dict(updated_date=(now - timedelta(days=1), now)),
+            lambda v: now - timedelta(days=1) <= v.updated_date < now),
+    }
+    for name, (conditions, predicate) in queries.items():
+        indexed, found = timed(lambda: index.find(**conditions), 50)
+        scanned, expected = timed(lambda: [v for v in vouchers if predicate(v)], 3)
+        assert {v.id for v in found} == {v.id for v in expected}
+        print(f'{name:<42} {len(found):5d} found  index {indexed * 1e3:8.3f} ms  scan {scanned * 1e3:8.1f} ms')
+
+    page = [Voucher(voucher) for voucher in fixtures.vouchers(250, seed=count)]
+    for voucher, old in zip(page, vouchers):
+        voucher.id = old.id
+    upsert, _ = timed(lambda: index.update(page), 3)
+    print(f'upsert page of 250 vouchers: {upsert * 1e3:.1f} ms ({upsert / 250 * 1e6:.0f} µs per voucher)')
+    added = Voucher(fixtures.vouchers(1, seed=count + 1)[0])
+    added.id = uuid.uuid4()
+    insert, _ = timed(lambda: index.add(added), 3)
+    print(f'add one voucher: {insert * 1e6:.0f} µs')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,84 @@
+""" Memory held by parsed vouchers and invoices with and without an Interner.
+
+The vouchers are decoded page by page from response bytes, like the client does, and kept alive together.
+Voucher and due dates are set to midnight, as the API returns them.
+Run from the repository root: python -m benchmarks.bench_interning [vouchers] [invoices] [decoder]
+"""
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from benchmarks import fixtures
+from src.lexoffice.decoding import get_decoder
+from src.lexoffice.interning import Interner
+
+
+def measure(make_parse, bodies: list[bytes]) -> tuple[float, float]:
+    """ :param make_parse: Creates the parse function, called again for every run so each run has a new Interner
+    :return: Retained memory in bytes (including the Interner) and parse time in seconds
+    """
+    gc.collect()
+    parse = make_parse()
+    start = time.perf_counter()
+    results = [parse(body) for body in bodies]
+    elapsed = time.perf_counter() - start
+    del results, parse
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    parse = make_parse()
+    results = [parse(body) for body in bodies]
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return after - before, elapsed
+
+
+def report(name: str, count: int, plain: tuple[float, float], interned: tuple[float, float]):
+    saved = 1 - interned[0] / plain[0]
+    print(f'{name:<28} {plain[0] / count:8.0f} -> {interned[0] / count:6.0f} bytes each ({saved:.0%} less), '
+          f'parse time {plain[1]:.2f} s -> {interned[1]:.2f} s')
+
+
+def main(voucher_count: int = 100000, invoice_count: int = 2000, decoder: str = None):
+    decoder = get_decoder(decoder)
+    vouchers = fixtures.vouchers(voucher_count)
+    for voucher in vouchers:
+        for key in ('voucherDate', 'dueDate'):
+            if voucher[key] is not None:
+                voucher[key] = voucher[key][:10] + 'T00:00:00.000+01:00'
+    pages = [json.dumps({'content': vouchers[i:i + 250], 'first': i == 0, 'last': i + 250 >= voucher_count})
+             .encode() for i in range(0, voucher_count, 250)]
+    invoices = [json.dumps(invoice).encode() for invoice in fixtures.invoices(invoice_count, line_items=10)]
+    del vouchers
+    print(f'decoder: {decoder.name}')
+
+    def interned_pages():
+        interner = Interner()
+
+        def parse(body: bytes):
+            voucher_list = decoder.voucherlist(body)
+            interner.vouchers(voucher_list.content)
+            return voucher_list
+        return parse
+
+    def interned_invoices():
+        interner = Interner()
+
+        def parse(body: bytes):
+            invoice = decoder.invoice(body)
+            interner.invoice(invoice)
+            return invoice
+        return parse
+
+    report(f'{voucher_count} vouchers', voucher_count, measure(lambda: decoder.voucherlist, pages),
+           measure(interned_pages, pages))
+    report(f'{invoice_count} invoices (10 items)', invoice_count, measure(lambda: decoder.invoice, invoices),
+           measure(interned_invoices, invoices))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]], *sys.argv[3:4])
@@ -0,0 +1,46 @@
+""" Eager vs. lazy Invoice parsing for a list-style workload touching only a few fields.
+
+Run from the repository root: python -m benchmarks.bench_lazy [invoices] [line_items]
+"""
+import sys
+import time
+import tracemalloc
+import uuid
+
+from src.lexoffice.datatypes import Invoice
+from tests.stub_server import make_invoice
+
+
+def workload(invoices: list[dict], lazy: bool) -> float:
+    total = 0.0
+    for invoice in invoices:
+        obj = Invoice(invoice, lazy=lazy)
+        if obj.voucher_status == 'open':
+            total += obj.total_price.total_gross_amount
+    return total
+
+
+def run(name: str, invoices: list[dict], lazy: bool):
+    start = time.perf_counter()
+    workload(invoices, lazy)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    workload(invoices, lazy)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{name:<6} {len(invoices) / elapsed:12.0f} invoices/s  peak {peak / 1024:8.1f} KiB')
+
+
+def main(count: int = 5000, line_items: int = 20):
+    invoices = []
+    for _ in range(count):
+        invoice = make_invoice(str(uuid.uuid4()))
+        invoice['lineItems'] = invoice['lineItems'] * line_items
+        invoices.append(invoice)
+    print(f'{count} invoices with {line_items} line items, reading voucher_status and total_price')
+    run('eager', invoices, lazy=False)
+    run('lazy', invoices, lazy=True)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,114 @@
+""" End-to-end load test of LexofficeClient against the local stub server.
+
+Worker threads share one client and fetch invoices (and every 10th call a voucherlist page) while the server
+simulates latency, rate limiting and server errors. Reports requests/sec and p50/p95/p99 latency per call.
+
+Run from the repository root, e.g.:
+    python -m benchmarks.bench_load --requests 2000 --threads 8 --latency 0.02 --jitter 0.01
+    python -m benchmarks.bench_load --server-rate-limit 50 --error-rate 0.01 --cache
+"""
+import argparse
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from src.lexoffice.api import LexofficeClient
+from src.lexoffice.cache import InvoiceCache
+from src.lexoffice.datatypes import VoucherType
+from tests.stub_server import StubServer
+
+
+class Recorder:
+    """ Latencies and errors of the calls made by the worker threads. """
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def call(self, name: str, function, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            function(*args, **kwargs)
+        except Exception as ex:
+            with self._lock:
+                key = f'{name}: {type(ex).__name__}'
+                self.errors[key] = self.errors.get(key, 0) + 1
+            return
+        latency = time.perf_counter() - start
+        with self._lock:
+            self.latencies.setdefault(name, []).append(latency)
+
+
+def percentiles(latencies: list[float]) -> tuple[float, float, float]:
+    """ :return: p50, p95 and p99 of the latencies """
+    if len(latencies) < 2:
+        return (latencies[0],) * 3 if latencies else (0.0,) * 3
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return cuts[49], cuts[94], cuts[98]
+
+
+def run(args) -> Recorder:
+    server = StubServer(voucher_count=args.vouchers, latency=args.latency, jitter=args.jitter,
+                        max_page_size=args.page_size, rate_limit=args.server_rate_limit,
+                        burst=args.server_burst, error_rate=args.error_rate, seed=1)
+    recorder = Recorder()
+    with server:
+        ids = [uuid.UUID(v['id']) for v in server.httpd.vouchers]
+        cache = InvoiceCache(ttl=None) if args.cache else None
+        client = LexofficeClient('key', base_url=server.url, pool_maxsize=args.threads, rate_limit=args.rate_limit,
+                                 burst=args.burst, max_retries=args.max_retries, cache=cache,
+                                 single_flight=args.single_flight)
+
+        def work(i: int):
+            if i % 10 == 9:
+                page = (i // 10) % max(1, len(ids) // args.page_size)
+                recorder.call('voucherlist', client.get_voucherlist, VoucherType.INVOICE,
+                              page=page, size=args.page_size)
+            else:
+                recorder.call('invoice', client.get_invoice, ids[i % len(ids)])
+
+        start = time.perf_counter()
+        with client, ThreadPoolExecutor(max_workers=args.threads) as executor:
+            list(executor.map(work, range(args.requests)))
+        elapsed = time.perf_counter() - start
+    calls = sum(len(latencies) for latencies in recorder.latencies.values()) + sum(recorder.errors.values())
+    print(f'{calls} calls, {args.threads} threads, {server.requests} HTTP requests in {elapsed:.2f} s, '
+          f'{server.connections} connections')
+    print(f'{calls / elapsed:.1f} calls/s, {server.requests / elapsed:.1f} HTTP requests/s')
+    if client.single_flight is not None:
+        print(f'{client.single_flight.coalesced} calls coalesced')
+    if server.statuses:
+        print('server answered', ', '.join(f'{count}x {status}' for status, count in sorted(server.statuses.items())))
+    print(f'{"call":<12} {"count":>7} {"p50":>9} {"p95":>9} {"p99":>9}')
+    for name, latencies in sorted(recorder.latencies.items()):
+        p50, p95, p99 = percentiles(latencies)
+        print(f'{name:<12} {len(latencies):7d} {p50 * 1000:6.1f} ms {p95 * 1000:6.1f} ms {p99 * 1000:6.1f} ms')
+    for name, count in sorted(recorder.errors.items()):
+        print(f'error        {count:7d} {name}')
+    return recorder
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000, help='number of client calls')
+    parser.add_argument('--threads', type=int, default=8, help='number of worker threads')
+    parser.add_argument('--vouchers', type=int, default=500, help='number of vouchers/invoices served')
+    parser.add_argument('--page-size', type=int, default=250, help='voucherlist page size')
+    parser.add_argument('--latency', type=float, default=0.0, help='server latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='max. random deviation from the latency')
+    parser.add_argument('--server-rate-limit', type=float, default=None, help='server rate limit in requests/s')
+    parser.add_argument('--server-burst', type=int, default=2, help='server burst size')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with 503')
+    parser.add_argument('--rate-limit', type=float, default=None, help='client rate limit in requests/s')
+    parser.add_argument('--burst', type=int, default=2, help='client burst size')
+    parser.add_argument('--max-retries', type=int, default=3, help='client retries after 429')
+    parser.add_argument('--cache', action='store_true', help='use an InvoiceCache')
+    parser.add_argument('--single-flight', action='store_true', help='coalesce concurrent identical calls')
+    run(parser.parse_args(argv))
+
+
+if __name__ == '__main__':
+    main()
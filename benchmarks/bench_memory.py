@@ -0,0 +1,32 @@
+""" Memory held per parsed Voucher and Invoice.
+
+Run from the repository root: python -m benchmarks.bench_memory [vouchers] [invoices]
+"""
+import gc
+import sys
+import tracemalloc
+
+from src.lexoffice.datatypes import Voucher, Invoice
+from benchmarks import fixtures
+
+
+def measure(build, payloads: list) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    objects = [build(payload) for payload in payloads]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return (after - before) / len(payloads)
+
+
+def main(voucher_count: int = 100000, invoice_count: int = 2000):
+    vouchers = fixtures.vouchers(voucher_count)
+    invoices = fixtures.invoices(invoice_count, line_items=10)
+    print(f'Voucher:                  {measure(Voucher, vouchers):8.0f} bytes')
+    print(f'Invoice (10 line items):  {measure(Invoice, invoices):8.0f} bytes')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
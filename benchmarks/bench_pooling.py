@@ -0,0 +1,41 @@
+""" Requests/sec of LexofficeClient with and without connection pooling against a local stub server.
+
+Run from the repository root: python -m benchmarks.bench_pooling [requests] [threads]
+"""
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from src.lexoffice.api import LexofficeClient
+from tests.stub_server import StubServer
+
+
+def _unpooled(server: StubServer, invoice_id: uuid.UUID):
+    requests.get(url=f'{server.url}/invoices/{invoice_id}', headers={'Authorization': 'Bearer key'}).json()
+
+
+def run(name: str, fetch, server: StubServer, ids: list, threads: int):
+    connections = server.connections
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(fetch, ids))
+    elapsed = time.perf_counter() - start
+    print(f'{name:<24} {len(ids) / elapsed:10.1f} req/s  {server.connections - connections:6d} connections')
+
+
+def main(count: int = 2000, threads: int = 4):
+    with StubServer(voucher_count=100) as server:
+        ids = [uuid.UUID(v['id']) for v in server.httpd.vouchers] * (count // 100)
+        print(f'{len(ids)} invoice requests, {threads} threads')
+        run('requests.get (no pool)', lambda i: _unpooled(server, i), server, ids, threads)
+        with LexofficeClient('key', base_url=server.url, rate_limit=None, keep_alive=False) as client:
+            run('client, keep_alive=False', client.get_invoice, server, ids, threads)
+        with LexofficeClient('key', base_url=server.url, rate_limit=None, pool_maxsize=threads) as client:
+            run('client, pooled', client.get_invoice, server, ids, threads)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,59 @@
+""" Time to the first voucher and peak memory of a voucherlist page, parsed at once vs. streamed.
+
+The stub server sends the page with limited bandwidth, like a slow connection to the API. It runs in its own
+process, so its allocations are not included in the peak memory of the client.
+
+Run from the repository root: python -m benchmarks.bench_streaming [size] [bandwidth in KiB/s]
+"""
+import multiprocessing
+import sys
+import time
+import tracemalloc
+
+from benchmarks import fixtures
+from src.lexoffice.api import LexofficeClient
+from src.lexoffice.datatypes import VoucherType
+from tests.stub_server import StubServer
+
+
+def run(name: str, client: LexofficeClient, size: int, stream: bool):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    count = 0
+    vouchers = client.get_voucherlist(VoucherType.INVOICE, size=size, stream=stream)
+    for _ in vouchers if stream else vouchers.content:
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{name:<8} first voucher {first * 1000:8.1f} ms  all {count} {elapsed * 1000:8.1f} ms  '
+          f'peak {peak / 1024:8.1f} KiB')
+
+
+def serve(size: int, bandwidth: int, urls: multiprocessing.Queue, stop):
+    with StubServer(bandwidth=bandwidth) as server:
+        server.httpd.vouchers = fixtures.vouchers(size)
+        urls.put(server.url)
+        stop.wait()
+
+
+def main(size: int = 250, bandwidth: int = 1024):
+    urls = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(size, bandwidth * 1024, urls, stop))
+    server.start()
+    try:
+        with LexofficeClient('key', base_url=urls.get(), rate_limit=None) as client:
+            print(f'{size} vouchers per page, {bandwidth} KiB/s')
+            run('at once', client, size, stream=False)
+            run('stream', client, size, stream=True)
+    finally:
+        stop.set()
+        server.join()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,109 @@
+""" Generated API payloads for the benchmarks. Values repeat like in real accounts (few currencies, many contacts). """
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+_STATUSES = ['open', 'paid', 'paidoff', 'voided', 'overdue', 'draft']
+_TYPES = ['invoice', 'salesinvoice', 'creditnote', 'purchaseinvoice']
+_START = datetime(2020, 1, 1, tzinfo=timezone(timedelta(hours=1)))
+
+
+def _date(rng: random.Random, days: int = 1500) -> str:
+    return (_START + timedelta(days=rng.randrange(days), seconds=rng.randrange(86400))).isoformat(timespec='milliseconds')
+
+
+def _contacts(rng: random.Random, count: int) -> list[tuple[str, str]]:
+    return [(str(uuid.UUID(int=rng.getrandbits(128), version=4)), f'Kunde {i} GmbH') for i in range(count)]
+
+
+def voucher(rng: random.Random, contacts: list[tuple[str, str]]) -> dict:
+    contact_id, contact_name = rng.choice(contacts)
+    total = round(rng.uniform(5, 5000), 2)
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "voucherType": rng.choice(_TYPES),
+        "voucherStatus": rng.choice(_STATUSES),
+        "voucherNumber": f"RE{rng.randrange(10 ** 6):06d}",
+        "voucherDate": _date(rng),
+        "createdDate": _date(rng),
+        "updatedDate": _date(rng),
+        "dueDate": _date(rng) if rng.random() < 0.8 else None,
+        "contactId": contact_id,
+        "contactName": contact_name,
+        "totalAmount": total,
+        "openAmount": total if rng.random() < 0.5 else 0,
+        "currency": "EUR",
+        "archived": False
+    }
+
+
+def vouchers(count: int, seed: int = 1, contacts: int = 1000) -> list[dict]:
+    """ :return: `count` voucher dicts as contained in the voucherlist content """
+    rng = random.Random(seed)
+    contact_list = _contacts(rng, contacts)
+    return [voucher(rng, contact_list) for _ in range(count)]
+
+
+def voucherlist(size: int = 250, seed: int = 1) -> dict:
+    """ :return: One voucherlist page with `size` vouchers """
+    return {
+        "content": vouchers(size, seed),
+        "first": True,
+        "last": False,
+        "totalPages": 400,
+        "totalElements": 400 * size,
+        "numberOfElements": size,
+        "size": size,
+        "number": 0,
+        "sort": [{"property": "voucherdate", "direction": "DESC", "ignoreCase": False,
+                  "nullHandling": "NATIVE", "ascending": False}]
+    }
+
+
+def line_item(rng: random.Random) -> dict:
+    item_type = rng.choice(['material', 'custom', 'service', 'text'])
+    item = {
+        "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)) if item_type != 'custom' else None,
+        "type": item_type,
+        "name": f"Artikel {rng.randrange(500)}",
+        "description": "Beschreibung der Position" if rng.random() < 0.5 else None
+    }
+    if item_type != 'text':
+        net = round(rng.uniform(1, 500), 2)
+        item.update({
+            "quantity": rng.randrange(1, 10),
+            "unitName": "Stück",
+            "unitPrice": {"currency": "EUR", "netAmount": net, "grossAmount": round(net * 1.19, 2),
+                          "taxRatePercentage": 19},
+            "discountPercentage": 0,
+            "lineItemAmount": net
+        })
+    return item
+
+
+def invoice(line_items: int = 10, seed: int = 1) -> dict:
+    """ :return: One invoice as returned by the /invoices endpoint with `line_items` line items """
+    rng = random.Random(seed)
+    contact_id, contact_name = _contacts(rng, 1)[0]
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "organizationId": "aa93e8a8-2aa3-470b-b914-caad8a255dd8",
+        "createdDate": _date(rng),
+        "updatedDate": _date(rng),
+        "version": rng.randrange(5),
+        "language": "de",
+        "archived": False,
+        "voucherStatus": rng.choice(_STATUSES),
+        "voucherNumber": f"RE{rng.randrange(10 ** 6):06d}",
+        "voucherDate": _date(rng),
+        "dueDate": _date(rng),
+        "address": {"contactId": contact_id, "name": contact_name, "supplement": None, "street": "Musterstraße 42",
+                    "city": "Freiburg", "zip": "79112", "countryCode": "DE"},
+        "lineItems": [line_item(rng) for _ in range(line_items)],
+        "totalPrice": {"currency": "EUR", "totalNetAmount": 26.72, "totalGrossAmount": 29.85,
+                       "totalTaxAmount": 3.13, "totalDiscountAbsolute": None, "totalDiscountPercentage": None}
+    }
+
+
+def invoices(count: int, line_items: int = 10, seed: int = 1) -> list[dict]:
+    return [invoice(line_items, seed + i) for i in range(count)]
@@ -0,0 +1,124 @@
+""" Regression suite for the parsing hot path of the datatypes.
+
+Every case builds objects from generated API payloads and is measured for time per call (best of several
+repeats), memory blocks and bytes held by the result and peak memory while building it.
+
+Run from the repository root:
+    python -m benchmarks.suite                    print the results
+    python -m benchmarks.suite --save-baseline    store them in benchmarks/baseline.json
+    python -m benchmarks.suite --check            compare against the baseline, exit code 1 on a regression
+
+Times depend on the machine, so the baseline should be saved and checked on the same one.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import timeit
+import tracemalloc
+
+from benchmarks import fixtures
+from src.lexoffice.datatypes import Voucher, VoucherList, Invoice, LineItem
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+class Case:
+    """ One benchmark: a function building objects from a payload. """
+    name: str
+    repeat: int
+
+    def __init__(self, name: str, build, payload, repeat: int = 5):
+        self.name = name
+        self.build = build
+        self.payload = payload
+        self.repeat = repeat
+
+    def run(self):
+        return self.build(self.payload)
+
+
+def cases() -> list[Case]:
+    invoice = fixtures.invoice(500)
+    return [
+        Case('voucherlist_250', VoucherList, fixtures.voucherlist(250)),
+        Case('invoice_1', Invoice, fixtures.invoice(1)),
+        Case('invoice_50', Invoice, fixtures.invoice(50)),
+        Case('invoice_500', Invoice, invoice),
+        Case('line_items_500', lambda items: [LineItem(item) for item in items], invoice['lineItems']),
+        Case('vouchers_100k', lambda vouchers: [Voucher(voucher) for voucher in vouchers],
+             fixtures.vouchers(100000), repeat=3),
+    ]
+
+
+def measure(case: Case) -> dict:
+    """ :return: Seconds per call, blocks and bytes held by the result and peak bytes while building it """
+    timer = timeit.Timer(case.run)
+    number, _ = timer.autorange()
+    seconds = min(timer.repeat(case.repeat, number)) / number
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    result = case.run()
+    after, peak = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.stop()
+    del result
+    return {'seconds': seconds, 'blocks': blocks, 'bytes': after - before, 'peak': peak - before}
+
+
+def compare(results: dict, baseline: dict, time_tolerance: float, memory_tolerance: float) -> list[str]:
+    """ :return: A message for every measurement that exceeds its baseline by more than the tolerance """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for key, value in result.items():
+            tolerance = time_tolerance if key == 'seconds' else memory_tolerance
+            if expected[key] and value > expected[key] * (1 + tolerance):
+                regressions.append(f'{name}: {key} {value:.6g} > {expected[key]:.6g} (+{tolerance:.0%})')
+    return regressions
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as new baseline')
+    parser.add_argument('--check', action='store_true', help='fail if a result is worse than the baseline')
+    parser.add_argument('--baseline', default=BASELINE, help='path of the baseline file')
+    parser.add_argument('--time-tolerance', type=float, default=0.5, help='allowed slowdown (default 50%%)')
+    parser.add_argument('--memory-tolerance', type=float, default=0.10, help='allowed memory growth (default 10%%)')
+    parser.add_argument('cases', nargs='*', help='names of the cases to run (default: all)')
+    args = parser.parse_args(argv)
+
+    results = {}
+    print(f'{"case":<16} {"time/call":>12} {"blocks":>10} {"held":>12} {"peak":>12}')
+    for case in cases():
+        if args.cases and case.name not in args.cases:
+            continue
+        result = results[case.name] = measure(case)
+        print(f'{case.name:<16} {result["seconds"] * 1000:9.3f} ms {result["blocks"]:10d} '
+              f'{result["bytes"] / 1024:9.1f} KiB {result["peak"] / 1024:9.1f} KiB')
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'results': results},
+                      f, indent=2)
+        print(f'Baseline saved to {args.baseline}')
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['results'], args.time_tolerance, args.memory_tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            return 1
+        print('No regressions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
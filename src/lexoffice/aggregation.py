@@ -0,0 +1,196 @@
+""" Grouped counts and sums of vouchers and invoice line items in exact integer cents.
+
+The amounts of the API are floats, summing them as floats loses cents over large sets. The aggregators convert
+every amount once to integer cents and every group key (contact, month, currency, status, ...) to an integer
+code, kept in compact arrays: NumPy int64/int32 arrays if numpy is installed, array.array otherwise. A grouping
+then combines the codes of the requested keys into one group id per record and sums the cents per group id,
+vectorized with NumPy or in a single loop in pure Python. The results are equal in both cases and to the cent.
+"""
+import array
+import enum
+import itertools
+from collections.abc import Iterable, Sequence
+from decimal import Decimal
+from .columnar import voucher_columns, invoice_columns, line_item_columns
+
+# Largest combined group id before the ids are made dense again, so they do not overflow int64
+_MAX_GROUP_ID = 2 ** 62
+# Sums of float64 weights are exact integers as long as all partial sums are below this
+_MAX_EXACT_FLOAT = 2 ** 53
+
+
+def _numpy(use_numpy: bool):
+    if use_numpy is False:
+        return None
+    try:
+        import numpy
+    except ImportError:
+        if use_numpy:
+            raise
+        return None
+    return numpy
+
+
+def _cents(value) -> int:
+    # Amounts of the API have at most two decimals, so value * 100 is close to an integer
+    return round(value * 100) if value is not None else 0
+
+
+def _month(value) -> str:
+    """ :return: Month of a date as 'YYYY-MM', in the time zone of the date like the API shows it """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value[:7]
+    return f'{value.year:04d}-{value.month:02d}'
+
+
+def cents_to_decimal(cents: int) -> Decimal:
+    """ :return: Amount of the cents as Decimal with two decimals, e.g. 9980 -> Decimal('99.80') """
+    return Decimal(cents).scaleb(-2)
+
+
+class _Aggregator:
+    """ Group keys as integer codes and amounts as integer cents of a fixed set of records. """
+
+    def __init__(self, keys: dict[str, list], amounts: dict[str, list], use_numpy: bool = None):
+        np = self._np = _numpy(use_numpy)
+        self._len = len(next(iter(amounts.values())))
+        self._labels: dict[str, list] = {}
+        self._codes = {}
+        for name, values in keys.items():
+            codes = {}
+            column = [codes.setdefault(value, len(codes)) for value in values]
+            self._labels[name] = [label.value if isinstance(label, enum.Enum) else label for label in codes]
+            self._codes[name] = np.array(column, dtype=np.int32) if np else array.array('i', column)
+        self._cents = {}
+        self._exact_float = {}
+        for name, values in amounts.items():
+            if np:
+                cents = np.rint(np.array([0.0 if v is None else v for v in values], dtype=np.float64) * 100)
+                self._cents[name] = cents.astype(np.int64)
+                self._exact_float[name] = np.abs(cents).sum() < _MAX_EXACT_FLOAT
+            else:
+                self._cents[name] = array.array('q', [_cents(v) for v in values])
+
+    def __len__(self) -> int:
+        return self._len
+
+    @property
+    def keys(self) -> list[str]:
+        """ Names of the keys the records can be grouped by """
+        return list(self._codes)
+
+    def group_by(self, *keys: str) -> dict[tuple, dict[str, int]]:
+        """ Count the records and sum their amounts per group.
+
+        Amounts in different currencies are summed together unless 'currency' is one of the keys.
+
+        :param keys: Names of the keys to group by, e.g. 'contact_id', 'month'
+        :return: {(key values, ...): {'count': records, <amount>: sum in cents, ...}} of the non-empty groups
+        """
+        unknown = [key for key in keys if key not in self._codes]
+        if unknown:
+            raise ValueError(f'Unknown group keys: {", ".join(unknown)} - possible keys: {", ".join(self._codes)}')
+        if self._np is None:
+            return self._group_python(keys)
+        return self._group_numpy(keys)
+
+    def totals(self) -> dict[str, int]:
+        """ :return: {'count': records, <amount>: sum in cents, ...} of all records """
+        return self.group_by().get((), dict({'count': 0}, **{name: 0 for name in self._cents}))
+
+    def _group_python(self, keys: Sequence[str]) -> dict[tuple, dict[str, int]]:
+        names = list(self._cents)
+        codes = zip(*[self._codes[key] for key in keys]) if keys else itertools.repeat((), self._len)
+        sums = {}
+        for code, *cents in zip(codes, *self._cents.values()):
+            group = sums.get(code)
+            if group is None:
+                group = sums[code] = [0] * (len(names) + 1)
+            group[0] += 1
+            for i, value in enumerate(cents, 1):
+                group[i] += value
+        labels = [self._labels[key] for key in keys]
+        return {tuple(label[c] for label, c in zip(labels, code)): dict(zip(['count'] + names, group))
+                for code, group in sums.items()}
+
+    def _group_numpy(self, keys: Sequence[str]) -> dict[tuple, dict[str, int]]:
+        np = self._np
+        group = np.zeros(self._len, dtype=np.int64)
+        size = 1
+        for key in keys:
+            cardinality = max(len(self._labels[key]), 1)
+            if size * cardinality > _MAX_GROUP_ID:
+                _, group = np.unique(group, return_inverse=True)
+                size = int(group.max()) + 1
+            group = group * cardinality + self._codes[key]
+            size *= cardinality
+        if size > 2 * self._len + 65536:
+            # Only few of the possible combinations exist, count them instead of all
+            _, group = np.unique(group, return_inverse=True)
+            size = int(group.max()) + 1 if self._len else 1
+        counts = np.bincount(group, minlength=size)
+        present = np.flatnonzero(counts)
+        columns = {'count': counts[present].tolist()}
+        for name, cents in self._cents.items():
+            if self._exact_float[name]:
+                sums = np.rint(np.bincount(group, weights=cents, minlength=size)).astype(np.int64)
+            else:
+                sums = np.zeros(size, dtype=np.int64)
+                np.add.at(sums, group, cents)
+            columns[name] = sums[present].tolist()
+        # Any record of a group has the codes of the group
+        record = np.empty(size, dtype=np.int64)
+        record[group] = np.arange(self._len)
+        record = record[present]
+        labels = [[self._labels[key][code] for code in self._codes[key][record].tolist()] for key in keys]
+        group_keys = zip(*labels) if keys else [()] * len(present)
+        names = list(columns)
+        return {key: dict(zip(names, values)) for key, values in zip(group_keys, zip(*columns.values()))}
+
+
+class VoucherAggregator(_Aggregator):
+    """ Counts, total and open amounts of vouchers, grouped by contact_id, contact_name, month (of the voucher
+    date), due_month, currency, voucher_status or voucher_type.
+
+    E.g. the open balance per contact and currency:
+    VoucherAggregator(vouchers).group_by('contact_id', 'currency') -> {(id, 'EUR'): {'open_amount': 7480, ...}}
+    """
+    AMOUNTS = ('total_amount', 'open_amount')
+
+    def __init__(self, vouchers: Iterable, use_numpy: bool = None):
+        """ :param vouchers: Vouchers or their JSON dicts (e.g. the 'content' of voucherlist pages)
+        :param use_numpy: True to require numpy, False for pure Python, None to use numpy if installed
+        """
+        columns = voucher_columns(vouchers)
+        keys = {name: columns[name] for name in ('contact_id', 'contact_name', 'currency', 'voucher_status',
+                                                 'voucher_type')}
+        keys['month'] = [_month(date) for date in columns['voucher_date']]
+        keys['due_month'] = [_month(date) for date in columns['due_date']]
+        super().__init__(keys, {name: columns[name] for name in self.AMOUNTS}, use_numpy)
+
+
+class LineItemAggregator(_Aggregator):
+    """ Counts and line item amounts of the line items of invoices, grouped by the type, name, unit_name or
+    currency of the item or the contact_id, month (of the voucher date) or voucher_status of its invoice.
+
+    E.g. the revenue per product and month: LineItemAggregator(invoices).group_by('name', 'month')
+    """
+    AMOUNTS = ('line_item_amount',)
+
+    def __init__(self, invoices: Iterable, use_numpy: bool = None):
+        """ :param invoices: Invoices or their JSON dicts as returned by the /invoices endpoint
+        :param use_numpy: True to require numpy, False for pure Python, None to use numpy if installed
+        """
+        invoices = list(invoices)
+        items = line_item_columns(invoices)
+        heads = invoice_columns(invoices)
+        rows = {invoice_id: i for i, invoice_id in enumerate(heads['id'])}
+        rows = [rows[invoice_id] for invoice_id in items['invoice_id']]
+        months = [_month(date) for date in heads['voucher_date']]
+        keys = {name: items[name] for name in ('type', 'name', 'unit_name', 'currency')}
+        keys['contact_id'] = [heads['contact_id'][row] for row in rows]
+        keys['month'] = [months[row] for row in rows]
+        keys['voucher_status'] = [heads['voucher_status'][row] for row in rows]
+        super().__init__(keys, {name: items[name] for name in self.AMOUNTS}, use_numpy)
@@ -0,0 +1,238 @@
+import asyncio
+import time
+import uuid
+from collections.abc import AsyncIterator
+import aiohttp
+from .api import _voucherlist_params, _check_voucherlist_response
+from .datatypes import VoucherList, Voucher, Invoice, VoucherType, VoucherStatus
+from .decoding import JsonDecoder, get_decoder
+from .exceptions import LexofficeException
+from .interning import Interner
+from .metrics import RequestEvent, Observer, observe
+from .ratelimit import RateLimiter, Priority, shared_rate_limiter, retry_after
+from .singleflight import AsyncSingleFlight
+from .streaming import VoucherListParser, VoucherListStream, parse_chunk, CHUNK_SIZE
+
+
+class AsyncLexofficeClient:
+
+    def __init__(self, api_key, base_url: str = None, limit: int = 100, limit_per_host: int = 0,
+                 keep_alive: bool = True, timeout: float = None, rate_limit: float = 2.0, burst: int = 2,
+                 max_retries: int = 3, rate_limiter: RateLimiter = None, lazy_invoices: bool = False,
+                 decoder: JsonDecoder = None, observers: list[Observer] = None, single_flight: bool = False,
+                 interner: Interner = None):
+        """ Create an asyncio client for the lexoffice Public API (requires aiohttp).
+
+        All requests of a client share one aiohttp session with a pooled connector. The rate limiter
+        is the same one used by LexofficeClient, so sync and async clients of one API key share the budget.
+
+        :param api_key: API key used to authenticate against lexoffice
+        :param base_url: URL of the API (optional) - defaults to the lexoffice Public API
+        :param limit: Max. number of simultaneous connections
+        :param limit_per_host: Max. number of simultaneous connections per host (0 = no limit)
+        :param keep_alive: If False, every connection is closed after its request
+        :param timeout: Total timeout in seconds for each request (optional)
+        :param rate_limit: Max. requests per second, shared by all clients with the same API key - None disables it
+        :param burst: Max. number of requests sent at once after an idle period
+        :param max_retries: Number of retries if the API answers with 429 Too Many Requests
+        :param rate_limiter: Use this RateLimiter instead of the one shared per API key (optional)
+        :param lazy_invoices: If True, dates and sub-objects of invoices are only parsed when they are accessed
+        :param decoder: Decoder for the response bodies (optional) - defaults to the fastest installed one
+        :param observers: Callables receiving a RequestEvent after every API call (optional)
+        :param single_flight: If True, concurrent calls for the same invoice or voucherlist page share one request
+        :param interner: Interner deduplicating repeated values of all parsed vouchers and invoices (optional)
+        """
+        self.version = 1
+        self.url = base_url.rstrip('/') if base_url else f'https://api.lexoffice.io/v{self.version}'
+        self.api_key = api_key
+        self.headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Accept': 'application/json'
+        }
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        if rate_limiter is None and rate_limit is not None:
+            rate_limiter = shared_rate_limiter(api_key, rate_limit, burst)
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.lazy_invoices = lazy_invoices
+        self.decoder = decoder if decoder is not None else get_decoder()
+        self.observers = list(observers) if observers is not None else []
+        self.interner = interner
+        self.single_flight = AsyncSingleFlight() if single_flight else None
+        self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        """ Close the session and all pooled connections of this client. """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _session(self) -> aiohttp.ClientSession:
+        # The session has to be created inside the running event loop
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                             force_close=not self.keep_alive)
+            self.session = aiohttp.ClientSession(connector=connector, headers=self.headers,
+                                                 timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self.session
+
+    async def _get(self, path: str, params: dict = None, event: RequestEvent = None) -> tuple[int, dict]:
+        event = event if event is not None else RequestEvent(path)
+        status_code, body = await self._get_raw(path, params, event)
+        start = time.perf_counter()
+        content = self._error_body(body)
+        event.parse_time += time.perf_counter() - start
+        return status_code, content
+
+    async def _get_raw(self, path: str, params: dict = None, event: RequestEvent = None,
+                       priority: Priority = Priority.NORMAL) -> tuple[int, bytes]:
+        event = event if event is not None else RequestEvent(path)
+        response = await self._open(path, params, event, priority)
+        try:
+            start = time.perf_counter()
+            body = await response.read()
+            event.network_time += time.perf_counter() - start
+        finally:
+            response.release()
+        event.bytes += len(body)
+        return response.status, body
+
+    def _error_body(self, body: bytes) -> dict:
+        """ :return: Decoded body of an error response - empty if it is empty or no JSON object, e.g. of a proxy """
+        try:
+            content = self.decoder.loads(body) if body else {}
+        except ValueError:
+            return {}
+        return content if isinstance(content, dict) else {}
+
+    async def _open(self, path: str, params: dict, event: RequestEvent,
+                    priority: Priority = Priority.NORMAL) -> aiohttp.ClientResponse:
+        """ Send a request, retrying after 429, and return the response before its body has been read. """
+        if params is not None:
+            params = {key: str(value) for key, value in params.items() if value is not None}
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                event.rate_limit_wait += await self.rate_limiter.acquire_async(priority)
+            start = time.perf_counter()
+            response = await self._session().get(f'{self.url}{path}', params=params)
+            event.network_time += time.perf_counter() - start
+            event.status = response.status
+            if response.status != 429 or attempt >= self.max_retries:
+                return response
+            async with response:
+                event.bytes += len(await response.read())
+                delay = retry_after(response.headers.get('Retry-After'), default=2 ** attempt)
+            if self.rate_limiter is not None:
+                self.rate_limiter.block(delay)
+            else:
+                await asyncio.sleep(delay)
+                event.rate_limit_wait += delay
+            attempt += 1
+            event.retries = attempt
+
+    async def ping(self) -> bool:
+        """ Ping Lexoffice API and test the connection.
+
+        :return: True if the /ping endpoint could be requested successfully.
+        """
+        with observe(self.observers, '/ping') as event:
+            status_code, content = await self._get('/ping', event=event)
+            if status_code == 200:
+                print('Connected to lexoffice Public API')
+                print('User:', content['userEmail'])
+                return True
+            else:
+                return False
+
+    async def get_voucherlist(self, voucher_type: VoucherType, status: list[VoucherStatus] = None, page: int = None, size: int = None,
+                              sort: str = None, stream: bool = False,
+                              priority: Priority = Priority.NORMAL) -> VoucherList:
+        """ Fetch a voucherlist.
+
+        With `stream=True` a VoucherListStream is returned instead. The page is requested when iterating over it
+        with `async for` and the vouchers are yielded while the response is still being received.
+
+        :param voucher_type: type(s) of the vouchers to be fetched
+        :param status: status(es) of the vouchers to be fetched
+        :param page: Number of the page to be fetched (optional) - If not specified, the first page will be fetched
+        :param size: Size of the page (max. number of vouchers to be fetched
+        :param sort: Sort order, e.g. 'updatedDate,DESC' (optional)
+        :param stream: If True, return a VoucherListStream parsing the vouchers as they arrive
+        :param priority: Priority class of the request in the queue of the rate limiter
+        :return: VoucherList contatining the requested Vouchers
+        """
+        params = _voucherlist_params(voucher_type, status, page, size, sort)
+        if stream:
+            parser = VoucherListParser()
+            return VoucherListStream(self._stream_vouchers(params, parser, priority), parser)
+        if self.single_flight is not None:
+            # Calls only share a request of their own priority class, so it is queued by the rate limiter accordingly
+            return await self.single_flight.do(('voucherlist', tuple(params.items()), priority),
+                                               self._get_voucherlist, params, priority)
+        return await self._get_voucherlist(params, priority)
+
+    async def _get_voucherlist(self, params: dict, priority: Priority = Priority.NORMAL) -> VoucherList:
+        with observe(self.observers, '/voucherlist') as event:
+            status_code, body = await self._get_raw('/voucherlist', params, event, priority)
+            if status_code != 200:
+                _check_voucherlist_response(status_code, self._error_body(body))
+            start = time.perf_counter()
+            voucher_list = self.decoder.voucherlist(body)
+            if self.interner is not None:
+                self.interner.vouchers(voucher_list.content)
+            event.parse_time = time.perf_counter() - start
+            return voucher_list
+
+    async def _stream_vouchers(self, params: dict, parser: VoucherListParser,
+                               priority: Priority = Priority.NORMAL) -> AsyncIterator[Voucher]:
+        with observe(self.observers, '/voucherlist') as event:
+            response = await self._open('/voucherlist', params, event, priority)
+            try:
+                if response.status != 200:
+                    body = await response.read()
+                    _check_voucherlist_response(response.status, self._error_body(body))
+                chunks = response.content.iter_chunked(CHUNK_SIZE)
+                while not parser.done:
+                    start = time.perf_counter()
+                    chunk = await anext(chunks, None)
+                    event.network_time += time.perf_counter() - start
+                    for voucher in parse_chunk(parser, chunk, event, self.interner):
+                        yield voucher
+            finally:
+                response.release()
+
+    async def get_invoice(self, invoice_id: uuid.UUID, priority: Priority = Priority.NORMAL) -> Invoice:
+        """ Fetches an invoice with the specified ID from the /invoices endpoint.
+
+        :param invoice_id: The UUID of the requested invoice
+        :param priority: Priority class of the request, e.g. Priority.INTERACTIVE for a user waiting for it
+        :return: Invoice that was requested
+        :raise LexofficeException if an error has occurred during the API call.
+        """
+        if self.single_flight is not None:
+            return await self.single_flight.do(('invoice', invoice_id, priority), self._get_invoice, invoice_id,
+                                               priority)
+        return await self._get_invoice(invoice_id, priority)
+
+    async def _get_invoice(self, invoice_id: uuid.UUID, priority: Priority = Priority.NORMAL) -> Invoice:
+        with observe(self.observers, '/invoices/{id}') as event:
+            status_code, body = await self._get_raw(f'/invoices/{str(invoice_id)}', event=event, priority=priority)
+            if status_code != 200:
+                raise LexofficeException(None, 'Error while getting invoice from Lexoffice API',
+                                         status_code=status_code, body=self._error_body(body))
+            start = time.perf_counter()
+            invoice = self.decoder.invoice(body, lazy=self.lazy_invoices)
+            if self.interner is not None:
+                self.interner.invoice(invoice)
+            event.parse_time = time.perf_counter() - start
+            return invoice
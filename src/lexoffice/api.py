@@ -1,85 +1,533 @@
+import itertools
+import time
 import uuid
+from datetime import datetime
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Union
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
-from .datatypes import VoucherList, Invoice, VoucherType, VoucherStatus
+from .datatypes import VoucherList, Voucher, Invoice, VoucherType, VoucherStatus, EventSubscription, Contact, \
+    ContactList
+from .cache import InvoiceCache
+from .decoding import JsonDecoder, get_decoder
 from .exceptions import LexofficeException
+from .interning import Interner
+from .metrics import RequestEvent, Observer, observe
+from .ratelimit import RateLimiter, Priority, shared_rate_limiter, retry_after
+from .singleflight import SingleFlight
+from .store import LocalStore
+from .streaming import VoucherListParser, VoucherListStream, parse_chunk, CHUNK_SIZE
+
+def _voucherlist_params(voucher_type: VoucherType, status: list[VoucherStatus], page: int, size: int,
+                        sort: str = None) -> dict:
+    if status is None:
+        status_str = ["any"]
+    else:
+        status_str = []
+        for s in status:
+            status_str.append(s.value)
+    return {
+        'voucherType': voucher_type.value,
+        'voucherStatus': ','.join(status_str),
+        'page': page,
+        'size': size,
+        'sort': sort
+    }
+
+
+def _check_voucherlist_response(status_code: int, content: dict):
+    if status_code != 200:
+        if 'error' in content and 'message' in content:
+            error = content['error']
+            msg = content['message']
+            raise RequestException(f'{error}: {msg}')
+        else:
+            msg = content.get('message')
+            raise RequestException(f'Error while getting VoucherList from Lexoffice API: {msg}')
+
+
+def _iter_pages(get_page: Callable[[int], Union[VoucherList, ContactList]], prefetch: bool) -> Iterator:
+    """ Iterate over the content of all pages of a paged endpoint, fetching page after page on demand.
+
+    :param get_page: Fetches the page with the given number
+    :param prefetch: If True, the next page is fetched in a background thread while the current one is consumed
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='lexoffice-prefetch') if prefetch else None
+    try:
+        page = 0
+        page_list = get_page(page)
+        while True:
+            next_page = None
+            if not page_list.last and page_list.content:
+                page += 1
+                if executor is not None:
+                    next_page = executor.submit(get_page, page)
+            yield from page_list.content
+            if page_list.last or not page_list.content:
+                return
+            # Drop the consumed page before waiting for the next one
+            page_list = None
+            page_list = next_page.result() if next_page is not None else get_page(page)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+class InvoiceResult:
+    """ Result of fetching one invoice of a bulk request - either the invoice or the error that occurred. """
+    invoice_id: uuid.UUID
+    invoice: Invoice = None
+    error: Exception = None
+
+    def __init__(self, invoice_id: uuid.UUID, invoice: Invoice = None, error: Exception = None):
+        self.invoice_id = invoice_id
+        self.invoice = invoice
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
 
 class LexofficeClient:
 
-    def __init__(self, api_key):
+    def __init__(self, api_key, base_url: str = None, pool_connections: int = 10, pool_maxsize: int = 10,
+                 pool_block: bool = False, keep_alive: bool = True, timeout: float = None,
+                 rate_limit: float = 2.0, burst: int = 2, max_retries: int = 3, rate_limiter: RateLimiter = None,
+                 cache: InvoiceCache = None, store: LocalStore = None, lazy_invoices: bool = False,
+                 decoder: JsonDecoder = None, observers: list[Observer] = None, single_flight: bool = False,
+                 adapter: HTTPAdapter = None, interner: Interner = None):
+        """ Create a client for the lexoffice Public API.
+
+        All requests of a client share one session, so TCP/TLS connections are kept alive and reused.
+        The connection pool is thread-safe, one client can be shared by several worker threads.
+        Requests waiting for the rate limit are queued by their priority class, which most methods take as
+        `priority` argument, so interactive calls are sent before queued background work.
+
+        :param api_key: API key used to authenticate against lexoffice
+        :param base_url: URL of the API (optional) - defaults to the lexoffice Public API
+        :param pool_connections: Number of per-host connection pools to cache
+        :param pool_maxsize: Max. number of connections kept open per host
+        :param pool_block: If True, threads wait for a free connection instead of opening extra connections
+        :param keep_alive: If False, every connection is closed after its request
+        :param timeout: Timeout in seconds for each request (optional)
+        :param rate_limit: Max. requests per second, shared by all clients with the same API key - None disables it
+        :param burst: Max. number of requests sent at once after an idle period
+        :param max_retries: Number of retries if the API answers with 429 Too Many Requests
+        :param rate_limiter: Use this RateLimiter instead of the one shared per API key (optional)
+        :param cache: Cache for invoices fetched by get_invoice (optional)
+        :param store: Local store that fetched vouchers and invoices are written to and invoices are read from (optional)
+        :param lazy_invoices: If True, dates and sub-objects of invoices are only parsed when they are accessed
+        :param decoder: Decoder for the response bodies (optional) - defaults to the fastest installed one
+        :param observers: Callables receiving a RequestEvent after every API call (optional)
+        :param single_flight: If True, concurrent calls for the same invoice or voucherlist page share one request
+        :param interner: Interner deduplicating repeated values of all parsed vouchers and invoices (optional)
+        :param adapter: Use this HTTPAdapter and its connection pool, e.g. one shared by several clients, instead of
+            creating one from the pool_* parameters (optional) - it is not closed by close()
+        """
         self.version = 1
-        self.url = f'https://api.lexoffice.io/v{self.version}'
+        self.url = base_url.rstrip('/') if base_url else f'https://api.lexoffice.io/v{self.version}'
         self.api_key = api_key
+        self.timeout = timeout
         self.headers = {
             'Authorization': f'Bearer {self.api_key}',
             'Accept': 'application/json'
         }
+        if not keep_alive:
+            self.headers['Connection'] = 'close'
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self._owns_adapter = adapter is None
+        if adapter is None:
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if rate_limiter is None and rate_limit is not None:
+            rate_limiter = shared_rate_limiter(api_key, rate_limit, burst)
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.cache = cache
+        self.store = store
+        self.lazy_invoices = lazy_invoices
+        self.decoder = decoder if decoder is not None else get_decoder()
+        self.observers = list(observers) if observers is not None else []
+        self.interner = interner
+        self.single_flight = SingleFlight() if single_flight else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """ Close all pooled connections of this client, unless they belong to a shared adapter. """
+        if self._owns_adapter:
+            self.session.close()
+
+    def _get(self, path: str, params: dict = None, headers: dict = None, event: RequestEvent = None,
+             stream: bool = False, priority: Priority = Priority.NORMAL) -> requests.Response:
+        return self._request('GET', path, params=params, headers=headers, event=event, stream=stream,
+                             priority=priority)
+
+    def _request(self, method: str, path: str, params: dict = None, headers: dict = None, json: dict = None,
+                 event: RequestEvent = None, stream: bool = False,
+                 priority: Priority = Priority.NORMAL) -> requests.Response:
+        event = event if event is not None else RequestEvent(path)
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                event.rate_limit_wait += self.rate_limiter.acquire(priority)
+            start = time.perf_counter()
+            response = self.session.request(
+                method,
+                url=f'{self.url}{path}',
+                params=params,
+                headers=headers,
+                json=json,
+                timeout=self.timeout,
+                stream=stream
+            )
+            event.network_time += time.perf_counter() - start
+            event.status = response.status_code
+            if not stream:
+                event.bytes += len(response.content)
+            if response.status_code != 429 or attempt >= self.max_retries:
+                return response
+            response.close()
+            delay = retry_after(response.headers.get('Retry-After'), default=2 ** attempt)
+            if self.rate_limiter is not None:
+                self.rate_limiter.block(delay)
+            else:
+                time.sleep(delay)
+                event.rate_limit_wait += delay
+            attempt += 1
+            event.retries = attempt
 
     def ping(self) -> bool:
         """ Ping Lexoffice API and test the connection.
 
         :return: True if the /ping endpoint could be requested successfully.
         """
-        response = requests.get(
-            url=f'{self.url}/ping',
-            headers=self.headers
-        )
-        if response.status_code == 200:
-            print('Connected to lexoffice Public API')
-            print('User:', response.json()['userEmail'])
-            return True
-        else:
-            return False
+        with observe(self.observers, '/ping') as event:
+            response = self._get('/ping', event=event)
+            if response.status_code == 200:
+                start = time.perf_counter()
+                content = response.json()
+                event.parse_time = time.perf_counter() - start
+                print('Connected to lexoffice Public API')
+                print('User:', content['userEmail'])
+                return True
+            else:
+                return False
 
-    def get_voucherlist(self, voucher_type: VoucherType, status: list[VoucherStatus] = None, page: int = None, size: int = None) -> VoucherList:
+    def get_voucherlist(self, voucher_type: VoucherType, status: list[VoucherStatus] = None, page: int = None, size: int = None,
+                        sort: str = None, stream: bool = False, priority: Priority = Priority.NORMAL) -> VoucherList:
         """ Fetch a voucherlist.
 
+        With `stream=True` a VoucherListStream is returned instead. The page is requested when iterating over it
+        and the vouchers are yielded while the response is still being received.
+
         :param voucher_type: type(s) of the vouchers to be fetched
         :param status: status(es) of the vouchers to be fetched
         :param page: Number of the page to be fetched (optional) - If not specified, the first page will be fetched
         :param size: Size of the page (max. number of vouchers to be fetched
+        :param sort: Sort order, e.g. 'updatedDate,DESC' (optional)
+        :param stream: If True, return a VoucherListStream parsing the vouchers as they arrive
+        :param priority: Priority class of the request in the queue of the rate limiter
         :return: VoucherList contatining the requested Vouchers
         """
-        if status is None:
-            status_str = ["any"]
-        else:
-            status_str = []
-            for s in status:
-                status_str.append(s.value)
-        params = {
-            'voucherType': voucher_type.value,
-            'voucherStatus': ','.join(status_str),
-            'page': page,
-            'size': size
-        }
-        response = requests.get(
-            url=f'{self.url}/voucherlist',
-            headers=self.headers,
-            params=params
-        )
-        content = response.json()
-        if response.status_code != 200:
-            if 'error' in content and 'message' in content:
-                error = content['error']
-                msg = content['message']
-                raise RequestException(f'{error}: {msg}')
-            else:
-                msg = content['message']
-                raise RequestException(f'Error while getting VoucherList from Lexoffice API: {msg}')
-        return VoucherList(content)
+        params = _voucherlist_params(voucher_type, status, page, size, sort)
+        if stream:
+            parser = VoucherListParser()
+            return VoucherListStream(self._stream_vouchers(params, parser, priority), parser)
+        if self.single_flight is not None:
+            # Calls only share a request of their own priority class, so it is queued by the rate limiter accordingly
+            return self.single_flight.do(('voucherlist', tuple(params.items()), priority), self._get_voucherlist,
+                                         params, priority)
+        return self._get_voucherlist(params, priority)
+
+    def _get_voucherlist(self, params: dict, priority: Priority = Priority.NORMAL) -> VoucherList:
+        with observe(self.observers, '/voucherlist') as event:
+            response = self._get('/voucherlist', params=params, event=event, priority=priority)
+            if response.status_code != 200:
+                _check_voucherlist_response(response.status_code, response.json())
+            start = time.perf_counter()
+            voucher_list = self.decoder.voucherlist(response.content)
+            if self.interner is not None:
+                self.interner.vouchers(voucher_list.content)
+            event.parse_time = time.perf_counter() - start
+        if self.store is not None:
+            self.store.put_vouchers(voucher_list.content)
+        return voucher_list
+
+    def _stream_vouchers(self, params: dict, parser: VoucherListParser,
+                         priority: Priority = Priority.NORMAL) -> Iterator[Voucher]:
+        with observe(self.observers, '/voucherlist') as event:
+            response = self._get('/voucherlist', params=params, event=event, stream=True, priority=priority)
+            with response:
+                if response.status_code != 200:
+                    _check_voucherlist_response(response.status_code, response.json())
+                chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+                while not parser.done:
+                    start = time.perf_counter()
+                    chunk = next(chunks, None)
+                    event.network_time += time.perf_counter() - start
+                    vouchers = parse_chunk(parser, chunk, event, self.interner)
+                    if self.store is not None and vouchers:
+                        self.store.put_vouchers(vouchers)
+                    yield from vouchers
 
-    def get_invoice(self, invoice_id: uuid.UUID) -> Invoice:
+    def iter_vouchers(self, voucher_type: VoucherType, status: list[VoucherStatus] = None, size: int = 250,
+                      sort: str = None, prefetch: bool = True,
+                      priority: Priority = Priority.NORMAL) -> Iterator[Voucher]:
+        """ Iterate over all vouchers of a voucherlist, fetching page after page on demand.
+
+        While the caller consumes a page, the next one is already fetched in a background thread.
+        At most two pages are held in memory, independent of the total number of vouchers.
+
+        :param voucher_type: type(s) of the vouchers to be fetched
+        :param status: status(es) of the vouchers to be fetched
+        :param size: Size of the pages to be fetched (max. 250)
+        :param sort: Sort order, e.g. 'updatedDate,DESC' (optional)
+        :param prefetch: If False, the next page is only fetched after the current page has been consumed
+        :param priority: Priority class of the requests, e.g. Priority.BACKGROUND for bulk jobs
+        :return: Iterator over the Vouchers of all pages
+        """
+        return _iter_pages(lambda page: self.get_voucherlist(voucher_type, status, page=page, size=size, sort=sort,
+                                                             priority=priority), prefetch)
+
+    def get_invoice(self, invoice_id: uuid.UUID, version: int = None, updated_date: datetime = None,
+                    priority: Priority = Priority.NORMAL) -> Invoice:
         """ Fetches an invoice with the specified ID from the /invoices endpoint.
 
+        If the client has a cache, a cached invoice is returned as long as it has not expired. Expired invoices
+        are revalidated with their ETag, so unchanged invoices are not downloaded and parsed again.
+        If the client has a local store, invoices that are not cached with an ETag are read from it before they are
+        requested from the API. Stored invoices are not checked for changes, so they override the TTL of the cache
+        unless `version` or `updated_date` is given - keep the store up to date, e.g. with a SyncEngine.
+
         :param invoice_id: The UUID of the requested invoice
+        :param version: Known version of the invoice - an older cached or stored invoice is not used (optional)
+        :param updated_date: Known update date of the invoice - an older cached or stored invoice is not used (optional)
+        :param priority: Priority class of the request, e.g. Priority.INTERACTIVE for a user waiting for it
         :return: Invoice that was requested
         :raise RequestException if an error has occurred during the API call.
         """
-        response = requests.get(
-            url=f'{self.url}/invoices/{str(invoice_id)}',
-            headers=self.headers
-        )
-        content = response.json()
-        if response.status_code != 200:
-            raise LexofficeException(response, 'Error while getting invoice from Lexoffice API')
-        return Invoice(content)
+        if self.single_flight is not None:
+            return self.single_flight.do(('invoice', invoice_id, version, updated_date, priority), self._get_invoice,
+                                         invoice_id, version, updated_date, priority)
+        return self._get_invoice(invoice_id, version, updated_date, priority)
+
+    def _get_invoice(self, invoice_id: uuid.UUID, version: int = None, updated_date: datetime = None,
+                     priority: Priority = Priority.NORMAL) -> Invoice:
+        headers = None
+        etag = None
+        if self.cache is not None:
+            invoice = self.cache.get(invoice_id, version, updated_date)
+            if invoice is not None:
+                return invoice
+            etag = self.cache.etag(invoice_id)
+        if etag is not None:
+            # An expired invoice is revalidated with the API, the store has no fresher copy of it
+            headers = {'If-None-Match': etag}
+        elif self.store is not None:
+            invoice = self.store.get_invoice(invoice_id)
+            if invoice is not None and not invoice.is_older_than(version, updated_date):
+                if self.cache is not None:
+                    self.cache.put(invoice_id, invoice)
+                return invoice
+        with observe(self.observers, '/invoices/{id}') as event:
+            response = self._get(f'/invoices/{str(invoice_id)}', headers=headers, event=event, priority=priority)
+            if response.status_code == 304 and self.cache is not None:
+                invoice = self.cache.revalidate(invoice_id)
+                if invoice is not None:
+                    return invoice
+                response = self._get(f'/invoices/{str(invoice_id)}', event=event, priority=priority)
+            if response.status_code != 200:
+                raise LexofficeException(response, 'Error while getting invoice from Lexoffice API')
+            start = time.perf_counter()
+            invoice = self.decoder.invoice(response.content, lazy=self.lazy_invoices)
+            if self.interner is not None:
+                self.interner.invoice(invoice)
+            event.parse_time = time.perf_counter() - start
+        if self.cache is not None:
+            self.cache.put(invoice_id, invoice, size=len(response.content), etag=response.headers.get('ETag'))
+        if self.store is not None:
+            self.store.put_invoice(invoice)
+        return invoice
+
+    def _invoice_result(self, invoice_id: uuid.UUID, updated_date: datetime = None,
+                        priority: Priority = Priority.NORMAL) -> InvoiceResult:
+        try:
+            return InvoiceResult(invoice_id, invoice=self.get_invoice(invoice_id, updated_date=updated_date,
+                                                                      priority=priority))
+        except Exception as ex:
+            return InvoiceResult(invoice_id, error=ex)
+
+    def get_invoices(self, invoice_ids: Iterable[uuid.UUID], max_workers: int = 4, ordered: bool = False,
+                     updated_dates: dict[uuid.UUID, datetime] = None,
+                     priority: Priority = Priority.NORMAL) -> Iterator[InvoiceResult]:
+        """ Fetch many invoices concurrently.
+
+        The invoices are fetched by a pool of worker threads, which all share the rate limit of this client.
+        Only a few ids more than `max_workers` are in flight at once, so `invoice_ids` may be a lazy iterator.
+        A failing invoice does not abort the batch, its error is returned as result instead.
+
+        :param invoice_ids: The UUIDs of the requested invoices
+        :param max_workers: Number of invoices fetched at the same time
+        :param ordered: If True, results are returned in the order of `invoice_ids`, else as soon as they complete
+        :param updated_dates: Known update dates by id - older cached or stored invoices are not used (optional)
+        :param priority: Priority class of the requests, e.g. Priority.BACKGROUND for bulk jobs
+        :return: Iterator over an InvoiceResult per requested id
+        """
+        ids = iter(invoice_ids)
+        updated_dates = updated_dates or {}
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='lexoffice-invoices')
+        pending = deque()
+
+        def submit(count: int):
+            for invoice_id in itertools.islice(ids, count):
+                pending.append(executor.submit(self._invoice_result, invoice_id, updated_dates.get(invoice_id),
+                                               priority))
+
+        try:
+            submit(2 * max_workers)
+            while pending:
+                if ordered:
+                    done = [pending.popleft()]
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+                submit(len(done))
+                for future in done:
+                    yield future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_contact(self, contact_id: uuid.UUID, priority: Priority = Priority.NORMAL) -> Contact:
+        """ Fetch a contact.
+
+        :param contact_id: The UUID of the contact
+        :param priority: Priority class of the request in the queue of the rate limiter
+        :return: Contact that was requested or None if it does not exist
+        :raise LexofficeException if an error has occurred during the API call
+        """
+        with observe(self.observers, '/contacts/{id}') as event:
+            response = self._get(f'/contacts/{str(contact_id)}', event=event, priority=priority)
+            if response.status_code == 404:
+                return None
+            if response.status_code != 200:
+                raise LexofficeException(response, 'Error while getting contact from Lexoffice API')
+            start = time.perf_counter()
+            contact = Contact(self.decoder.loads(response.content))
+            event.parse_time = time.perf_counter() - start
+            return contact
+
+    def get_contacts(self, page: int = 0, size: int = 250, customer: bool = None, vendor: bool = None,
+                     name: str = None, email: str = None, number: int = None,
+                     priority: Priority = Priority.NORMAL) -> ContactList:
+        """ Fetch a page of contacts.
+
+        :param page: Number of the page to be fetched
+        :param size: Size of the page (max. 250)
+        :param customer: If True, only customers are fetched, if False only contacts without the customer role
+        :param vendor: If True, only vendors are fetched, if False only contacts without the vendor role
+        :param name: Only contacts whose name contains this (min. 3 characters, optional)
+        :param email: Only contacts with this email address (optional)
+        :param number: Only the contact with this customer or vendor number (optional)
+        :param priority: Priority class of the request in the queue of the rate limiter
+        :return: ContactList containing the requested contacts
+        :raise LexofficeException if an error has occurred during the API call
+        """
+        params = {'page': page, 'size': size, 'name': name, 'email': email, 'number': number}
+        if customer is not None:
+            params['customer'] = str(customer).lower()
+        if vendor is not None:
+            params['vendor'] = str(vendor).lower()
+        with observe(self.observers, '/contacts') as event:
+            response = self._get('/contacts', params=params, event=event, priority=priority)
+            if response.status_code != 200:
+                raise LexofficeException(response, 'Error while getting contacts from Lexoffice API')
+            start = time.perf_counter()
+            contact_list = ContactList(self.decoder.loads(response.content))
+            event.parse_time = time.perf_counter() - start
+            return contact_list
+
+    def iter_contacts(self, size: int = 250, prefetch: bool = True, priority: Priority = Priority.NORMAL,
+                      **filters) -> Iterator[Contact]:
+        """ Iterate over all contacts, fetching page after page on demand like iter_vouchers().
+
+        :param size: Size of the pages to be fetched (max. 250)
+        :param prefetch: If False, the next page is only fetched after the current page has been consumed
+        :param priority: Priority class of the requests, e.g. Priority.BACKGROUND for bulk loads
+        :param filters: Filters of get_contacts, e.g. customer=True
+        :return: Iterator over the Contacts of all pages
+        """
+        return _iter_pages(lambda page: self.get_contacts(page, size, priority=priority, **filters), prefetch)
+
+    def create_event_subscription(self, event_type: str, callback_url: str,
+                                  priority: Priority = Priority.NORMAL) -> uuid.UUID:
+        """ Subscribe a callback URL to an event type, so lexoffice posts an Event to it whenever such an event occurs.
+
+        :param event_type: type of the events, e.g. 'invoice.changed' or 'invoice.deleted'
+        :param callback_url: Public HTTPS URL of a webhook receiver
+        :param priority: Priority class of the request in the queue of the rate limiter
+        :return: The UUID of the new subscription
+        :raise LexofficeException if the subscription could not be created, e.g. because it already exists
+        """
+        with observe(self.observers, '/event-subscriptions') as event:
+            response = self._request('POST', '/event-subscriptions', event=event, priority=priority,
+                                     json={'eventType': event_type, 'callbackUrl': callback_url})
+            if response.status_code not in (200, 201):
+                raise LexofficeException(response, 'Error while creating event subscription')
+            return uuid.UUID(response.json()['id'])
+
+    def get_event_subscription(self, subscription_id: uuid.UUID,
+                               priority: Priority = Priority.NORMAL) -> EventSubscription:
+        """ Fetch an event subscription.
+
+        :param subscription_id: The UUID of the subscription
+        :param priority: Priority class of the request in the queue of the rate limiter
+        :return: EventSubscription that was requested
+        :raise LexofficeException if an error has occurred during the API call
+        """
+        with observe(self.observers, '/event-subscriptions/{id}') as event:
+            response = self._get(f'/event-subscriptions/{str(subscription_id)}', event=event, priority=priority)
+            if response.status_code != 200:
+                raise LexofficeException(response, 'Error while getting event subscription from Lexoffice API')
+            return EventSubscription(response.json())
+
+    def get_event_subscriptions(self, priority: Priority = Priority.NORMAL) -> list[EventSubscription]:
+        """ Fetch all event subscriptions of the API key.
+
+        :param priority: Priority class of the request in the queue of the rate limiter
+        :return: List of all EventSubscriptions
+        :raise LexofficeException if an error has occurred during the API call
+        """
+        with observe(self.observers, '/event-subscriptions') as event:
+            response = self._get('/event-subscriptions', event=event, priority=priority)
+            if response.status_code != 200:
+                raise LexofficeException(response, 'Error while getting event subscriptions from Lexoffice API')
+            return [EventSubscription(subscription) for subscription in response.json().get('content') or []]
+
+    def delete_event_subscription(self, subscription_id: uuid.UUID, priority: Priority = Priority.NORMAL) -> bool:
+        """ Delete an event subscription, so no more events are posted for it.
+
+        :param subscription_id: The UUID of the subscription
+        :param priority: Priority class of the request in the queue of the rate limiter
+        :return: True if the subscription has been deleted, False if it did not exist
+        :raise LexofficeException if an error has occurred during the API call
+        """
+        with observe(self.observers, '/event-subscriptions/{id}') as event:
+            response = self._request('DELETE', f'/event-subscriptions/{str(subscription_id)}', event=event,
+                                     priority=priority)
+            if response.status_code == 404:
+                return False
+            if response.status_code not in (200, 204):
+                raise LexofficeException(response, 'Error while deleting event subscription')
+            return True
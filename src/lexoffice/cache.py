@@ -0,0 +1,155 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from .datatypes import Invoice
+
+
+class _Entry:
+    invoice: Invoice
+    size: int
+    etag: str
+    expires: float
+
+    def __init__(self, invoice: Invoice, size: int, etag: str, expires: float):
+        self.invoice = invoice
+        self.size = size
+        self.etag = etag
+        self.expires = expires
+
+
+class InvoiceCache:
+    """ Thread-safe in-memory cache for invoices with LRU eviction and expiry.
+
+    Expired entries with an ETag are kept, so they can be revalidated with a conditional request
+    instead of downloading and parsing the invoice again.
+    """
+    max_entries: int
+    max_bytes: int
+    ttl: float
+    hits: int
+    misses: int
+    evictions: int
+    revalidations: int
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = None, ttl: float = 300.0):
+        """ :param max_entries: Max. number of cached invoices
+        :param max_bytes: Max. total size of the cached invoices as received from the API (optional)
+        :param ttl: Time in seconds an invoice is served without asking the API again - None for no expiry
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revalidations = 0
+        self._entries: OrderedDict[uuid.UUID, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """ Total size in bytes of the cached invoices. """
+        return self._bytes
+
+    def _expires(self) -> float:
+        return time.monotonic() + self.ttl if self.ttl is not None else float('inf')
+
+    def _remove(self, invoice_id: uuid.UUID):
+        entry = self._entries.pop(invoice_id)
+        self._bytes -= entry.size
+
+    def get(self, invoice_id: uuid.UUID, version: int = None, updated_date: datetime = None) -> Invoice:
+        """ Get an invoice that has not expired yet.
+
+        :param invoice_id: The UUID of the invoice
+        :param version: Known version of the invoice - older cached invoices are dropped (optional)
+        :param updated_date: Known update date of the invoice - older cached invoices are dropped (optional)
+        :return: The cached invoice or None
+        """
+        with self._lock:
+            entry = self._entries.get(invoice_id)
+            if entry is not None and entry.invoice.is_older_than(version, updated_date):
+                self._remove(invoice_id)
+                entry = None
+            if entry is None or entry.expires < time.monotonic():
+                if entry is not None and entry.etag is None:
+                    self._remove(invoice_id)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(invoice_id)
+            self.hits += 1
+            return entry.invoice
+
+    def etag(self, invoice_id: uuid.UUID) -> str:
+        """ :return: ETag of the cached invoice, also if it has expired, or None """
+        with self._lock:
+            entry = self._entries.get(invoice_id)
+            return entry.etag if entry is not None else None
+
+    def revalidate(self, invoice_id: uuid.UUID) -> Invoice:
+        """ Mark a cached invoice as fresh again after the API confirmed it is unchanged.
+
+        :param invoice_id: The UUID of the invoice
+        :return: The cached invoice or None if it has been evicted in the meantime
+        """
+        with self._lock:
+            entry = self._entries.get(invoice_id)
+            if entry is None:
+                return None
+            entry.expires = self._expires()
+            self._entries.move_to_end(invoice_id)
+            self.revalidations += 1
+            return entry.invoice
+
+    def put(self, invoice_id: uuid.UUID, invoice: Invoice, size: int = 0, etag: str = None):
+        """ Add or replace an invoice and evict the least recently used ones if the cache is full.
+
+        An invoice larger than max_bytes is not cached, an older entry of it is dropped.
+
+        :param invoice_id: The UUID of the invoice
+        :param invoice: The invoice to be cached
+        :param size: Size in bytes of the invoice as received from the API
+        :param etag: ETag header the API sent with the invoice (optional)
+        """
+        with self._lock:
+            if invoice_id in self._entries:
+                self._remove(invoice_id)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[invoice_id] = _Entry(invoice, size, etag, self._expires())
+            self._bytes += size
+            while len(self._entries) > 1 and (
+                    len(self._entries) > self.max_entries
+                    or (self.max_bytes is not None and self._bytes > self.max_bytes)):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, invoice_id: uuid.UUID, version: int = None, updated_date: datetime = None) -> bool:
+        """ Drop a cached invoice.
+
+        :param invoice_id: The UUID of the invoice
+        :param version: Only drop the invoice if it is older than this version (optional)
+        :param updated_date: Only drop the invoice if it is older than this date (optional)
+        :return: True if an invoice has been dropped
+        """
+        with self._lock:
+            entry = self._entries.get(invoice_id)
+            if entry is None:
+                return False
+            if (version is not None or updated_date is not None) \
+                    and not entry.invoice.is_older_than(version, updated_date):
+                return False
+            self._remove(invoice_id)
+            return True
+
+    def clear(self):
+        """ Drop all cached invoices. """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
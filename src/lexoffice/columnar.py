@@ -0,0 +1,355 @@
+""" Columnar conversion of vouchers and invoice line items for NumPy, Arrow and pandas.
+
+The columns are built in one pass, either from parsed objects or directly from the JSON dicts of the API,
+then handed to the optional libraries at once: dates become UTC datetime64/timestamps, enums and currencies
+become categoricals/dictionaries and amounts become float64 or decimals.
+"""
+from collections.abc import Iterable
+from datetime import datetime
+from decimal import Decimal
+from .datatypes import VoucherType, VoucherStatus, Type, _str_or_none
+
+_STR = 'str'
+_CATEGORY = 'category'
+_DATE = 'date'
+_AMOUNT = 'amount'
+# Unit prices of line items may have up to 4 decimal places
+_PRICE = 'price'
+_NUMBER = 'number'
+_BOOL = 'bool'
+# Decimal places of the decimal128 columns per kind
+_SCALES = {_AMOUNT: 2, _PRICE: 4}
+
+# column: (kind, key in the JSON dict, categories)
+VOUCHER_SCHEMA = {
+    'id': (_STR, 'id', None),
+    'voucher_type': (_CATEGORY, 'voucherType', [t.value for t in VoucherType]),
+    'voucher_status': (_CATEGORY, 'voucherStatus', [s.value for s in VoucherStatus]),
+    'voucher_number': (_STR, 'voucherNumber', None),
+    'voucher_date': (_DATE, 'voucherDate', None),
+    'created_date': (_DATE, 'createdDate', None),
+    'updated_date': (_DATE, 'updatedDate', None),
+    'due_date': (_DATE, 'dueDate', None),
+    'contact_id': (_STR, 'contactId', None),
+    'contact_name': (_STR, 'contactName', None),
+    'total_amount': (_AMOUNT, 'totalAmount', None),
+    'open_amount': (_AMOUNT, 'openAmount', None),
+    'currency': (_CATEGORY, 'currency', None),
+    'archived': (_BOOL, 'archived', None),
+}
+
+INVOICE_SCHEMA = {
+    'id': (_STR, 'id', None),
+    'organization_id': (_STR, 'organizationId', None),
+    'version': (_NUMBER, 'version', None),
+    'language': (_CATEGORY, 'language', None),
+    'archived': (_BOOL, 'archived', None),
+    'voucher_status': (_CATEGORY, 'voucherStatus', [s.value for s in VoucherStatus]),
+    'voucher_number': (_STR, 'voucherNumber', None),
+    'voucher_date': (_DATE, 'voucherDate', None),
+    'created_date': (_DATE, 'createdDate', None),
+    'updated_date': (_DATE, 'updatedDate', None),
+    'due_date': (_DATE, 'dueDate', None),
+    'contact_id': (_STR, 'contactId', None),
+    'name': (_STR, 'name', None),
+    'street': (_STR, 'street', None),
+    'zip': (_NUMBER, 'zip', None),
+    'city': (_STR, 'city', None),
+    'country_code': (_CATEGORY, 'countryCode', None),
+    'currency': (_CATEGORY, 'currency', None),
+    'total_net_amount': (_AMOUNT, 'totalNetAmount', None),
+    'total_gross_amount': (_AMOUNT, 'totalGrossAmount', None),
+    'total_tax_amount': (_AMOUNT, 'totalTaxAmount', None),
+}
+
+LINE_ITEM_SCHEMA = {
+    'invoice_id': (_STR, None, None),
+    'id': (_STR, 'id', None),
+    'type': (_CATEGORY, 'type', [t.value for t in Type]),
+    'name': (_STR, 'name', None),
+    'description': (_STR, 'description', None),
+    'quantity': (_NUMBER, 'quantity', None),
+    'unit_name': (_STR, 'unitName', None),
+    'currency': (_CATEGORY, 'currency', None),
+    'net_amount': (_PRICE, 'netAmount', None),
+    'gross_amount': (_PRICE, 'grossAmount', None),
+    'tax_rate_percentage': (_NUMBER, 'taxRatePercentage', None),
+    'discount_percentage': (_NUMBER, 'discountPercentage', None),
+    'line_item_amount': (_AMOUNT, 'lineItemAmount', None),
+}
+
+_NAT = -2 ** 63
+# keys of INVOICE_SCHEMA contained in a sub-object of the invoice
+_INVOICE_SOURCES = {'contactId': 'address', 'name': 'address', 'street': 'address', 'zip': 'address',
+                    'city': 'address', 'countryCode': 'address', 'currency': 'totalPrice',
+                    'totalNetAmount': 'totalPrice', 'totalGrossAmount': 'totalPrice', 'totalTaxAmount': 'totalPrice'}
+_TYPES = {t.value for t in Type}
+_PRICED_TYPES = {Type.MATERIAL.value, Type.CUSTOM.value}
+
+
+def _millis(value) -> int:
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value)
+    return round(value.timestamp() * 1000)
+
+
+def _zip(value) -> int:
+    # Like Address, zip codes that are no number become 0
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return 0
+
+
+def _offset_millis(offset: str) -> int:
+    sign = -1 if offset[0] == '-' else 1
+    return sign * (int(offset[1:3]) * 60 + int(offset[4:6])) * 60000
+
+
+def _dates_to_numpy(values: list):
+    """ Convert dates to UTC epoch milliseconds (NaT for None).
+
+    ISO strings in the fixed lexoffice format (e.g. 2021-03-22T12:36:22.000+01:00) are parsed by numpy at once,
+    only the few distinct UTC offsets are parsed in Python. Other values fall back to datetime.
+    """
+    import numpy as np
+    millis = np.full(len(values), _NAT, dtype=np.int64)
+    index, local, offsets = [], [], []
+    other_index, other_millis = [], []
+    for i, value in enumerate(values):
+        if value is None:
+            continue
+        if isinstance(value, str) and len(value) == 29 and value[23] in '+-':
+            index.append(i)
+            local.append(value[:23])
+            offsets.append(value[23:])
+        else:
+            other_index.append(i)
+            other_millis.append(_millis(value))
+    if other_index:
+        millis[other_index] = other_millis
+    if index:
+        offset_millis = {offset: _offset_millis(offset) for offset in set(offsets)}
+        parsed = np.array(local, dtype='datetime64[ms]').astype(np.int64)
+        millis[index] = parsed - np.array([offset_millis[offset] for offset in offsets], dtype=np.int64)
+    return millis.view('datetime64[ms]')
+
+
+def _value(value) -> str:
+    return value.value if value is not None else None
+
+
+def voucher_columns(vouchers: Iterable) -> dict[str, list]:
+    """ Build plain column lists from Voucher objects or voucher dicts as returned by the API.
+
+    :param vouchers: Vouchers or their JSON dicts (e.g. the 'content' of a voucherlist page)
+    :return: List of values per column of VOUCHER_SCHEMA, dates as datetime or ISO string
+    """
+    columns = {name: [] for name in VOUCHER_SCHEMA}
+    appenders = [(columns[name].append, key) for name, (_, key, _) in VOUCHER_SCHEMA.items()]
+    for voucher in vouchers:
+        if isinstance(voucher, dict):
+            for append, key in appenders:
+                append(voucher.get(key))
+        else:
+            columns['id'].append(_str_or_none(voucher.id))
+            columns['voucher_type'].append(_value(voucher.voucher_type))
+            columns['voucher_status'].append(_value(voucher.voucher_status))
+            columns['voucher_number'].append(voucher.voucher_number)
+            columns['voucher_date'].append(voucher.voucher_date)
+            columns['created_date'].append(voucher.created_date)
+            columns['updated_date'].append(voucher.updated_date)
+            columns['due_date'].append(voucher.due_date)
+            columns['contact_id'].append(_str_or_none(voucher.contact_id))
+            columns['contact_name'].append(voucher.contact_name)
+            columns['total_amount'].append(voucher.total_amount)
+            columns['open_amount'].append(voucher.open_amount)
+            columns['currency'].append(voucher.currency)
+            columns['archived'].append(voucher.archived)
+    return columns
+
+
+def invoice_columns(invoices: Iterable) -> dict[str, list]:
+    """ Build plain column lists with one row per invoice, with the address and total price flattened into it.
+
+    :param invoices: Invoices or their JSON dicts as returned by the /invoices endpoint
+    :return: List of values per column of INVOICE_SCHEMA
+    """
+    columns = {name: [] for name in INVOICE_SCHEMA}
+    for invoice in invoices:
+        if isinstance(invoice, dict):
+            sources = {'address': invoice.get('address') or {}, 'totalPrice': invoice.get('totalPrice') or {}}
+            for name, (_, key, _) in INVOICE_SCHEMA.items():
+                columns[name].append(sources.get(_INVOICE_SOURCES.get(key), invoice).get(key))
+            zips = columns['zip']
+            zips[-1] = _zip(zips[-1])
+        else:
+            address, total_price = invoice.address, invoice.total_price
+            columns['id'].append(_str_or_none(invoice.id))
+            columns['organization_id'].append(_str_or_none(invoice.organization_id))
+            columns['version'].append(invoice.version)
+            columns['language'].append(invoice.language)
+            columns['archived'].append(invoice.archived)
+            columns['voucher_status'].append(invoice.voucher_status)
+            columns['voucher_number'].append(invoice.voucher_number)
+            columns['voucher_date'].append(invoice.voucher_date)
+            columns['created_date'].append(invoice.created_date)
+            columns['updated_date'].append(invoice.updated_date)
+            columns['due_date'].append(invoice.due_date)
+            columns['contact_id'].append(_str_or_none(address.contact_id))
+            columns['name'].append(address.name)
+            columns['street'].append(address.street)
+            columns['zip'].append(address.zip)
+            columns['city'].append(address.city)
+            columns['country_code'].append(address.countryCode)
+            columns['currency'].append(total_price.currency)
+            columns['total_net_amount'].append(total_price.total_net_amount)
+            columns['total_gross_amount'].append(total_price.total_gross_amount)
+            columns['total_tax_amount'].append(total_price.total_tax_amount)
+    return columns
+
+
+def line_item_columns(invoices: Iterable) -> dict[str, list]:
+    """ Build plain column lists with one row per line item of the given invoices.
+
+    :param invoices: Invoices or their JSON dicts as returned by the /invoices endpoint
+    :return: List of values per column of LINE_ITEM_SCHEMA
+    """
+    columns = {name: [] for name in LINE_ITEM_SCHEMA}
+    for invoice in invoices:
+        if isinstance(invoice, dict):
+            invoice_id = invoice.get('id')
+            for item in invoice.get('lineItems') or []:
+                # Like LineItem, only material and custom items carry quantity and prices
+                item_type = item.get('type') if item.get('type') in _TYPES else Type.UNDEFINED.value
+                priced = item_type in _PRICED_TYPES
+                unit_price = (item.get('unitPrice') or {}) if priced else {}
+                columns['invoice_id'].append(invoice_id)
+                columns['id'].append(item.get('id'))
+                columns['type'].append(item_type)
+                columns['name'].append(item.get('name'))
+                columns['description'].append(item.get('description'))
+                columns['quantity'].append(item.get('quantity') if priced else None)
+                columns['unit_name'].append(item.get('unitName') if priced else None)
+                columns['currency'].append(unit_price.get('currency'))
+                columns['net_amount'].append(unit_price.get('netAmount'))
+                columns['gross_amount'].append(unit_price.get('grossAmount'))
+                columns['tax_rate_percentage'].append(unit_price.get('taxRatePercentage'))
+                columns['discount_percentage'].append(item.get('discountPercentage') if priced else None)
+                columns['line_item_amount'].append(item.get('lineItemAmount') if priced else None)
+        else:
+            invoice_id = _str_or_none(invoice.id)
+            for item in invoice.line_items:
+                unit_price = getattr(item, 'unit_price', None)
+                columns['invoice_id'].append(invoice_id)
+                columns['id'].append(_str_or_none(item.id))
+                columns['type'].append(_value(item.type))
+                columns['name'].append(item.name)
+                columns['description'].append(item.description)
+                columns['quantity'].append(getattr(item, 'quantity', None))
+                columns['unit_name'].append(getattr(item, 'unit_name', None))
+                columns['currency'].append(unit_price.currency if unit_price is not None else None)
+                columns['net_amount'].append(unit_price.net_amount if unit_price is not None else None)
+                columns['gross_amount'].append(unit_price.gross_amount if unit_price is not None else None)
+                columns['tax_rate_percentage'].append(unit_price.tax_rate_percentage if unit_price is not None else None)
+                columns['discount_percentage'].append(getattr(item, 'discount_percentage', None))
+                columns['line_item_amount'].append(getattr(item, 'line_item_amount', None))
+    return columns
+
+
+def _decimals(values: list) -> list:
+    return [Decimal(str(value)) if value is not None else None for value in values]
+
+
+def to_numpy(columns: dict[str, list], schema: dict, decimal: bool = False) -> dict:
+    """ Convert column lists to NumPy arrays (requires numpy).
+
+    Dates become datetime64[ms] in UTC (NaT if missing), amounts float64 (NaN if missing) or Decimal objects,
+    categories and strings object arrays.
+    """
+    import numpy as np
+    arrays = {}
+    for name, values in columns.items():
+        kind = schema[name][0]
+        if kind == _DATE:
+            arrays[name] = _dates_to_numpy(values)
+        elif kind in _SCALES and decimal:
+            arrays[name] = np.array(_decimals(values), dtype=object)
+        elif kind in (_AMOUNT, _PRICE, _NUMBER):
+            arrays[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        elif kind == _BOOL:
+            arrays[name] = np.array([bool(v) for v in values], dtype=np.bool_)
+        else:
+            arrays[name] = np.array(values, dtype=object)
+    return arrays
+
+
+def to_arrow(columns: dict[str, list], schema: dict, decimal: bool = False):
+    """ Convert column lists to a pyarrow Table (requires pyarrow and numpy).
+
+    Dates become timestamp[ms, UTC], categories dictionary-encoded strings and amounts float64 or decimal128(18, 2),
+    unit prices of line items decimal128(18, 4).
+    """
+    import pyarrow as pa
+    arrays = []
+    for name, values in columns.items():
+        kind = schema[name][0]
+        if kind == _DATE:
+            millis = _dates_to_numpy(values).view('int64')
+            arrays.append(pa.array(millis, type=pa.timestamp('ms', tz='UTC'), mask=millis == _NAT))
+        elif kind in _SCALES and decimal:
+            arrays.append(pa.array(_decimals(values), type=pa.decimal128(18, _SCALES[kind])))
+        elif kind in (_AMOUNT, _PRICE, _NUMBER):
+            arrays.append(pa.array(values, type=pa.float64()))
+        elif kind == _BOOL:
+            arrays.append(pa.array(values, type=pa.bool_()))
+        elif kind == _CATEGORY:
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=pa.string()))
+    return pa.Table.from_arrays(arrays, names=list(columns))
+
+
+def to_pandas(columns: dict[str, list], schema: dict, decimal: bool = False):
+    """ Convert column lists to a pandas DataFrame (requires pandas and numpy).
+
+    Dates become datetime64[ms, UTC], enums categoricals with all enum values as categories.
+    """
+    import pandas as pd
+    arrays = to_numpy(columns, schema, decimal)
+    data = {}
+    for name, array in arrays.items():
+        kind, _, categories = schema[name]
+        if kind == _DATE:
+            data[name] = pd.Series(array).dt.tz_localize('UTC')
+        elif kind == _CATEGORY:
+            data[name] = pd.Categorical(columns[name], categories=categories)
+        else:
+            data[name] = array
+    return pd.DataFrame(data)
+
+
+def vouchers_to_numpy(vouchers: Iterable, decimal: bool = False) -> dict:
+    return to_numpy(voucher_columns(vouchers), VOUCHER_SCHEMA, decimal)
+
+
+def vouchers_to_arrow(vouchers: Iterable, decimal: bool = False):
+    return to_arrow(voucher_columns(vouchers), VOUCHER_SCHEMA, decimal)
+
+
+def vouchers_to_pandas(vouchers: Iterable, decimal: bool = False):
+    return to_pandas(voucher_columns(vouchers), VOUCHER_SCHEMA, decimal)
+
+
+def line_items_to_numpy(invoices: Iterable, decimal: bool = False) -> dict:
+    return to_numpy(line_item_columns(invoices), LINE_ITEM_SCHEMA, decimal)
+
+
+def line_items_to_arrow(invoices: Iterable, decimal: bool = False):
+    return to_arrow(line_item_columns(invoices), LINE_ITEM_SCHEMA, decimal)
+
+
+def line_items_to_pandas(invoices: Iterable, decimal: bool = False):
+    return to_pandas(line_item_columns(invoices), LINE_ITEM_SCHEMA, decimal)
@@ -0,0 +1,173 @@
+""" Local cache of the contacts of an account, bulk loaded page by page and refreshed incrementally.
+
+Vouchers and invoices only carry the id and name of their contact. Resolving the full contacts one by one costs a
+request per contact, while the /contacts endpoint returns 250 contacts per request. The ContactCache loads all
+contacts with a few page requests and keeps them up to date afterwards: changed contacts are refetched one by one,
+e.g. on the contact events of an EventDispatcher, and contacts missing in the cache are fetched when they are
+looked up - one by one if only a few are missing, else by loading all pages again.
+"""
+import math
+import threading
+import uuid
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from .api import LexofficeClient
+from .datatypes import Contact, Voucher
+from .ratelimit import Priority
+
+PAGE_SIZE = 250
+# Missing contacts that are fetched one by one before all contacts have been loaded once
+DEFAULT_BULK_THRESHOLD = 10
+
+
+class ContactChanges:
+    """ Contacts added, changed or removed by a load or refresh of the ContactCache. """
+    added: list[uuid.UUID]
+    changed: list[uuid.UUID]
+    removed: list[uuid.UUID]
+
+    def __init__(self):
+        self.added = []
+        self.changed = []
+        self.removed = []
+
+
+class ContactCache:
+    """ Thread-safe in-memory cache of contacts by id. """
+    client: LexofficeClient
+    max_workers: int
+    bulk_threshold: int
+    priority: Priority
+    loads: int
+    fetched: int
+
+    def __init__(self, client: LexofficeClient, max_workers: int = 4, bulk_threshold: int = None,
+                 priority: Priority = Priority.NORMAL):
+        """ :param client: Client used to fetch the contacts
+        :param max_workers: Number of single contacts fetched at the same time
+        :param bulk_threshold: Number of missing contacts from which all contacts are loaded instead of fetching
+            the missing ones one by one - defaults to the number of pages of the last load
+        :param priority: Priority class of the requests
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.bulk_threshold = bulk_threshold
+        self.priority = priority
+        self.loads = 0
+        self.fetched = 0
+        self._contacts: dict[uuid.UUID, Contact] = {}
+        # Ids looked up in vain since the last load, so they are not requested again
+        self._unknown: set[uuid.UUID] = set()
+        self._pages: int = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._contacts)
+
+    def __contains__(self, contact_id: uuid.UUID) -> bool:
+        return contact_id in self._contacts
+
+    def __iter__(self) -> Iterator[Contact]:
+        return iter(list(self._contacts.values()))
+
+    def get(self, contact_id: uuid.UUID) -> Contact:
+        """ :return: The cached contact or None, without requesting it """
+        return self._contacts.get(contact_id)
+
+    def _update(self, contact: Contact, changes: ContactChanges):
+        old = self._contacts.get(contact.id)
+        if old is None:
+            changes.added.append(contact.id)
+        elif old.version != contact.version:
+            changes.changed.append(contact.id)
+        else:
+            return
+        self._contacts[contact.id] = contact
+
+    def load(self) -> ContactChanges:
+        """ Load all contacts page by page, replacing the cached ones.
+
+        Unchanged contacts (same version) keep their cached object, contacts no longer returned are removed.
+
+        :return: ContactChanges compared to the cached contacts
+        """
+        contacts = {contact.id: contact for contact in self.client.iter_contacts(PAGE_SIZE, priority=self.priority)}
+        changes = ContactChanges()
+        with self._lock:
+            changes.removed = [contact_id for contact_id in self._contacts if contact_id not in contacts]
+            for contact_id in changes.removed:
+                del self._contacts[contact_id]
+            for contact in contacts.values():
+                self._update(contact, changes)
+            self._unknown.clear()
+            self._pages = max(1, math.ceil(len(contacts) / PAGE_SIZE))
+            self.loads += 1
+        return changes
+
+    def refresh(self, contact_ids: Iterable[uuid.UUID]) -> ContactChanges:
+        """ Fetch single contacts again, e.g. after they have been changed. Contacts that do not exist anymore are
+        removed.
+
+        :return: ContactChanges compared to the cached contacts
+        """
+        contact_ids = list(dict.fromkeys(contact_ids))
+        changes = ContactChanges()
+        if not contact_ids:
+            return changes
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(contact_ids)),
+                                thread_name_prefix='lexoffice-contacts') as executor:
+            contacts = list(executor.map(lambda contact_id: self.client.get_contact(contact_id, self.priority),
+                                         contact_ids))
+        with self._lock:
+            self.fetched += len(contact_ids)
+            for contact_id, contact in zip(contact_ids, contacts):
+                if contact is not None:
+                    self._unknown.discard(contact_id)
+                    self._update(contact, changes)
+                else:
+                    self._unknown.add(contact_id)
+                    if self._contacts.pop(contact_id, None) is not None:
+                        changes.removed.append(contact_id)
+        return changes
+
+    def remove(self, contact_id: uuid.UUID) -> bool:
+        """ Drop a contact, e.g. after it has been deleted.
+
+        :return: True if the contact was cached
+        """
+        with self._lock:
+            return self._contacts.pop(contact_id, None) is not None
+
+    def resolve(self, contact_ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, Contact]:
+        """ Look up contacts, fetching the ones missing in the cache.
+
+        If at least `bulk_threshold` contacts are missing, all contacts are loaded with a few page requests
+        instead of one request per missing contact.
+
+        :return: Contact by id of all existing contacts
+        """
+        contact_ids = {contact_id for contact_id in contact_ids if contact_id is not None}
+        missing = [contact_id for contact_id in contact_ids
+                   if contact_id not in self._contacts and contact_id not in self._unknown]
+        if missing:
+            threshold = self.bulk_threshold
+            if threshold is None:
+                threshold = self._pages if self._pages is not None else DEFAULT_BULK_THRESHOLD
+            if len(missing) >= threshold:
+                self.load()
+                with self._lock:
+                    self._unknown.update(contact_id for contact_id in missing if contact_id not in self._contacts)
+            else:
+                self.refresh(missing)
+        contacts = self._contacts
+        return {contact_id: contacts[contact_id] for contact_id in contact_ids if contact_id in contacts}
+
+    def join(self, vouchers: Iterable[Voucher]) -> list[tuple[Voucher, Contact]]:
+        """ Pair vouchers with their contacts, fetching missing contacts at once.
+
+        :param vouchers: Vouchers, e.g. of iter_vouchers() or a VoucherIndex
+        :return: (voucher, contact) per voucher - the contact is None for vouchers without (existing) contact
+        """
+        vouchers = list(vouchers)
+        contacts = self.resolve(voucher.contact_id for voucher in vouchers)
+        return [(voucher, contacts.get(voucher.contact_id)) for voucher in vouchers]
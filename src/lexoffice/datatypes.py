@@ -33,7 +33,47 @@ class Type(enum.Enum):
     TEXT = "text"
     UNDEFINED = "undefined"
 
+def _str_or_none(value) -> str:
+    return str(value) if value is not None else None
+
+def _isoformat_or_none(value: datetime) -> str:
+    return value.isoformat() if value is not None else None
+
+class _Lazy:
+    """ Attribute of a lazily parsed object, which is converted from the raw dict on first access and then memoized.
+
+    Assigning the attribute (as the eager constructors do) stores the value directly.
+    """
+
+    def __init__(self, key: str, convert, optional: bool = False):
+        """ :param key: Key of the value in the raw dict
+        :param convert: Function converting the raw value
+        :param optional: If True, a missing value is converted to None
+        """
+        self.key = key
+        self.convert = convert
+        self.optional = optional
+
+    def __set_name__(self, owner, name):
+        self.attribute = f'_{name}'
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        try:
+            return getattr(obj, self.attribute)
+        except AttributeError:
+            value = obj._raw.get(self.key)
+            if value is not None or not self.optional:
+                value = self.convert(value)
+            setattr(obj, self.attribute, value)
+            return value
+
+    def __set__(self, obj, value):
+        setattr(obj, self.attribute, value)
+
 class Address:
+    __slots__ = ('contact_id', 'name', 'supplement', 'street', 'city', 'zip', 'countryCode')
     contact_id: uuid.uuid4
     name: str
     supplement: str
@@ -58,7 +98,19 @@ class Address:
             pass
         self.countryCode = address.get('countryCode')
 
+    def to_dict(self) -> dict:
+        return {
+            'contactId': _str_or_none(self.contact_id),
+            'name': self.name,
+            'supplement': self.supplement,
+            'street': self.street,
+            'city': self.city,
+            'zip': self.zip,
+            'countryCode': self.countryCode
+        }
+
 class UnitPrice:
+    __slots__ = ('currency', 'net_amount', 'gross_amount', 'tax_rate_percentage')
     currency: str
     net_amount: float
     gross_amount: float
@@ -70,7 +122,17 @@ class UnitPrice:
         self.gross_amount = unit_price.get('grossAmount')
         self.tax_rate_percentage = unit_price.get('taxRatePercentage')
 
+    def to_dict(self) -> dict:
+        return {
+            'currency': self.currency,
+            'netAmount': self.net_amount,
+            'grossAmount': self.gross_amount,
+            'taxRatePercentage': self.tax_rate_percentage
+        }
+
 class TotalPrice:
+    __slots__ = ('currency', 'total_net_amount', 'total_gross_amount', 'total_tax_amount',
+                 'total_discount_absolute', 'total_discount_percentage')
     currency: str
     total_net_amount: float
     total_gross_amount: float
@@ -86,7 +148,19 @@ class TotalPrice:
         self.total_discount_absolute = total_price.get('totalDiscountAbsolute')
         self.total_discount_percentage = total_price.get('totalDiscountPercentage')
 
+    def to_dict(self) -> dict:
+        return {
+            'currency': self.currency,
+            'totalNetAmount': self.total_net_amount,
+            'totalGrossAmount': self.total_gross_amount,
+            'totalTaxAmount': self.total_tax_amount,
+            'totalDiscountAbsolute': self.total_discount_absolute,
+            'totalDiscountPercentage': self.total_discount_percentage
+        }
+
 class LineItem:
+    __slots__ = ('id', 'type', 'name', 'description', 'quantity', 'unit_name', 'unit_price', 'discount_percentage',
+                 'line_item_amount')
     id: uuid.uuid4
     type: Type
     name: str
@@ -115,24 +189,44 @@ class LineItem:
             self.discount_percentage = line_item.get('discountPercentage')
             self.line_item_amount = line_item.get('lineItemAmount')
 
+    def to_dict(self) -> dict:
+        line_item = {
+            'id': _str_or_none(self.id),
+            'type': self.type.value,
+            'name': self.name,
+            'description': self.description
+        }
+        if self.type == Type.MATERIAL or self.type == Type.CUSTOM:
+            line_item['quantity'] = self.quantity
+            line_item['unitName'] = self.unit_name
+            line_item['unitPrice'] = self.unit_price.to_dict()
+            line_item['discountPercentage'] = self.discount_percentage
+            line_item['lineItemAmount'] = self.line_item_amount
+        return line_item
+
 
 class Invoice:
+    __slots__ = ('id', 'organization_id', 'version', 'language', 'archived', 'voucher_status', 'voucher_number', '_raw',
+                 '_created_date', '_updated_date', '_voucher_date', '_due_date', '_address', '_line_items', '_total_price')
     id: uuid.uuid4
     organization_id: uuid.uuid4
-    created_date: datetime
-    updated_date: datetime
+    created_date: datetime = _Lazy('createdDate', datetime.fromisoformat)
+    updated_date: datetime = _Lazy('updatedDate', datetime.fromisoformat)
     version: int
     language: str
     archived: bool
     voucher_status: VoucherStatus
     voucher_number: str
-    voucher_date: datetime
-    due_date: datetime = None
-    address: Address
-    line_items: list[LineItem]
-    total_price: TotalPrice
+    voucher_date: datetime = _Lazy('voucherDate', datetime.fromisoformat)
+    due_date: datetime = _Lazy('dueDate', datetime.fromisoformat, optional=True)
+    address: Address = _Lazy('address', Address)
+    line_items: list[LineItem] = _Lazy('lineItems', lambda items: [LineItem(item) for item in items])
+    total_price: TotalPrice = _Lazy('totalPrice', TotalPrice)
 
-    def __init__(self, invoice: dict):
+    def __init__(self, invoice: dict, lazy: bool = False):
+        """ :param invoice: Invoice as returned by the API
+        :param lazy: If True, dates and sub-objects are only parsed when they are accessed for the first time
+        """
         try:
             self.id = uuid.UUID(invoice.get('id'))
         except TypeError:
@@ -141,13 +235,17 @@ class Invoice:
             self.organization_id = uuid.UUID(invoice.get('organizationId'))
         except TypeError:
             self.organization_id = None
-        self.created_date = datetime.fromisoformat(invoice.get('createdDate'))
-        self.updated_date = datetime.fromisoformat(invoice.get('updatedDate'))
         self.version = invoice.get('version')
         self.language = invoice.get('language')
         self.archived = invoice.get('archived')
         self.voucher_status = invoice.get('voucherStatus')
         self.voucher_number = invoice.get('voucherNumber')
+        if lazy:
+            self._raw = invoice
+            return
+        self.created_date = datetime.fromisoformat(invoice.get('createdDate'))
+        self.updated_date = datetime.fromisoformat(invoice.get('updatedDate'))
+        self.due_date = None
         if 'dueDate' in invoice and invoice.get('dueDate') is not None:
             self.due_date = datetime.fromisoformat(invoice.get('dueDate'))
         self.voucher_date = datetime.fromisoformat(invoice.get('voucherDate'))
@@ -157,7 +255,40 @@ class Invoice:
             self.line_items.append(LineItem(item))
         self.total_price = TotalPrice(invoice.get('totalPrice'))
 
+    def to_dict(self) -> dict:
+        return {
+            'id': _str_or_none(self.id),
+            'organizationId': _str_or_none(self.organization_id),
+            'createdDate': self.created_date.isoformat(),
+            'updatedDate': self.updated_date.isoformat(),
+            'version': self.version,
+            'language': self.language,
+            'archived': self.archived,
+            'voucherStatus': self.voucher_status,
+            'voucherNumber': self.voucher_number,
+            'voucherDate': self.voucher_date.isoformat(),
+            'dueDate': _isoformat_or_none(self.due_date),
+            'address': self.address.to_dict(),
+            'lineItems': [item.to_dict() for item in self.line_items],
+            'totalPrice': self.total_price.to_dict()
+        }
+
+    def is_older_than(self, version: int = None, updated_date: datetime = None) -> bool:
+        """ Check if this invoice is outdated compared to a known version or update date.
+
+        :param version: Known version of the invoice (optional)
+        :param updated_date: Known update date of the invoice (optional)
+        :return: True if this invoice has a lower version or an earlier update date
+        """
+        if version is not None and self.version is not None and self.version < version:
+            return True
+        if updated_date is not None and self.updated_date < updated_date:
+            return True
+        return False
+
 class Voucher:
+    __slots__ = ('id', 'voucher_type', 'voucher_status', 'voucher_number', 'voucher_date', 'created_date', 'updated_date',
+                 'due_date', 'contact_id', 'contact_name', 'total_amount', 'open_amount', 'currency', 'archived')
     id: uuid.uuid4
     voucher_type: VoucherType
     voucher_status: VoucherStatus
@@ -165,7 +296,7 @@ class Voucher:
     voucher_date: datetime
     created_date: datetime
     updated_date: datetime
-    due_date: datetime = None
+    due_date: datetime
     contact_id: uuid.uuid4
     contact_name: str
     total_amount: float
@@ -184,15 +315,37 @@ class Voucher:
         self.voucher_date = datetime.fromisoformat(voucher.get('voucherDate'))
         self.created_date = datetime.fromisoformat(voucher.get('createdDate'))
         self.updated_date = datetime.fromisoformat(voucher.get('updatedDate'))
+        self.due_date = None
         if 'dueDate' in voucher and voucher.get('dueDate') is not None:
             self.due_date = datetime.fromisoformat(voucher.get('dueDate'))
-        self.contact_id = voucher.get('contactId')
+        try:
+            self.contact_id = uuid.UUID(voucher.get('contactId'))
+        except TypeError:
+            self.contact_id = None
         self.contact_name = voucher.get('contactName')
         self.total_amount = voucher.get('totalAmount')
         self.open_amount = voucher.get('openAmount')
         self.currency = voucher.get('currency')
         self.archived = voucher.get('archived')
 
+    def to_dict(self) -> dict:
+        return {
+            'id': _str_or_none(self.id),
+            'voucherType': self.voucher_type.value,
+            'voucherStatus': self.voucher_status.value,
+            'voucherNumber': self.voucher_number,
+            'voucherDate': self.voucher_date.isoformat(),
+            'createdDate': self.created_date.isoformat(),
+            'updatedDate': self.updated_date.isoformat(),
+            'dueDate': _isoformat_or_none(self.due_date),
+            'contactId': _str_or_none(self.contact_id),
+            'contactName': self.contact_name,
+            'totalAmount': self.total_amount,
+            'openAmount': self.open_amount,
+            'currency': self.currency,
+            'archived': self.archived
+        }
+
 class VoucherList:
     content: list[Voucher]
     first: bool
@@ -216,3 +369,289 @@ class VoucherList:
         self.size = voucher_list.get('size')
         self.number = voucher_list.get('number')
         self.sort = voucher_list.get('sort')
+
+    def to_dict(self) -> dict:
+        return {
+            'content': [voucher.to_dict() for voucher in self.content],
+            'first': self.first,
+            'last': self.last,
+            'totalPages': self.total_pages,
+            'totalElements': self.total_elements,
+            'numberOfElements': self.number_of_elements,
+            'size': self.size,
+            'number': self.number,
+            'sort': self.sort
+        }
+
+    def to_numpy(self, decimal: bool = False) -> dict:
+        """ Convert the vouchers to a dict of NumPy arrays, one per attribute (requires numpy).
+
+        :param decimal: If True, amounts are Decimal objects instead of float64
+        """
+        from .columnar import vouchers_to_numpy
+        return vouchers_to_numpy(self.content, decimal)
+
+    def to_arrow(self, decimal: bool = False):
+        """ Convert the vouchers to a pyarrow Table (requires pyarrow).
+
+        :param decimal: If True, amounts are decimal128(18, 2) instead of float64
+        """
+        from .columnar import vouchers_to_arrow
+        return vouchers_to_arrow(self.content, decimal)
+
+    def to_pandas(self, decimal: bool = False):
+        """ Convert the vouchers to a pandas DataFrame with one row per voucher (requires pandas).
+
+        :param decimal: If True, amounts are Decimal objects instead of float64
+        """
+        from .columnar import vouchers_to_pandas
+        return vouchers_to_pandas(self.content, decimal)
+
+class EventSubscription:
+    """ Subscription of a callback URL to one event type, as returned by the /event-subscriptions endpoint. """
+    __slots__ = ('subscription_id', 'organization_id', 'created_date', 'event_type', 'callback_url')
+    subscription_id: uuid.uuid4
+    organization_id: uuid.uuid4
+    created_date: datetime
+    event_type: str
+    callback_url: str
+
+    def __init__(self, subscription: dict):
+        self.subscription_id = uuid.UUID(subscription.get('subscriptionId'))
+        try:
+            self.organization_id = uuid.UUID(subscription.get('organizationId'))
+        except TypeError:
+            self.organization_id = None
+        self.created_date = None
+        if subscription.get('createdDate') is not None:
+            self.created_date = datetime.fromisoformat(subscription.get('createdDate'))
+        self.event_type = subscription.get('eventType')
+        self.callback_url = subscription.get('callbackUrl')
+
+    def to_dict(self) -> dict:
+        return {
+            'subscriptionId': str(self.subscription_id),
+            'organizationId': _str_or_none(self.organization_id),
+            'createdDate': _isoformat_or_none(self.created_date),
+            'eventType': self.event_type,
+            'callbackUrl': self.callback_url
+        }
+
+class Event:
+    """ Event posted to the callback URL of an event subscription, e.g. type 'invoice.changed'. """
+    __slots__ = ('organization_id', 'event_type', 'resource_id', 'event_date')
+    organization_id: uuid.uuid4
+    event_type: str
+    resource_id: uuid.uuid4
+    event_date: datetime
+
+    def __init__(self, event: dict):
+        try:
+            self.organization_id = uuid.UUID(event.get('organizationId'))
+        except TypeError:
+            self.organization_id = None
+        self.event_type = event.get('eventType')
+        try:
+            self.resource_id = uuid.UUID(event.get('resourceId'))
+        except TypeError:
+            self.resource_id = None
+        self.event_date = None
+        if event.get('eventDate') is not None:
+            self.event_date = datetime.fromisoformat(event.get('eventDate'))
+
+    @property
+    def resource_type(self) -> str:
+        """ Type of the changed resource, e.g. 'invoice' for 'invoice.status.changed' """
+        return self.event_type.split('.', 1)[0] if self.event_type else None
+
+    def to_dict(self) -> dict:
+        return {
+            'organizationId': _str_or_none(self.organization_id),
+            'eventType': self.event_type,
+            'resourceId': _str_or_none(self.resource_id),
+            'eventDate': _isoformat_or_none(self.event_date)
+        }
+
+class ContactPerson:
+    __slots__ = ('salutation', 'first_name', 'last_name', 'primary', 'email_address', 'phone_number')
+    salutation: str
+    first_name: str
+    last_name: str
+    primary: bool
+    email_address: str
+    phone_number: str
+
+    def __init__(self, person: dict):
+        self.salutation = person.get('salutation')
+        self.first_name = person.get('firstName')
+        self.last_name = person.get('lastName')
+        self.primary = person.get('primary')
+        self.email_address = person.get('emailAddress')
+        self.phone_number = person.get('phoneNumber')
+
+    def to_dict(self) -> dict:
+        return {
+            'salutation': self.salutation,
+            'firstName': self.first_name,
+            'lastName': self.last_name,
+            'primary': self.primary,
+            'emailAddress': self.email_address,
+            'phoneNumber': self.phone_number
+        }
+
+class Company:
+    __slots__ = ('name', 'tax_number', 'vat_registration_id', 'allow_tax_free_invoices', 'contact_persons')
+    name: str
+    tax_number: str
+    vat_registration_id: str
+    allow_tax_free_invoices: bool
+    contact_persons: list[ContactPerson]
+
+    def __init__(self, company: dict):
+        self.name = company.get('name')
+        self.tax_number = company.get('taxNumber')
+        self.vat_registration_id = company.get('vatRegistrationId')
+        self.allow_tax_free_invoices = company.get('allowTaxFreeInvoices')
+        self.contact_persons = [ContactPerson(person) for person in company.get('contactPersons') or []]
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'taxNumber': self.tax_number,
+            'vatRegistrationId': self.vat_registration_id,
+            'allowTaxFreeInvoices': self.allow_tax_free_invoices,
+            'contactPersons': [person.to_dict() for person in self.contact_persons]
+        }
+
+class ContactAddress:
+    """ Billing or shipping address of a contact. The zip code is kept as string, it may have leading zeros. """
+    __slots__ = ('supplement', 'street', 'zip', 'city', 'country_code')
+    supplement: str
+    street: str
+    zip: str
+    city: str
+    country_code: str
+
+    def __init__(self, address: dict):
+        self.supplement = address.get('supplement')
+        self.street = address.get('street')
+        self.zip = address.get('zip')
+        self.city = address.get('city')
+        self.country_code = address.get('countryCode')
+
+    def to_dict(self) -> dict:
+        return {
+            'supplement': self.supplement,
+            'street': self.street,
+            'zip': self.zip,
+            'city': self.city,
+            'countryCode': self.country_code
+        }
+
+class Contact:
+    """ Customer and/or vendor as returned by the /contacts endpoint, either a company or a person. """
+    __slots__ = ('id', 'organization_id', 'version', 'customer_number', 'vendor_number', 'company', 'person',
+                 'billing_addresses', 'shipping_addresses', 'email_addresses', 'phone_numbers', 'note', 'archived')
+    id: uuid.uuid4
+    organization_id: uuid.uuid4
+    version: int
+    customer_number: int
+    vendor_number: int
+    company: Company
+    person: ContactPerson
+    billing_addresses: list[ContactAddress]
+    shipping_addresses: list[ContactAddress]
+    email_addresses: dict[str, list[str]]
+    phone_numbers: dict[str, list[str]]
+    note: str
+    archived: bool
+
+    def __init__(self, contact: dict):
+        self.id = uuid.UUID(contact.get('id'))
+        try:
+            self.organization_id = uuid.UUID(contact.get('organizationId'))
+        except TypeError:
+            self.organization_id = None
+        self.version = contact.get('version')
+        roles = contact.get('roles') or {}
+        # A role without number ({}) still makes the contact a customer or vendor
+        self.customer_number = (roles['customer'] or {}).get('number', 0) if 'customer' in roles else None
+        self.vendor_number = (roles['vendor'] or {}).get('number', 0) if 'vendor' in roles else None
+        self.company = Company(contact['company']) if contact.get('company') is not None else None
+        self.person = ContactPerson(contact['person']) if contact.get('person') is not None else None
+        addresses = contact.get('addresses') or {}
+        self.billing_addresses = [ContactAddress(address) for address in addresses.get('billing') or []]
+        self.shipping_addresses = [ContactAddress(address) for address in addresses.get('shipping') or []]
+        self.email_addresses = contact.get('emailAddresses') or {}
+        self.phone_numbers = contact.get('phoneNumbers') or {}
+        self.note = contact.get('note')
+        self.archived = contact.get('archived')
+
+    @property
+    def name(self) -> str:
+        """ Name of the company or 'last name, first name' of the person, like the contactName of vouchers """
+        if self.company is not None:
+            return self.company.name
+        if self.person is not None:
+            return ', '.join(part for part in (self.person.last_name, self.person.first_name) if part)
+        return None
+
+    def to_dict(self) -> dict:
+        contact = {
+            'id': str(self.id),
+            'organizationId': _str_or_none(self.organization_id),
+            'version': self.version,
+            'roles': {},
+            'addresses': {},
+            'emailAddresses': self.email_addresses,
+            'phoneNumbers': self.phone_numbers,
+            'note': self.note,
+            'archived': self.archived
+        }
+        if self.customer_number is not None:
+            contact['roles']['customer'] = {'number': self.customer_number} if self.customer_number else {}
+        if self.vendor_number is not None:
+            contact['roles']['vendor'] = {'number': self.vendor_number} if self.vendor_number else {}
+        if self.company is not None:
+            contact['company'] = self.company.to_dict()
+        if self.person is not None:
+            contact['person'] = {'salutation': self.person.salutation, 'firstName': self.person.first_name,
+                                 'lastName': self.person.last_name}
+        if self.billing_addresses:
+            contact['addresses']['billing'] = [address.to_dict() for address in self.billing_addresses]
+        if self.shipping_addresses:
+            contact['addresses']['shipping'] = [address.to_dict() for address in self.shipping_addresses]
+        return contact
+
+class ContactList:
+    """ One page of the /contacts endpoint. """
+    content: list[Contact]
+    first: bool
+    last: bool
+    total_pages: int
+    total_elements: int
+    number_of_elements: int
+    size: int
+    number: int
+
+    def __init__(self, contact_list: dict):
+        self.content = [Contact(contact) for contact in contact_list.get('content') or []]
+        self.first = contact_list.get('first')
+        self.last = contact_list.get('last')
+        self.total_pages = contact_list.get('totalPages')
+        self.total_elements = contact_list.get('totalElements')
+        self.number_of_elements = contact_list.get('numberOfElements')
+        self.size = contact_list.get('size')
+        self.number = contact_list.get('number')
+
+    def to_dict(self) -> dict:
+        return {
+            'content': [contact.to_dict() for contact in self.content],
+            'first': self.first,
+            'last': self.last,
+            'totalPages': self.total_pages,
+            'totalElements': self.total_elements,
+            'numberOfElements': self.number_of_elements,
+            'size': self.size,
+            'number': self.number
+        }
@@ -0,0 +1,280 @@
+""" Pluggable decoders turning the raw bytes of API responses into VoucherList and Invoice objects.
+
+JsonDecoder uses the json module of the standard library, OrjsonDecoder only swaps in orjson for parsing.
+MsgspecDecoder decodes the bytes against a schema of the API objects, so UUIDs, dates and enums are converted
+while parsing and the models are filled without an intermediate dict. Payloads that do not match the schema
+are decoded again with the tolerant dict path, so the result is the same as with the standard library.
+"""
+import functools
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Optional, Union
+from .datatypes import VoucherList, Voucher, Invoice, Address, LineItem, UnitPrice, TotalPrice, Type, \
+    VoucherType, VoucherStatus
+
+_Number = Union[int, float, None]
+_TYPES = {t.value: t for t in Type}
+
+
+class JsonDecoder:
+    """ Decodes responses with the json module of the standard library. """
+    name = 'json'
+
+    def loads(self, data: bytes):
+        return json.loads(data)
+
+    def voucherlist(self, data: bytes) -> VoucherList:
+        """ :param data: Body of a /voucherlist response """
+        return VoucherList(self.loads(data))
+
+    def invoice(self, data: bytes, lazy: bool = False) -> Invoice:
+        """ :param data: Body of an /invoices response
+        :param lazy: If True, dates and sub-objects are only parsed when they are accessed for the first time
+        """
+        return Invoice(self.loads(data), lazy=lazy)
+
+
+class OrjsonDecoder(JsonDecoder):
+    """ Decodes responses with orjson (requires orjson). """
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._loads = orjson.loads
+
+    def loads(self, data: bytes):
+        return self._loads(data)
+
+
+@functools.cache
+def _msgspec_decoders() -> tuple:
+    import msgspec
+
+    class AddressSchema(msgspec.Struct, rename='camel', kw_only=True):
+        contact_id: Optional[uuid.UUID] = None
+        name: Optional[str] = None
+        supplement: Optional[str] = None
+        street: Optional[str] = None
+        city: Optional[str] = None
+        zip: Any = None
+        country_code: Optional[str] = None
+
+    class UnitPriceSchema(msgspec.Struct, rename='camel', kw_only=True):
+        currency: Optional[str] = None
+        net_amount: _Number = None
+        gross_amount: _Number = None
+        tax_rate_percentage: _Number = None
+
+    class TotalPriceSchema(msgspec.Struct, rename='camel', kw_only=True):
+        currency: Optional[str] = None
+        total_net_amount: _Number = None
+        total_gross_amount: _Number = None
+        total_tax_amount: _Number = None
+        total_discount_absolute: _Number = None
+        total_discount_percentage: _Number = None
+
+    class LineItemSchema(msgspec.Struct, rename='camel', kw_only=True):
+        id: Optional[uuid.UUID] = None
+        type: Optional[str] = None
+        name: Optional[str] = None
+        description: Optional[str] = None
+        quantity: _Number = None
+        unit_name: Optional[str] = None
+        unit_price: Optional[UnitPriceSchema] = None
+        discount_percentage: _Number = None
+        line_item_amount: _Number = None
+
+    class InvoiceSchema(msgspec.Struct, rename='camel', kw_only=True):
+        id: Optional[uuid.UUID] = None
+        organization_id: Optional[uuid.UUID] = None
+        created_date: datetime
+        updated_date: datetime
+        version: Optional[int] = None
+        language: Optional[str] = None
+        archived: Optional[bool] = None
+        voucher_status: Optional[str] = None
+        voucher_number: Optional[str] = None
+        voucher_date: datetime
+        due_date: Optional[datetime] = None
+        address: AddressSchema
+        line_items: list[LineItemSchema]
+        total_price: TotalPriceSchema
+
+    class VoucherSchema(msgspec.Struct, rename='camel', kw_only=True):
+        id: Optional[uuid.UUID] = None
+        voucher_type: VoucherType
+        voucher_status: VoucherStatus
+        voucher_number: Optional[str] = None
+        voucher_date: datetime
+        created_date: datetime
+        updated_date: datetime
+        due_date: Optional[datetime] = None
+        contact_id: Optional[uuid.UUID] = None
+        contact_name: Optional[str] = None
+        total_amount: _Number = None
+        open_amount: _Number = None
+        currency: Optional[str] = None
+        archived: Optional[bool] = None
+
+    class VoucherListSchema(msgspec.Struct, rename='camel', kw_only=True):
+        content: list[VoucherSchema]
+        first: Optional[bool] = None
+        last: Optional[bool] = None
+        total_pages: Optional[int] = None
+        total_elements: Optional[int] = None
+        number_of_elements: Optional[int] = None
+        size: Optional[int] = None
+        number: Optional[int] = None
+        sort: Any = None
+
+    return (msgspec.json.Decoder(VoucherListSchema), msgspec.json.Decoder(InvoiceSchema),
+            msgspec.json.Decoder(), msgspec.ValidationError)
+
+
+def _voucher(s) -> Voucher:
+    voucher = Voucher.__new__(Voucher)
+    voucher.id = s.id
+    voucher.voucher_type = s.voucher_type
+    voucher.voucher_status = s.voucher_status
+    voucher.voucher_number = s.voucher_number
+    voucher.voucher_date = s.voucher_date
+    voucher.created_date = s.created_date
+    voucher.updated_date = s.updated_date
+    voucher.due_date = s.due_date
+    voucher.contact_id = s.contact_id
+    voucher.contact_name = s.contact_name
+    voucher.total_amount = s.total_amount
+    voucher.open_amount = s.open_amount
+    voucher.currency = s.currency
+    voucher.archived = s.archived
+    return voucher
+
+
+def _address(s) -> Address:
+    address = Address.__new__(Address)
+    address.contact_id = s.contact_id
+    address.name = s.name
+    address.supplement = s.supplement
+    address.street = s.street
+    address.city = s.city
+    try:
+        address.zip = int(s.zip)
+    except (ValueError, TypeError):
+        address.zip = 0
+    address.countryCode = s.country_code
+    return address
+
+
+def _unit_price(s) -> UnitPrice:
+    unit_price = UnitPrice.__new__(UnitPrice)
+    unit_price.currency = s.currency
+    unit_price.net_amount = s.net_amount
+    unit_price.gross_amount = s.gross_amount
+    unit_price.tax_rate_percentage = s.tax_rate_percentage
+    return unit_price
+
+
+def _line_item(s) -> LineItem:
+    line_item = LineItem.__new__(LineItem)
+    line_item.id = s.id
+    line_item.type = _TYPES.get(s.type, Type.UNDEFINED)
+    line_item.name = s.name
+    line_item.description = s.description
+    if line_item.type == Type.MATERIAL or line_item.type == Type.CUSTOM:
+        line_item.quantity = s.quantity
+        line_item.unit_name = s.unit_name
+        line_item.unit_price = _unit_price(s.unit_price)
+        line_item.discount_percentage = s.discount_percentage
+        line_item.line_item_amount = s.line_item_amount
+    return line_item
+
+
+def _total_price(s) -> TotalPrice:
+    total_price = TotalPrice.__new__(TotalPrice)
+    total_price.currency = s.currency
+    total_price.total_net_amount = s.total_net_amount
+    total_price.total_gross_amount = s.total_gross_amount
+    total_price.total_tax_amount = s.total_tax_amount
+    total_price.total_discount_absolute = s.total_discount_absolute
+    total_price.total_discount_percentage = s.total_discount_percentage
+    return total_price
+
+
+def _invoice(s) -> Invoice:
+    invoice = Invoice.__new__(Invoice)
+    invoice.id = s.id
+    invoice.organization_id = s.organization_id
+    invoice.version = s.version
+    invoice.language = s.language
+    invoice.archived = s.archived
+    invoice.voucher_status = s.voucher_status
+    invoice.voucher_number = s.voucher_number
+    invoice.created_date = s.created_date
+    invoice.updated_date = s.updated_date
+    invoice.due_date = s.due_date
+    invoice.voucher_date = s.voucher_date
+    invoice.address = _address(s.address)
+    invoice.line_items = [_line_item(item) for item in s.line_items]
+    invoice.total_price = _total_price(s.total_price)
+    return invoice
+
+
+class MsgspecDecoder(JsonDecoder):
+    """ Decodes responses against a schema of the API objects (requires msgspec). """
+    name = 'msgspec'
+
+    def __init__(self):
+        self._voucherlist, self._invoice, self._any, self._error = _msgspec_decoders()
+
+    def loads(self, data: bytes):
+        return self._any.decode(data)
+
+    def voucherlist(self, data: bytes) -> VoucherList:
+        try:
+            s = self._voucherlist.decode(data)
+        except self._error:
+            return super().voucherlist(data)
+        voucher_list = VoucherList.__new__(VoucherList)
+        voucher_list.content = [_voucher(voucher) for voucher in s.content]
+        voucher_list.first = s.first
+        voucher_list.last = s.last
+        voucher_list.total_pages = s.total_pages
+        voucher_list.total_elements = s.total_elements
+        voucher_list.number_of_elements = s.number_of_elements
+        voucher_list.size = s.size
+        voucher_list.number = s.number
+        voucher_list.sort = s.sort
+        return voucher_list
+
+    def invoice(self, data: bytes, lazy: bool = False) -> Invoice:
+        if lazy:
+            return super().invoice(data, lazy=True)
+        try:
+            s = self._invoice.decode(data)
+        except self._error:
+            return super().invoice(data)
+        return _invoice(s)
+
+
+DECODERS = {
+    'msgspec': MsgspecDecoder,
+    'orjson': OrjsonDecoder,
+    'json': JsonDecoder,
+}
+
+
+def get_decoder(name: str = None) -> JsonDecoder:
+    """ Create a decoder.
+
+    :param name: 'json', 'orjson' or 'msgspec' - if None, the fastest installed one is used
+    :return: The decoder
+    :raise ImportError if the requested decoder's library is not installed
+    """
+    if name is not None:
+        return DECODERS[name]()
+    for decoder in DECODERS.values():
+        try:
+            return decoder()
+        except ImportError:
+            pass
@@ -4,11 +4,16 @@ from requests import Response
 class LexofficeException(Exception):
     msg: str
 
-    def __init__(self, response: Response, message: str):
+    def __init__(self, response: Response, message: str, status_code: int = None, body: dict = None):
         super().__init__(message)
-        status_code = response.status_code
-        body = response.json()
-        self.msg = f"status={status_code}, msg={body['message']}"
+        if response is not None:
+            status_code = response.status_code
+            try:
+                body = response.json()
+            except ValueError:
+                # Error responses of proxies may be empty or no JSON
+                body = None
+        self.msg = f"status={status_code}, msg={body.get('message') if isinstance(body, dict) else None}"
         print(self.msg)
 
     def msg(self):
@@ -0,0 +1,263 @@
+""" Export of vouchers, invoices and their line items to CSV, JSON Lines and Parquet files in constant memory.
+
+The writers take batches of columns as built by the columnar module and write them out at once, Parquet files
+get a row group whenever the buffer of the writer is full. export_invoices() pipes the voucherlist into
+get_invoices() and the fetched invoices batch by batch into the writers, so the next pages and invoices are
+fetched while a batch is written and only a few batches are held in memory, independent of the account size.
+"""
+import abc
+import csv
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import TextIO, Union
+from .api import LexofficeClient
+from .columnar import VOUCHER_SCHEMA, INVOICE_SCHEMA, LINE_ITEM_SCHEMA, voucher_columns, invoice_columns, \
+    line_item_columns, to_arrow
+from .datatypes import VoucherType, VoucherStatus
+from .ratelimit import Priority
+
+_Target = Union[str, os.PathLike, TextIO]
+
+
+def _text(value):
+    if isinstance(value, datetime):
+        # Same format as the dates of the API
+        return value.isoformat(timespec='milliseconds')
+    return value
+
+
+class ExportWriter(abc.ABC):
+    """ Writes the rows of one table, e.g. the invoices or their line items. """
+    schema: dict
+    rows: int
+
+    def __init__(self, schema: dict):
+        """ :param schema: Columns of the table, e.g. columnar.INVOICE_SCHEMA """
+        self.schema = schema
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, columns: dict[str, list]):
+        """ Write a batch of rows.
+
+        :param columns: List of values per column of the schema, as built by the columnar module
+        """
+        count = len(columns[next(iter(self.schema))])
+        if count:
+            self._write(columns)
+            self.rows += count
+
+    @abc.abstractmethod
+    def _write(self, columns: dict[str, list]):
+        """ Write a non-empty batch of rows. """
+
+    def close(self):
+        """ Write buffered rows and close the file. """
+
+
+class _TextWriter(ExportWriter):
+
+    def __init__(self, target: _Target, schema: dict):
+        super().__init__(schema)
+        if isinstance(target, (str, os.PathLike)):
+            self._file = open(target, 'w', newline='', encoding='utf-8')
+            self._owns_file = True
+        else:
+            self._file = target
+            self._owns_file = False
+
+    def _rows(self, columns: dict[str, list]):
+        return zip(*[[_text(value) for value in columns[name]] for name in self.schema])
+
+    def close(self):
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+class CsvWriter(_TextWriter):
+    """ Writes a CSV file with a header row. Missing values are empty, dates ISO strings. """
+
+    def __init__(self, target: _Target, schema: dict, **fmtparams):
+        """ :param target: Path of the file or open text file
+        :param schema: Columns of the table
+        :param fmtparams: Formatting parameters of csv.writer, e.g. delimiter=';'
+        """
+        super().__init__(target, schema)
+        self._writer = csv.writer(self._file, **fmtparams)
+        self._writer.writerow(list(schema))
+
+    def _write(self, columns: dict[str, list]):
+        self._writer.writerows(self._rows(columns))
+
+
+class JsonlWriter(_TextWriter):
+    """ Writes a JSON Lines file with one object per row. """
+
+    def _write(self, columns: dict[str, list]):
+        names = list(self.schema)
+        self._file.writelines(json.dumps(dict(zip(names, row)), ensure_ascii=False) + '\n'
+                              for row in self._rows(columns))
+
+
+class ParquetWriter(ExportWriter):
+    """ Writes a Parquet file row group by row group (requires pyarrow and numpy).
+
+    Rows are buffered until a row group is full, so at most row_group_size rows are held by the writer.
+    """
+    row_group_size: int
+    row_groups: int
+
+    def __init__(self, path: Union[str, os.PathLike], schema: dict, row_group_size: int = 50000,
+                 decimal: bool = False, compression: str = 'snappy'):
+        """ :param path: Path of the file
+        :param schema: Columns of the table
+        :param row_group_size: Number of rows per row group
+        :param decimal: If True, amounts are written as decimal128(18, 2) instead of float64, unit prices of line
+            items as decimal128(18, 4)
+        :param compression: Compression codec of pyarrow, e.g. 'snappy', 'zstd' or None
+        """
+        import pyarrow.parquet
+        super().__init__(schema)
+        self._parquet = pyarrow.parquet
+        self.path = path
+        self.row_group_size = row_group_size
+        self.decimal = decimal
+        self.compression = compression
+        self.row_groups = 0
+        self._buffer = {name: [] for name in schema}
+        self._writer = None
+
+    def _write(self, columns: dict[str, list]):
+        for name, values in self._buffer.items():
+            values.extend(columns[name])
+        while len(self._buffer[next(iter(self.schema))]) >= self.row_group_size:
+            self._flush(self.row_group_size)
+
+    def _flush(self, count: int):
+        table = to_arrow({name: values[:count] for name, values in self._buffer.items()}, self.schema, self.decimal)
+        for values in self._buffer.values():
+            del values[:count]
+        if self._writer is None:
+            self._writer = self._parquet.ParquetWriter(self.path, table.schema, compression=self.compression)
+        if count:
+            self._writer.write_table(table)
+            self.row_groups += 1
+
+    def close(self):
+        buffered = len(self._buffer[next(iter(self.schema))])
+        if buffered or self._writer is None:
+            self._flush(buffered)
+        self._writer.close()
+
+
+WRITERS = {
+    'csv': CsvWriter,
+    'jsonl': JsonlWriter,
+    'parquet': ParquetWriter,
+}
+
+
+def open_writer(path: Union[str, os.PathLike], schema: dict, **kwargs) -> ExportWriter:
+    """ Create the writer matching the extension of the path (.csv, .jsonl or .parquet).
+
+    :param kwargs: Further arguments of the writer
+    """
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    if extension not in WRITERS:
+        raise ValueError(f'Unknown export format: {extension}')
+    return WRITERS[extension](path, schema, **kwargs)
+
+
+class ExportResult:
+    """ Number of exported rows per table and the invoices that could not be fetched. """
+    vouchers: int
+    invoices: int
+    line_items: int
+    failed: dict[uuid.UUID, Exception]
+
+    def __init__(self):
+        self.vouchers = 0
+        self.invoices = 0
+        self.line_items = 0
+        self.failed = {}
+
+
+def export_invoices(client: LexofficeClient, invoices: ExportWriter, line_items: ExportWriter = None,
+                    vouchers: ExportWriter = None, status: list[VoucherStatus] = None, batch_size: int = 500,
+                    max_workers: int = 4, priority: Priority = Priority.BACKGROUND) -> ExportResult:
+    """ Export all invoices of the account with their line items.
+
+    The vouchers of type invoice are iterated page by page and their invoices fetched by `max_workers` threads
+    while the previous batch is written. A cache of the client holds every exported invoice, so bulk exports
+    should use a client without cache or with a bounded one. The writers are not closed.
+
+    :param client: Client used to fetch the vouchers and invoices
+    :param invoices: Writer of the invoices, with the schema columnar.INVOICE_SCHEMA
+    :param line_items: Writer of the line items, with the schema columnar.LINE_ITEM_SCHEMA (optional)
+    :param vouchers: Writer of the vouchers, with the schema columnar.VOUCHER_SCHEMA (optional)
+    :param status: status(es) of the invoices to be exported (optional)
+    :param batch_size: Number of rows collected before they are handed to a writer
+    :param max_workers: Number of invoices fetched at the same time
+    :param priority: Priority class of the requests
+    :return: ExportResult with the row counts and failed invoices
+    """
+    result = ExportResult()
+    voucher_batch = []
+    invoice_batch = []
+
+    def invoice_ids():
+        for voucher in client.iter_vouchers(VoucherType.INVOICE, status, priority=priority):
+            result.vouchers += 1
+            if vouchers is not None:
+                voucher_batch.append(voucher)
+                if len(voucher_batch) >= batch_size:
+                    vouchers.write(voucher_columns(voucher_batch))
+                    voucher_batch.clear()
+            yield voucher.id
+
+    def write_invoices():
+        invoices.write(invoice_columns(invoice_batch))
+        result.invoices += len(invoice_batch)
+        if line_items is not None:
+            columns = line_item_columns(invoice_batch)
+            line_items.write(columns)
+            result.line_items += len(columns['id'])
+        invoice_batch.clear()
+
+    for item in client.get_invoices(invoice_ids(), max_workers=max_workers, priority=priority):
+        if not item.ok:
+            result.failed[item.invoice_id] = item.error
+            continue
+        invoice_batch.append(item.invoice)
+        if len(invoice_batch) >= batch_size:
+            write_invoices()
+    write_invoices()
+    if vouchers is not None and voucher_batch:
+        vouchers.write(voucher_columns(voucher_batch))
+    return result
+
+
+def export_to_directory(client: LexofficeClient, directory: Union[str, os.PathLike], format: str = 'csv',
+                        **kwargs) -> ExportResult:
+    """ Export the vouchers, invoices and line items to vouchers.<format>, invoices.<format> and line_items.<format>.
+
+    :param directory: Existing directory the files are written to
+    :param format: 'csv', 'jsonl' or 'parquet'
+    :param kwargs: Further arguments of export_invoices, e.g. status or batch_size
+    """
+    def path(name: str) -> str:
+        return os.path.join(directory, f'{name}.{format}')
+
+    with open_writer(path('vouchers'), VOUCHER_SCHEMA) as vouchers, \
+            open_writer(path('invoices'), INVOICE_SCHEMA) as invoices, \
+            open_writer(path('line_items'), LINE_ITEM_SCHEMA) as line_items:
+        return export_invoices(client, invoices, line_items, vouchers, **kwargs)
@@ -0,0 +1,270 @@
+""" In-memory indexes over vouchers for fast filtering.
+
+Hash indexes map the contact, status and type of the vouchers to the set of matching vouchers, sorted indexes
+keep the vouchers ordered by voucher, due and update date for range queries with bisect. A query starts from
+the smallest index match, e.g. the few vouchers of one contact or the vouchers of a short date range, and checks
+the other conditions only for those, so it does not scan all vouchers.
+"""
+import bisect
+import operator
+import uuid
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from typing import Union
+from .datatypes import Voucher, VoucherType, VoucherStatus
+
+_DateRange = tuple[datetime, datetime]
+
+
+def _timestamp(value: datetime) -> float:
+    return value.timestamp() if value is not None else None
+
+
+class _SortedIndex:
+    """ Vouchers sorted by one date attribute. Vouchers without the date are not contained.
+
+    The vouchers are kept in blocks of at most 2 * LOAD sorted lists, so an insert or delete only moves the items
+    of one block instead of all vouchers behind it.
+    """
+    LOAD = 1000
+
+    def __init__(self, attribute: str):
+        self.attribute = attribute
+        self._len = 0
+        self._maxes: list[float] = []
+        self._keys: list[list[float]] = []
+        self._vouchers: list[list[Voucher]] = []
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, voucher: Voucher):
+        key = _timestamp(getattr(voucher, self.attribute))
+        if key is None:
+            return
+        if not self._maxes:
+            self._maxes.append(key)
+            self._keys.append([key])
+            self._vouchers.append([voucher])
+            self._len = 1
+            return
+        i = min(bisect.bisect_right(self._maxes, key), len(self._maxes) - 1)
+        keys, vouchers = self._keys[i], self._vouchers[i]
+        j = bisect.bisect_right(keys, key)
+        keys.insert(j, key)
+        vouchers.insert(j, voucher)
+        self._maxes[i] = keys[-1]
+        self._len += 1
+        if len(keys) > 2 * self.LOAD:
+            self._keys[i:i + 1] = [keys[:self.LOAD], keys[self.LOAD:]]
+            self._vouchers[i:i + 1] = [vouchers[:self.LOAD], vouchers[self.LOAD:]]
+            self._maxes[i:i + 1] = [keys[self.LOAD - 1], keys[-1]]
+
+    def remove(self, voucher: Voucher):
+        key = _timestamp(getattr(voucher, self.attribute))
+        if key is None:
+            return
+        i = bisect.bisect_left(self._maxes, key)
+        j = bisect.bisect_left(self._keys[i], key)
+        # Vouchers with the same date may continue in the next blocks
+        while self._vouchers[i][j] is not voucher:
+            j += 1
+            if j == len(self._vouchers[i]):
+                i, j = i + 1, 0
+        keys = self._keys[i]
+        del keys[j]
+        del self._vouchers[i][j]
+        self._len -= 1
+        if keys:
+            self._maxes[i] = keys[-1]
+        else:
+            del self._keys[i], self._vouchers[i], self._maxes[i]
+
+    def rebuild(self, vouchers: Iterable[Voucher]):
+        keyed = [(_timestamp(getattr(voucher, self.attribute)), voucher) for voucher in vouchers]
+        keyed = sorted((item for item in keyed if item[0] is not None), key=lambda item: item[0])
+        keys = [key for key, _ in keyed]
+        vouchers = [voucher for _, voucher in keyed]
+        self._len = len(keys)
+        self._keys = [keys[i:i + self.LOAD] for i in range(0, len(keys), self.LOAD)]
+        self._vouchers = [vouchers[i:i + self.LOAD] for i in range(0, len(vouchers), self.LOAD)]
+        self._maxes = [block[-1] for block in self._keys]
+
+    def _position(self, value: datetime) -> tuple[int, int]:
+        """ :return: Block and position in the block of the first voucher with date >= value """
+        key = value.timestamp()
+        i = bisect.bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return i, 0
+        return i, bisect.bisect_left(self._keys[i], key)
+
+    def range(self, start: datetime = None, end: datetime = None) -> tuple[tuple[int, int], tuple[int, int]]:
+        """ :return: Positions of the first voucher with date >= start and the first one with date >= end, so the
+            range includes start and excludes end
+        """
+        lo = self._position(start) if start is not None else (0, 0)
+        hi = self._position(end) if end is not None else (len(self._maxes), 0)
+        return lo, max(lo, hi)
+
+    def count(self, lo: tuple[int, int], hi: tuple[int, int]) -> int:
+        """ :return: Number of vouchers between two positions returned by range() """
+        if lo[0] == hi[0]:
+            return hi[1] - lo[1]
+        return sum(len(self._keys[i]) for i in range(lo[0], hi[0])) - lo[1] + hi[1]
+
+    def slice(self, lo: tuple[int, int], hi: tuple[int, int]) -> list[Voucher]:
+        """ :return: Vouchers between two positions returned by range(), sorted by date """
+        if lo[0] == hi[0]:
+            return self._vouchers[lo[0]][lo[1]:hi[1]] if lo[0] < len(self._vouchers) else []
+        vouchers = self._vouchers[lo[0]][lo[1]:]
+        for i in range(lo[0] + 1, hi[0]):
+            vouchers.extend(self._vouchers[i])
+        if hi[0] < len(self._vouchers):
+            vouchers.extend(self._vouchers[hi[0]][:hi[1]])
+        return vouchers
+
+
+class VoucherIndex:
+    """ Collection of vouchers with indexes on contact, status, type and the voucher, due and update dates.
+
+    Vouchers are identified by their id, adding a voucher with a known id replaces the old one, so pages can be
+    added as they arrive. The vouchers must not be changed in place, add a new Voucher object instead.
+    Not thread-safe.
+    """
+    HASH_ATTRIBUTES = ('contact_id', 'voucher_status', 'voucher_type')
+    DATE_ATTRIBUTES = ('voucher_date', 'due_date', 'updated_date')
+
+    def __init__(self, vouchers: Iterable[Voucher] = ()):
+        """ :param vouchers: Vouchers to be indexed, e.g. the content of a VoucherList """
+        self._vouchers: dict[uuid.UUID, Voucher] = {}
+        self._hashes: dict[str, dict[object, set[Voucher]]] = {name: {} for name in self.HASH_ATTRIBUTES}
+        self._sorted: dict[str, _SortedIndex] = {name: _SortedIndex(name) for name in self.DATE_ATTRIBUTES}
+        self.update(vouchers)
+
+    def __len__(self) -> int:
+        return len(self._vouchers)
+
+    def __contains__(self, voucher_id: uuid.UUID) -> bool:
+        return voucher_id in self._vouchers
+
+    def __iter__(self) -> Iterator[Voucher]:
+        return iter(self._vouchers.values())
+
+    def get(self, voucher_id: uuid.UUID) -> Voucher:
+        """ :return: The voucher with the id or None """
+        return self._vouchers.get(voucher_id)
+
+    def _add_hashes(self, voucher: Voucher):
+        for name, index in self._hashes.items():
+            index.setdefault(getattr(voucher, name), set()).add(voucher)
+
+    def _remove(self, voucher: Voucher, sorted_indexes: bool = True):
+        for name, index in self._hashes.items():
+            key = getattr(voucher, name)
+            matches = index[key]
+            matches.discard(voucher)
+            if not matches:
+                del index[key]
+        if sorted_indexes:
+            for index in self._sorted.values():
+                index.remove(voucher)
+
+    def add(self, voucher: Voucher):
+        """ Add a voucher or replace the voucher with the same id. """
+        old = self._vouchers.get(voucher.id)
+        if old is not None:
+            self._remove(old)
+        self._vouchers[voucher.id] = voucher
+        self._add_hashes(voucher)
+        for index in self._sorted.values():
+            index.add(voucher)
+
+    def update(self, vouchers: Iterable[Voucher]):
+        """ Add or replace many vouchers, e.g. a new page.
+
+        Large batches rebuild the sorted indexes at once instead of inserting every voucher.
+        """
+        vouchers = list(vouchers)
+        if len(vouchers) * 8 < len(self._vouchers):
+            for voucher in vouchers:
+                self.add(voucher)
+            return
+        for voucher in vouchers:
+            old = self._vouchers.get(voucher.id)
+            if old is not None:
+                self._remove(old, sorted_indexes=False)
+            self._vouchers[voucher.id] = voucher
+            self._add_hashes(voucher)
+        for index in self._sorted.values():
+            index.rebuild(self._vouchers.values())
+
+    def remove(self, voucher_id: uuid.UUID) -> Voucher:
+        """ Remove the voucher with the id.
+
+        :return: The removed voucher or None if it was not contained
+        """
+        voucher = self._vouchers.pop(voucher_id, None)
+        if voucher is not None:
+            self._remove(voucher)
+        return voucher
+
+    def find(self, contact_id: uuid.UUID = None, status: Union[VoucherStatus, Iterable[VoucherStatus]] = None,
+             voucher_type: Union[VoucherType, Iterable[VoucherType]] = None, voucher_date: _DateRange = None,
+             due_date: _DateRange = None, updated_date: _DateRange = None) -> list[Voucher]:
+        """ Find the vouchers matching all given conditions.
+
+        Date ranges are (start, end) tuples including start and excluding end, either may be None for an open
+        range. Vouchers without a due date never match a due date range. E.g. all open or overdue vouchers of a
+        contact due before a date: find(contact_id, [VoucherStatus.OPEN, VoucherStatus.OVERDUE], due_date=(None, date))
+
+        :param contact_id: id of the contact the vouchers belong to
+        :param status: status(es) of the vouchers
+        :param voucher_type: type(s) of the vouchers
+        :param voucher_date: Range of the voucher date
+        :param due_date: Range of the due date
+        :param updated_date: Range of the update date
+        :return: Matching vouchers, ordered by the date of the range the query started from if there is one
+        """
+        # Every condition: (number of matching vouchers, attribute, allowed values or range, index match)
+        conditions = []
+        for name, values in (('contact_id', contact_id), ('voucher_status', status), ('voucher_type', voucher_type)):
+            if values is None:
+                continue
+            values = {values} if name == 'contact_id' or isinstance(values, (VoucherStatus, VoucherType)) \
+                else set(values)
+            matches = [self._hashes[name].get(value, ()) for value in values]
+            conditions.append((sum(len(m) for m in matches), name, values, matches))
+        for name, date_range in (('voucher_date', voucher_date), ('due_date', due_date),
+                                 ('updated_date', updated_date)):
+            if date_range is None:
+                continue
+            lo, hi = self._sorted[name].range(*date_range)
+            conditions.append((self._sorted[name].count(lo, hi), name, date_range, (lo, hi)))
+        if not conditions:
+            return list(self._vouchers.values())
+        conditions.sort(key=lambda condition: condition[0])
+        _, name, _, matches = conditions[0]
+        if name in self._sorted:
+            vouchers = self._sorted[name].slice(*matches)
+        else:
+            vouchers = [voucher for candidates in matches for voucher in candidates]
+        for _, name, allowed, matches in conditions[1:]:
+            if not vouchers:
+                break
+            vouchers = self._filter(vouchers, name, allowed, matches)
+        return vouchers
+
+    @staticmethod
+    def _filter(vouchers: list[Voucher], name: str, allowed, matches) -> list[Voucher]:
+        if name not in VoucherIndex.DATE_ATTRIBUTES:
+            # Membership in the sets of the hash index only hashes the voucher objects, not the values
+            if len(matches) == 1:
+                matches = matches[0]
+                return [voucher for voucher in vouchers if voucher in matches]
+            return [voucher for voucher in vouchers if any(voucher in m for m in matches)]
+        get = operator.attrgetter(name)
+        start, end = _timestamp(allowed[0]), _timestamp(allowed[1])
+        start = start if start is not None else float('-inf')
+        end = end if end is not None else float('inf')
+        return [voucher for voucher in vouchers
+                if (value := get(voucher)) is not None and start <= value.timestamp() < end]
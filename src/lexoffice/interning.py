@@ -0,0 +1,136 @@
+""" Deduplication of repeated values in parsed API objects.
+
+Large result sets repeat the same values over and over: every voucher of a contact carries the contact's id and
+name, nearly all amounts are in the same currency, and the invoices of a customer have the same address.
+The parsers create a new object for every occurrence. An Interner replaces equal values by one shared instance,
+so only one copy per distinct value is kept alive. Interned objects are shared and must be treated as read-only.
+"""
+from collections.abc import Iterable
+from datetime import datetime, tzinfo
+from .datatypes import Voucher, Invoice, Address, UnitPrice
+
+_MISSING = object()
+
+
+class Interner:
+    """ Table of canonical instances of strings, UUIDs, dates, addresses and unit prices.
+
+    One Interner can be used for a single result set or for all results of a session, e.g. as `interner` of a
+    LexofficeClient. It holds every distinct value it has seen, so a session-wide interner may be bounded with
+    max_size. It can be shared by threads, concurrent use at worst misses a deduplication.
+    """
+    max_size: int
+
+    def __init__(self, max_size: int = None):
+        """ :param max_size: Max. number of values kept - the table is cleared when it is exceeded (optional) """
+        self.max_size = max_size
+        self._values: dict = {}
+        self._dates: dict[tzinfo, dict[datetime, datetime]] = {}
+        self._addresses: dict[tuple, Address] = {}
+        self._unit_prices: dict[tuple, UnitPrice] = {}
+        # Counted on insert instead of summing the tables, which other threads may change meanwhile
+        self._size = 0
+
+    def __len__(self) -> int:
+        """ :return: Number of distinct values held - approximate while other threads intern values """
+        return self._size
+
+    def clear(self):
+        """ Forget all values, e.g. at the end of a result set. Objects interned before keep their values. """
+        self._values.clear()
+        self._dates.clear()
+        self._addresses.clear()
+        self._unit_prices.clear()
+        self._size = 0
+
+    def _check_size(self):
+        if self.max_size is not None and self._size > self.max_size:
+            self.clear()
+
+    def intern(self, value):
+        """ :param value: String, UUID or other hashable immutable value whose equal values are interchangeable
+        :return: The canonical instance equal to the value
+        """
+        canonical = self._values.get(value, _MISSING)
+        if canonical is _MISSING:
+            canonical = self._values[value] = value
+            self._size += 1
+        return canonical
+
+    def intern_datetime(self, value: datetime) -> datetime:
+        """ :return: The canonical instance of the datetime - equal instants in other time zones are kept apart """
+        if value is None:
+            return None
+        dates = self._dates.get(value.tzinfo)
+        if dates is None:
+            dates = self._dates[value.tzinfo] = {}
+        canonical = dates.get(value)
+        if canonical is None:
+            canonical = dates[value] = value
+            self._size += 1
+        return canonical
+
+    def intern_address(self, address: Address) -> Address:
+        """ :return: The canonical Address with the same values """
+        key = (address.contact_id, address.name, address.supplement, address.street, address.city, address.zip,
+               address.countryCode)
+        canonical = self._addresses.get(key)
+        if canonical is None:
+            canonical = self._addresses[key] = address
+            self._size += 1
+            intern = self.intern
+            address.contact_id = intern(address.contact_id)
+            address.name = intern(address.name)
+            address.supplement = intern(address.supplement)
+            address.street = intern(address.street)
+            address.city = intern(address.city)
+            address.countryCode = intern(address.countryCode)
+        return canonical
+
+    def intern_unit_price(self, unit_price: UnitPrice) -> UnitPrice:
+        """ :return: The canonical UnitPrice with the same values """
+        amounts = (unit_price.net_amount, unit_price.gross_amount, unit_price.tax_rate_percentage)
+        # 1 and 1.0 are equal, but serialized differently
+        key = (unit_price.currency, amounts, tuple(map(type, amounts)))
+        canonical = self._unit_prices.get(key)
+        if canonical is None:
+            canonical = self._unit_prices[key] = unit_price
+            self._size += 1
+            unit_price.currency = self.intern(unit_price.currency)
+        return canonical
+
+    def vouchers(self, vouchers: Iterable[Voucher]):
+        """ Replace the repeated values of the vouchers in place by their canonical instances. """
+        intern, intern_datetime = self.intern, self.intern_datetime
+        for voucher in vouchers:
+            voucher.contact_id = intern(voucher.contact_id)
+            voucher.contact_name = intern(voucher.contact_name)
+            voucher.currency = intern(voucher.currency)
+            # Voucher and due dates are days, created and updated dates are mostly unique
+            voucher.voucher_date = intern_datetime(voucher.voucher_date)
+            voucher.due_date = intern_datetime(voucher.due_date)
+        self._check_size()
+
+    def invoice(self, invoice: Invoice):
+        """ Replace the repeated values and sub-objects of the invoice in place by their canonical instances.
+
+        Lazily parsed invoices are left as they are, their values are only created when they are accessed.
+        """
+        if hasattr(invoice, '_raw'):
+            return
+        intern = self.intern
+        invoice.organization_id = intern(invoice.organization_id)
+        invoice.language = intern(invoice.language)
+        invoice.voucher_status = intern(invoice.voucher_status)
+        invoice.voucher_date = self.intern_datetime(invoice.voucher_date)
+        invoice.due_date = self.intern_datetime(invoice.due_date)
+        invoice.address = self.intern_address(invoice.address)
+        for line_item in invoice.line_items:
+            line_item.name = intern(line_item.name)
+            line_item.description = intern(line_item.description)
+            unit_price = getattr(line_item, 'unit_price', None)
+            if unit_price is not None:
+                line_item.unit_name = intern(line_item.unit_name)
+                line_item.unit_price = self.intern_unit_price(unit_price)
+        invoice.total_price.currency = intern(invoice.total_price.currency)
+        self._check_size()
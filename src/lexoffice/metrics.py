@@ -0,0 +1,179 @@
+""" Per-request events of the clients and a Prometheus-style adapter aggregating them.
+
+Observers are callables taking a RequestEvent. They are passed to a client with `observers=[...]` and called
+in the requesting thread after every API call, also if the call failed.
+"""
+import bisect
+import threading
+import time
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
+
+
+class RequestEvent:
+    """ Timings and sizes of one API call, including its retries. """
+    endpoint: str
+    status: int
+    latency: float
+    network_time: float
+    parse_time: float
+    rate_limit_wait: float
+    bytes: int
+    retries: int
+    error: Exception
+
+    def __init__(self, endpoint: str):
+        """ :param endpoint: Path of the endpoint with placeholders, e.g. '/invoices/{id}' """
+        self.endpoint = endpoint
+        self.status = None
+        self.latency = 0.0
+        self.network_time = 0.0
+        self.parse_time = 0.0
+        self.rate_limit_wait = 0.0
+        self.bytes = 0
+        self.retries = 0
+        self.error = None
+
+    def __repr__(self) -> str:
+        return (f'RequestEvent({self.endpoint!r}, status={self.status}, latency={self.latency:.6f}, '
+                f'network_time={self.network_time:.6f}, parse_time={self.parse_time:.6f}, '
+                f'rate_limit_wait={self.rate_limit_wait:.6f}, bytes={self.bytes}, retries={self.retries})')
+
+
+Observer = Callable[[RequestEvent], None]
+
+
+@contextmanager
+def observe(observers: list[Observer], endpoint: str, event: RequestEvent = None):
+    """ Create a RequestEvent for the calls inside the block and pass it to the observers at its end.
+
+    The duration of the block is added to the latency, an exception raised inside is recorded as the error.
+
+    :param event: Continue this event instead of creating one, e.g. while a streamed response is consumed
+    """
+    event = event if event is not None else RequestEvent(endpoint)
+    start = time.perf_counter()
+    try:
+        yield event
+    except Exception as ex:
+        event.error = ex
+        raise
+    finally:
+        event.latency += time.perf_counter() - start
+        for observer in observers:
+            observer(event)
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+
+
+class Counter:
+    """ Counter metric with labels. """
+    name: str
+    help: str
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} counter'
+        for labels, value in sorted(self.values.items()):
+            yield f'{self.name}{{{_labels(self.labels, labels)}}} {value}' if labels else f'{self.name} {value}'
+
+
+class Histogram:
+    """ Histogram metric with cumulative buckets and labels. """
+    name: str
+    help: str
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self.counts: dict[tuple, list[int]] = {}
+        self.sums: dict[tuple, float] = {}
+
+    def observe(self, value: float, labels: tuple = ()):
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+            self.sums[labels] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    def render(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} histogram'
+        for labels, counts in sorted(self.counts.items()):
+            prefix = _labels(self.labels, labels)
+            prefix = prefix + ',' if prefix else ''
+            total = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                total += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield f'{self.name}_bucket{{{prefix}le="{le}"}} {total}'
+            suffix = f'{{{prefix[:-1]}}}' if prefix else ''
+            yield f'{self.name}_sum{suffix} {self.sums[labels]}'
+            yield f'{self.name}_count{suffix} {total}'
+
+
+class PrometheusObserver:
+    """ Observer aggregating RequestEvents into counters and histograms in the Prometheus text format.
+
+    The output of `render()` can be served on a /metrics endpoint or written to a file for the node exporter.
+    """
+    prefix: str
+
+    def __init__(self, prefix: str = 'lexoffice', buckets: tuple = DEFAULT_BUCKETS):
+        """ :param prefix: Prefix of all metric names
+        :param buckets: Upper bounds in seconds of the histogram buckets
+        """
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.requests = Counter(f'{prefix}_requests_total', 'API calls by endpoint and status.',
+                                ('endpoint', 'status'))
+        self.latency = Histogram(f'{prefix}_request_duration_seconds', 'Total duration of API calls.',
+                                 ('endpoint',), buckets)
+        self.network = Histogram(f'{prefix}_network_seconds', 'Time spent waiting for the API.',
+                                 ('endpoint',), buckets)
+        self.parse = Histogram(f'{prefix}_parse_seconds', 'Time spent decoding responses.', ('endpoint',), buckets)
+        self.rate_limit_wait = Counter(f'{prefix}_rate_limit_wait_seconds_total',
+                                       'Time spent waiting for the rate limit.', ('endpoint',))
+        self.bytes = Counter(f'{prefix}_response_bytes_total', 'Size of the received response bodies.',
+                             ('endpoint',))
+        self.retries = Counter(f'{prefix}_retries_total', 'Requests repeated after 429 Too Many Requests.',
+                               ('endpoint',))
+        self.errors = Counter(f'{prefix}_errors_total', 'API calls that raised an exception.',
+                              ('endpoint', 'exception'))
+
+    def __call__(self, event: RequestEvent):
+        endpoint = (event.endpoint,)
+        with self._lock:
+            self.requests.inc((event.endpoint, str(event.status)))
+            self.latency.observe(event.latency, endpoint)
+            self.network.observe(event.network_time, endpoint)
+            self.parse.observe(event.parse_time, endpoint)
+            self.rate_limit_wait.inc(endpoint, event.rate_limit_wait)
+            self.bytes.inc(endpoint, event.bytes)
+            self.retries.inc(endpoint, event.retries)
+            if event.error is not None:
+                self.errors.inc((event.endpoint, type(event.error).__name__))
+
+    def render(self) -> str:
+        """ :return: All metrics in the Prometheus text exposition format """
+        metrics = [self.requests, self.latency, self.network, self.parse, self.rate_limit_wait, self.bytes,
+                   self.retries, self.errors]
+        with self._lock:
+            return '\n'.join(line for metric in metrics for line in metric.render()) + '\n'
@@ -0,0 +1,229 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+
+_RETRY = 0.001
+
+
+class Priority(IntEnum):
+    """ Priority class of a request. Waiting requests of a higher class get the next token of the limiter first. """
+    INTERACTIVE = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+class PriorityStats:
+    """ Queue depth and wait times of the requests of one priority class. """
+    queued: int
+    max_queued: int
+    calls: int
+    waited: float
+    max_wait: float
+
+    def __init__(self):
+        self.queued = 0
+        self.max_queued = 0
+        self.calls = 0
+        self.waited = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def average_wait(self) -> float:
+        """ Average time in seconds a call of this class had to wait for its token. """
+        return self.waited / self.calls if self.calls else 0.0
+
+
+class RateLimiter:
+    """ Thread-safe token bucket limiting the request rate of one API key.
+
+    Every request takes one token. Tokens are refilled with `rate` per second up to `burst`.
+    Callers of acquire() waiting for a token are queued by priority and then in the order they arrived,
+    so an interactive request is sent before background requests that are already waiting.
+    """
+    rate: float
+    burst: int
+    calls: int
+    waited: float
+    throttled: int
+    stats: dict[Priority, PriorityStats]
+
+    def __init__(self, rate: float = 2.0, burst: int = 2):
+        """ :param rate: Number of requests allowed per second
+        :param burst: Max. number of requests that can be sent at once after an idle period
+        """
+        self.rate = rate
+        self.burst = burst
+        self.calls = 0
+        self.waited = 0.0
+        self.throttled = 0
+        self.stats = {priority: PriorityStats() for priority in Priority}
+        self._lock = threading.Lock()
+        self._turn = threading.Condition(self._lock)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiting: list[tuple[Priority, int]] = []
+        self._sequence = itertools.count()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _record(self, priority: Priority, delay: float):
+        self.calls += 1
+        self.waited += delay
+        stats = self.stats[priority]
+        stats.calls += 1
+        stats.waited += delay
+        stats.max_wait = max(stats.max_wait, delay)
+
+    def _enqueue(self, priority: Priority) -> tuple[Priority, int]:
+        entry = (priority, next(self._sequence))
+        heapq.heappush(self._waiting, entry)
+        stats = self.stats[priority]
+        stats.queued += 1
+        stats.max_queued = max(stats.max_queued, stats.queued)
+        return entry
+
+    def _dequeue(self, entry: tuple[Priority, int]):
+        self._waiting.remove(entry)
+        heapq.heapify(self._waiting)
+        self.stats[entry[0]].queued -= 1
+        self._turn.notify_all()
+
+    def _take(self, entry: tuple[Priority, int]) -> float:
+        """ Take a token for the queued entry if it is its turn. The caller holds the lock.
+
+        :return: 0 if the token has been taken, else seconds to wait before trying again
+        """
+        now = time.monotonic()
+        self._refill(now)
+        delay = max((1 - self._tokens) / self.rate, self._blocked_until - now)
+        if delay > 0 or self._waiting[0] is not entry:
+            # Entries behind the first one retry when the next token is available or the first one has taken it
+            return max(delay, _RETRY)
+        heapq.heappop(self._waiting)
+        self._tokens -= 1
+        self.stats[entry[0]].queued -= 1
+        self._turn.notify_all()
+        return 0.0
+
+    def acquire(self, priority: Priority = Priority.NORMAL) -> float:
+        """ Wait in the queue of the limiter until the request may be sent.
+
+        :param priority: Priority class of the request
+        :return: Seconds the caller has waited
+        """
+        start = time.monotonic()
+        waited = 0.0
+        with self._turn:
+            entry = self._enqueue(priority)
+            try:
+                delay = self._take(entry)
+                while delay > 0:
+                    self._turn.wait(delay)
+                    delay = self._take(entry)
+                    waited = time.monotonic() - start
+            except BaseException:
+                self._dequeue(entry)
+                raise
+            self._record(priority, waited)
+            return waited
+
+    async def acquire_async(self, priority: Priority = Priority.NORMAL) -> float:
+        """ Like acquire(), but waits with asyncio.sleep instead of blocking the thread.
+
+        :param priority: Priority class of the request
+        :return: Seconds the caller has waited
+        """
+        start = time.monotonic()
+        with self._lock:
+            entry = self._enqueue(priority)
+            delay = self._take(entry)
+        waited = 0.0
+        try:
+            while delay > 0:
+                await asyncio.sleep(delay)
+                with self._lock:
+                    delay = self._take(entry)
+                waited = time.monotonic() - start
+        except BaseException:
+            with self._lock:
+                self._dequeue(entry)
+            raise
+        with self._lock:
+            self._record(priority, waited)
+        return waited
+
+    def block(self, seconds: float):
+        """ Hold back all callers for the given time, e.g. after the API answered with 429 Too Many Requests.
+
+        :param seconds: Time in seconds until the next request may be sent
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = min(self._tokens, 0.0)
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self.throttled += 1
+
+    @property
+    def average_wait(self) -> float:
+        """ Average time in seconds a call had to wait for its token. """
+        return self.waited / self.calls if self.calls else 0.0
+
+    def report(self) -> str:
+        """ :return: One line per priority class with its current and max. queue depth and its wait times """
+        return '\n'.join(f'{priority.name.lower():<12} {stats.queued:4d} queued (max. {stats.max_queued}), '
+                         f'{stats.calls} calls, avg. wait {stats.average_wait:.3f} s, '
+                         f'max. wait {stats.max_wait:.3f} s'
+                         for priority, stats in self.stats.items())
+
+
+_shared_limiters: dict[str, RateLimiter] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_rate_limiter(api_key: str, rate: float = 2.0, burst: int = 2) -> RateLimiter:
+    """ Get the rate limiter shared by all clients using the same API key in this process.
+
+    :param api_key: API key the limiter belongs to
+    :param rate: Requests per second, only used when the limiter is created
+    :param burst: Burst size, only used when the limiter is created
+    :return: RateLimiter for the API key
+    """
+    key = hashlib.sha256(api_key.encode()).hexdigest()
+    with _shared_lock:
+        limiter = _shared_limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter(rate, burst)
+            _shared_limiters[key] = limiter
+        return limiter
+
+
+def retry_after(value: str, default: float) -> float:
+    """ Parse the value of a Retry-After header.
+
+    :param value: Header value, either delay in seconds or an HTTP date (may be None)
+    :param default: Delay in seconds used if the header is missing or invalid
+    :return: Delay in seconds
+    """
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """ Coalesces concurrent calls with the same key into one call, whose result all callers share.
+
+    The first caller of a key runs the function, callers arriving while it is running wait for its result
+    (or its exception) instead of running the function again. Thread-safe.
+    """
+    calls: int
+    coalesced: int
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, function: Callable, *args, **kwargs):
+        """ Run the function, unless a call with the same key is already running.
+
+        :param key: Calls with equal keys are coalesced
+        :return: Result of the function, possibly from the call of another thread
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = function(*args, **kwargs)
+            return call.result
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """ Coalesces concurrent coroutine calls with the same key into one task, whose result all callers share.
+
+    Cancelling one caller does not cancel the shared task of the others. Not thread-safe, use one per event loop.
+    """
+    calls: int
+    coalesced: int
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, function: Callable[..., Awaitable], *args, **kwargs):
+        """ Await the coroutine function, unless a call with the same key is already running.
+
+        :param key: Calls with equal keys are coalesced
+        :return: Result of the coroutine, possibly from the call of another task
+        """
+        task = self._tasks.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = self._tasks[key] = asyncio.ensure_future(function(*args, **kwargs))
+            task.add_done_callback(lambda done: self._remove(key, done))
+            self.calls += 1
+        return await asyncio.shield(task)
+
+    def _remove(self, key: Hashable, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
@@ -0,0 +1,224 @@
+import json
+import sqlite3
+import threading
+import uuid
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from .datatypes import Voucher, Invoice, VoucherStatus, VoucherType, _str_or_none
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS vouchers (
+    id TEXT PRIMARY KEY,
+    voucher_type TEXT,
+    voucher_status TEXT,
+    contact_id TEXT,
+    voucher_date REAL,
+    due_date REAL,
+    updated_date REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS vouchers_contact_id ON vouchers (contact_id);
+CREATE INDEX IF NOT EXISTS vouchers_status ON vouchers (voucher_type, voucher_status);
+CREATE INDEX IF NOT EXISTS vouchers_voucher_date ON vouchers (voucher_date);
+CREATE INDEX IF NOT EXISTS vouchers_due_date ON vouchers (due_date);
+CREATE INDEX IF NOT EXISTS vouchers_updated_date ON vouchers (updated_date);
+CREATE TABLE IF NOT EXISTS invoices (
+    id TEXT PRIMARY KEY,
+    version INTEGER,
+    voucher_status TEXT,
+    contact_id TEXT,
+    voucher_date REAL,
+    due_date REAL,
+    updated_date REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS invoices_contact_id ON invoices (contact_id);
+CREATE INDEX IF NOT EXISTS invoices_status ON invoices (voucher_status);
+CREATE INDEX IF NOT EXISTS invoices_voucher_date ON invoices (voucher_date);
+CREATE INDEX IF NOT EXISTS invoices_due_date ON invoices (due_date);
+CREATE INDEX IF NOT EXISTS invoices_updated_date ON invoices (updated_date);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+'''
+
+
+def _timestamp(value: datetime) -> float:
+    return value.timestamp() if value is not None else None
+
+
+class LocalStore:
+    """ Persistent local store for vouchers and invoices, backed by SQLite.
+
+    Each object is kept as JSON together with indexed columns for id, contact, status and dates,
+    so it can be queried without parsing every row. The store can be shared by several threads.
+    """
+    path: str
+
+    def __init__(self, path: str = ':memory:'):
+        """ :param path: Path of the SQLite database file - ':memory:' for a store that is not persisted """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def put_vouchers(self, vouchers: Iterable[Voucher]):
+        """ Insert or replace vouchers. """
+        rows = [(
+            str(v.id), v.voucher_type.value, v.voucher_status.value, _str_or_none(v.contact_id),
+            _timestamp(v.voucher_date), _timestamp(v.due_date), _timestamp(v.updated_date),
+            json.dumps(v.to_dict())
+        ) for v in vouchers]
+        with self._lock, self._db:
+            self._db.executemany('INSERT OR REPLACE INTO vouchers VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def put_voucher(self, voucher: Voucher):
+        self.put_vouchers([voucher])
+
+    def get_voucher(self, voucher_id: uuid.UUID) -> Voucher:
+        """ :return: The stored voucher with the given id or None """
+        with self._lock:
+            row = self._db.execute('SELECT data FROM vouchers WHERE id = ?', (str(voucher_id),)).fetchone()
+        return Voucher(json.loads(row[0])) if row is not None else None
+
+    def delete_voucher(self, voucher_id: uuid.UUID):
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM vouchers WHERE id = ?', (str(voucher_id),))
+
+    def vouchers(self, voucher_type: VoucherType = None, status: list[VoucherStatus] = None, contact_id: str = None,
+                 updated_since: datetime = None, due_before: datetime = None) -> Iterator[Voucher]:
+        """ Query stored vouchers.
+
+        :param voucher_type: type of the vouchers (optional)
+        :param status: status(es) of the vouchers (optional)
+        :param contact_id: id of the contact the vouchers belong to (optional)
+        :param updated_since: only vouchers updated after this date (optional)
+        :param due_before: only vouchers due before this date (optional)
+        :return: Iterator over the matching Vouchers, ordered by voucher date
+        """
+        where, params = [], []
+        if voucher_type is not None:
+            where.append('voucher_type = ?')
+            params.append(voucher_type.value)
+        if status is not None:
+            where.append(f'voucher_status IN ({",".join("?" * len(status))})')
+            params.extend(s.value for s in status)
+        if contact_id is not None:
+            where.append('contact_id = ?')
+            params.append(str(contact_id))
+        if updated_since is not None:
+            where.append('updated_date > ?')
+            params.append(_timestamp(updated_since))
+        if due_before is not None:
+            where.append('due_date < ?')
+            params.append(_timestamp(due_before))
+        sql = 'SELECT data FROM vouchers'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        with self._lock:
+            rows = self._db.execute(sql + ' ORDER BY voucher_date', params).fetchall()
+        for row in rows:
+            yield Voucher(json.loads(row[0]))
+
+    def voucher_updates(self, voucher_type: VoucherType = None,
+                        status: list[VoucherStatus] = None) -> dict[uuid.UUID, float]:
+        """ Get the update dates of stored vouchers without loading the vouchers.
+
+        :param voucher_type: type of the vouchers (optional)
+        :param status: status(es) of the vouchers (optional)
+        :return: Update date (as timestamp) of every matching voucher by id
+        """
+        where, params = [], []
+        if voucher_type is not None:
+            where.append('voucher_type = ?')
+            params.append(voucher_type.value)
+        if status is not None:
+            where.append(f'voucher_status IN ({",".join("?" * len(status))})')
+            params.extend(s.value for s in status)
+        sql = 'SELECT id, updated_date FROM vouchers'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return {uuid.UUID(voucher_id): updated_date for voucher_id, updated_date in rows}
+
+    def put_invoice(self, invoice: Invoice):
+        """ Insert or replace an invoice. """
+        row = (
+            str(invoice.id), invoice.version, invoice.voucher_status, _str_or_none(invoice.address.contact_id),
+            _timestamp(invoice.voucher_date), _timestamp(invoice.due_date), _timestamp(invoice.updated_date),
+            json.dumps(invoice.to_dict())
+        )
+        with self._lock, self._db:
+            self._db.execute('INSERT OR REPLACE INTO invoices VALUES (?, ?, ?, ?, ?, ?, ?, ?)', row)
+
+    def get_invoice(self, invoice_id: uuid.UUID) -> Invoice:
+        """ :return: The stored invoice with the given id or None """
+        with self._lock:
+            row = self._db.execute('SELECT data FROM invoices WHERE id = ?', (str(invoice_id),)).fetchone()
+        return Invoice(json.loads(row[0])) if row is not None else None
+
+    def delete_invoice(self, invoice_id: uuid.UUID):
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM invoices WHERE id = ?', (str(invoice_id),))
+
+    def invoices(self, status: str = None, contact_id: uuid.UUID = None) -> Iterator[Invoice]:
+        """ Query stored invoices.
+
+        :param status: status of the invoices (optional)
+        :param contact_id: id of the contact the invoices are addressed to (optional)
+        :return: Iterator over the matching Invoices, ordered by voucher date
+        """
+        where, params = [], []
+        if status is not None:
+            where.append('voucher_status = ?')
+            params.append(status)
+        if contact_id is not None:
+            where.append('contact_id = ?')
+            params.append(str(contact_id))
+        sql = 'SELECT data FROM invoices'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        with self._lock:
+            rows = self._db.execute(sql + ' ORDER BY voucher_date', params).fetchall()
+        for row in rows:
+            yield Invoice(json.loads(row[0]))
+
+    def get_watermark(self, name: str) -> datetime:
+        """ :return: The high-water mark stored under the given name or None """
+        with self._lock:
+            row = self._db.execute('SELECT value FROM meta WHERE key = ?', (f'watermark:{name}',)).fetchone()
+        return datetime.fromisoformat(row[0]) if row is not None else None
+
+    def set_watermark(self, name: str, value: datetime):
+        """ Store a high-water mark, e.g. the latest update date that has been synchronized. """
+        with self._lock, self._db:
+            self._db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (f'watermark:{name}', value.isoformat()))
+
+    def get_pending_invoices(self, name: str) -> dict[uuid.UUID, datetime]:
+        """ :return: Update date by id of the invoices that could not be fetched by the last run of a sync """
+        with self._lock:
+            row = self._db.execute('SELECT value FROM meta WHERE key = ?', (f'pending:{name}',)).fetchone()
+        if row is None:
+            return {}
+        return {uuid.UUID(invoice_id): datetime.fromisoformat(updated_date)
+                for invoice_id, updated_date in json.loads(row[0]).items()}
+
+    def set_pending_invoices(self, name: str, invoices: dict[uuid.UUID, datetime]):
+        """ Store the invoices that could not be fetched, so the next run of a sync fetches them again. """
+        value = json.dumps({str(invoice_id): updated_date.isoformat() for invoice_id, updated_date in invoices.items()})
+        with self._lock, self._db:
+            self._db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (f'pending:{name}', value))
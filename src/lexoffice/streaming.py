@@ -0,0 +1,216 @@
+""" Incremental parsing of voucherlist pages while they are received.
+
+The parser is fed the response body chunk by chunk and returns every voucher of the 'content' array as soon as
+it is complete, so the first vouchers can be processed before the page has been downloaded and only one
+voucher dict is held at a time. The other keys of the page are collected as metadata.
+"""
+import codecs
+import json
+import time
+from collections.abc import AsyncIterator, Iterator
+from .datatypes import Voucher
+from .interning import Interner
+from .metrics import RequestEvent
+
+CHUNK_SIZE = 8192
+
+_WHITESPACE = ' \t\n\r'
+_decoder = json.JSONDecoder()
+
+
+class VoucherListParser:
+    """ Push parser for the JSON body of a voucherlist response. """
+    metadata: dict
+
+    def __init__(self):
+        self.metadata = {}
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._text = ''
+        self._pos = 0
+        self._state = 'start'
+        self._key = None
+
+    @property
+    def done(self) -> bool:
+        """ True once the closing brace of the page has been parsed. """
+        return self._state == 'done'
+
+    def feed(self, data: bytes) -> list[dict]:
+        """ Parse the next chunk of the body.
+
+        :param data: Next chunk of the response body
+        :return: Voucher dicts completed by this chunk
+        """
+        self._text = self._text[self._pos:] + self._utf8.decode(data)
+        self._pos = 0
+        return self._parse(final=False)
+
+    def close(self) -> list[dict]:
+        """ Parse the rest of the body after the last chunk.
+
+        :return: Voucher dicts completed by the rest of the body
+        :raise ValueError if the body is not a complete voucherlist
+        """
+        self._text = self._text[self._pos:] + self._utf8.decode(b'', final=True)
+        self._pos = 0
+        vouchers = self._parse(final=True)
+        if not self.done:
+            raise ValueError('Incomplete voucherlist response')
+        return vouchers
+
+    def _skip(self) -> str:
+        """ :return: Next character that is not whitespace or None if more data is needed """
+        text, pos = self._text, self._pos
+        while pos < len(text) and text[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        return text[pos] if pos < len(text) else None
+
+    def _decode(self, final: bool) -> tuple[bool, object]:
+        """ :return: True and the next JSON value, or False if more data is needed """
+        try:
+            value, end = _decoder.raw_decode(self._text, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return False, None
+        if end == len(self._text) and not final:
+            # A number at the end of the chunk may continue in the next one
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _expect(self, char: str):
+        if self._text[self._pos] != char:
+            raise ValueError(f'Expected {char!r} at position {self._pos} of voucherlist response chunk')
+        self._pos += 1
+
+    def _parse(self, final: bool) -> list[dict]:
+        vouchers = []
+        while self._state != 'done':
+            char = self._skip()
+            if char is None:
+                break
+            if self._state == 'start':
+                self._expect('{')
+                self._state = 'key'
+            elif self._state == 'key':
+                if char == ',':
+                    self._pos += 1
+                elif char == '}':
+                    self._pos += 1
+                    self._state = 'done'
+                else:
+                    ok, self._key = self._decode(final)
+                    if not ok:
+                        break
+                    self._state = 'colon'
+            elif self._state == 'colon':
+                self._expect(':')
+                self._state = 'value'
+            elif self._state == 'value':
+                if self._key == 'content' and char == '[':
+                    self._pos += 1
+                    self._state = 'content'
+                else:
+                    ok, value = self._decode(final)
+                    if not ok:
+                        break
+                    self.metadata[self._key] = value
+                    self._state = 'key'
+            elif self._state == 'content':
+                if char == ',':
+                    self._pos += 1
+                elif char == ']':
+                    self._pos += 1
+                    self._state = 'key'
+                else:
+                    ok, voucher = self._decode(final)
+                    if not ok:
+                        break
+                    vouchers.append(voucher)
+        return vouchers
+
+
+def parse_chunk(parser: VoucherListParser, chunk: bytes, event: RequestEvent,
+                interner: Interner = None) -> list[Voucher]:
+    """ Feed the next chunk of a response to the parser and build the completed Vouchers.
+
+    :param chunk: Next chunk of the body or None at its end
+    :param event: Event the size of the chunk and the parse time are added to
+    :param interner: Interner deduplicating the values of the Vouchers (optional)
+    """
+    start = time.perf_counter()
+    if chunk is None:
+        items = parser.close()
+    else:
+        event.bytes += len(chunk)
+        items = parser.feed(chunk)
+    vouchers = [Voucher(item) for item in items]
+    if interner is not None:
+        interner.vouchers(vouchers)
+    event.parse_time += time.perf_counter() - start
+    return vouchers
+
+
+class VoucherListStream:
+    """ Vouchers of one voucherlist page, parsed while the response is received.
+
+    Iterating yields the vouchers. The page metadata (first, last, total_pages, ...) is None until the
+    iteration has finished, as the API sends it after the content.
+    """
+    first: bool
+    last: bool
+    total_pages: int
+    total_elements: int
+    number_of_elements: int
+    size: int
+    number: int
+    sort: list
+
+    def __init__(self, vouchers, parser: VoucherListParser):
+        """ :param vouchers: (Async) iterator over the Vouchers fed by the parser
+        :param parser: Parser providing the metadata at the end of the page
+        """
+        self._vouchers = vouchers
+        self._parser = parser
+        self.first = None
+        self.last = None
+        self.total_pages = None
+        self.total_elements = None
+        self.number_of_elements = None
+        self.size = None
+        self.number = None
+        self.sort = None
+
+    @property
+    def complete(self) -> bool:
+        """ True once the whole page has been received and the metadata is available. """
+        return self._parser.done
+
+    def _set_metadata(self):
+        metadata = self._parser.metadata
+        self.first = metadata.get('first')
+        self.last = metadata.get('last')
+        self.total_pages = metadata.get('totalPages')
+        self.total_elements = metadata.get('totalElements')
+        self.number_of_elements = metadata.get('numberOfElements')
+        self.size = metadata.get('size')
+        self.number = metadata.get('number')
+        self.sort = metadata.get('sort')
+
+    def __iter__(self) -> Iterator[Voucher]:
+        yield from self._vouchers
+        self._set_metadata()
+
+    async def __aiter__(self) -> AsyncIterator[Voucher]:
+        async for voucher in self._vouchers:
+            yield voucher
+        self._set_metadata()
+
+    def close(self):
+        """ Stop receiving the page, e.g. if the remaining vouchers are not needed. """
+        self._vouchers.close()
+
+    async def aclose(self):
+        await self._vouchers.aclose()
@@ -0,0 +1,122 @@
+import uuid
+from datetime import datetime
+from .api import LexofficeClient
+from .datatypes import Voucher, VoucherType, VoucherStatus
+from .store import LocalStore
+
+
+class SyncResult:
+    """ Changes found by one run of the SyncEngine. """
+    added: list[uuid.UUID]
+    changed: list[uuid.UUID]
+    removed: list[uuid.UUID]
+    failed: dict[uuid.UUID, Exception]
+    watermark: datetime
+
+    def __init__(self):
+        self.added = []
+        self.changed = []
+        self.removed = []
+        self.failed = {}
+        self.watermark = None
+
+
+class SyncEngine:
+    """ Incrementally synchronizes vouchers and their invoices into a LocalStore.
+
+    The voucherlist is walked from the most recently updated voucher backwards and only until the
+    high-water mark of the last run is passed. Invoices are only fetched for new or changed vouchers.
+    """
+    client: LexofficeClient
+    store: LocalStore
+    voucher_type: VoucherType
+    status: list[VoucherStatus]
+    fetch_invoices: bool
+    max_workers: int
+
+    def __init__(self, client: LexofficeClient, store: LocalStore, voucher_type: VoucherType = VoucherType.INVOICE,
+                 status: list[VoucherStatus] = None, fetch_invoices: bool = True, max_workers: int = 4):
+        """ :param client: Client used to fetch the vouchers and invoices
+        :param store: Store the vouchers and invoices are synchronized into
+        :param voucher_type: type of the vouchers to be synchronized
+        :param status: status(es) of the vouchers to be synchronized (optional)
+        :param fetch_invoices: If True, the invoices of new and changed vouchers of type invoice are fetched
+        :param max_workers: Number of invoices fetched at the same time
+        """
+        self.client = client
+        self.store = store
+        self.voucher_type = voucher_type
+        self.status = status
+        self.fetch_invoices = fetch_invoices
+        self.max_workers = max_workers
+
+    @property
+    def name(self) -> str:
+        """ Name the watermark of this engine is stored under. """
+        status = ','.join(sorted(s.value for s in self.status)) if self.status is not None else 'any'
+        return f'{self.voucher_type.value}:{status}'
+
+    def sync(self, full: bool = False) -> SyncResult:
+        """ Synchronize all vouchers updated since the last run.
+
+        The watermark is only advanced if all invoices could be fetched. Failed invoices are kept in the store and
+        fetched again next run, as their vouchers have already been stored and do not show up as changed anymore.
+
+        :param full: If True, the whole voucherlist is walked and vouchers missing in it are reported as removed
+        :return: SyncResult with the ids of added, changed and removed vouchers
+        """
+        result = SyncResult()
+        watermark = None if full else self.store.get_watermark(self.name)
+        known = self.store.voucher_updates(self.voucher_type, self.status)
+        seen = set()
+        batch: list[Voucher] = []
+        pending = self.store.get_pending_invoices(self.name)
+        to_fetch: dict[uuid.UUID, datetime] = dict(pending) if self.fetch_invoices else {}
+        result.watermark = watermark
+        vouchers = self.client.iter_vouchers(self.voucher_type, self.status, sort='updatedDate,DESC')
+        try:
+            for voucher in vouchers:
+                # Vouchers updated at the watermark itself are checked again, they may have been missed last run
+                if watermark is not None and voucher.updated_date < watermark:
+                    break
+                seen.add(voucher.id)
+                updated = voucher.updated_date.timestamp()
+                if voucher.id not in known:
+                    result.added.append(voucher.id)
+                elif updated > known[voucher.id]:
+                    result.changed.append(voucher.id)
+                else:
+                    continue
+                batch.append(voucher)
+                if voucher.voucher_type == VoucherType.INVOICE:
+                    to_fetch[voucher.id] = voucher.updated_date
+                if result.watermark is None or voucher.updated_date > result.watermark:
+                    result.watermark = voucher.updated_date
+                if len(batch) >= 250:
+                    self.store.put_vouchers(batch)
+                    batch = []
+        finally:
+            vouchers.close()
+        self.store.put_vouchers(batch)
+        if full:
+            result.removed = [voucher_id for voucher_id in known if voucher_id not in seen]
+            for voucher_id in result.removed:
+                self.store.delete_voucher(voucher_id)
+                self.store.delete_invoice(voucher_id)
+                to_fetch.pop(voucher_id, None)
+        if self.fetch_invoices and to_fetch:
+            for invoice_result in self.client.get_invoices(to_fetch, max_workers=self.max_workers,
+                                                           updated_dates=to_fetch):
+                if invoice_result.ok:
+                    self.store.put_invoice(invoice_result.invoice)
+                    updated_date = pending.get(invoice_result.invoice_id)
+                    if updated_date is not None and (result.watermark is None or updated_date > result.watermark):
+                        result.watermark = updated_date
+                else:
+                    result.failed[invoice_result.invoice_id] = invoice_result.error
+        if pending or result.failed:
+            self.store.set_pending_invoices(self.name, {invoice_id: to_fetch[invoice_id]
+                                                        for invoice_id in result.failed})
+        if result.watermark is not None and not result.failed:
+            self.store.set_watermark(self.name, result.watermark)
+        return result
@@ -0,0 +1,240 @@
+""" Clients for many API keys (tenants) in one process.
+
+All tenants share one lazily created connection pool and one set of worker threads. Every tenant has its own
+rate budget, and the workers take the queued calls of the tenants in turn, so a tenant with thousands of queued
+calls (e.g. a bulk export) delays the calls of the other tenants by at most one call each. Tenants that have been
+idle for a while are evicted, so the memory used stays bounded by the number of recently active tenants.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable
+from concurrent.futures import Future
+from requests.adapters import HTTPAdapter
+from .api import LexofficeClient
+from .ratelimit import RateLimiter
+
+
+class _Tenant:
+    def __init__(self, client: LexofficeClient):
+        self.client = client
+        self.queue: deque[tuple[Future, Callable, tuple, dict]] = deque()
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+        self.submitted = 0
+        self.completed = 0
+
+    @property
+    def idle(self) -> bool:
+        return not self.queue and self.in_flight == 0
+
+
+class TenantPool:
+    """ Manages one LexofficeClient per API key with shared connections and fair scheduling of their calls.
+
+    Clients are created on first use. Calls submitted with submit() are run by the worker threads of the pool,
+    which serve the tenants with queued calls round-robin and run at most max_in_flight calls per tenant at once,
+    so a tenant waiting for its rate budget cannot occupy all workers. Thread-safe.
+    """
+    max_workers: int
+    max_in_flight: int
+    idle_timeout: float
+    max_tenants: int
+    evicted: int
+
+    def __init__(self, base_url: str = None, max_workers: int = 8, max_in_flight: int = 2,
+                 pool_connections: int = 10, pool_maxsize: int = None, pool_block: bool = False,
+                 rate_limit: float = 2.0, burst: int = 2, idle_timeout: float = 300.0, max_tenants: int = None,
+                 **client_kwargs):
+        """ :param base_url: URL of the API (optional) - defaults to the lexoffice Public API
+        :param max_workers: Number of worker threads running submitted calls
+        :param max_in_flight: Max. number of submitted calls of one tenant running at once
+        :param pool_connections: Number of per-host connection pools to cache
+        :param pool_maxsize: Max. number of connections kept open per host - defaults to max_workers
+        :param pool_block: If True, threads wait for a free connection instead of opening extra connections
+        :param rate_limit: Max. requests per second of each tenant - None disables it
+        :param burst: Max. number of requests of a tenant sent at once after an idle period
+        :param idle_timeout: Tenants without calls for this many seconds are evicted - None keeps them
+        :param max_tenants: Max. number of tenants kept, the least recently used idle ones are evicted (optional)
+        :param client_kwargs: Further arguments of every LexofficeClient, e.g. timeout, max_retries or observers
+        """
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize if pool_maxsize is not None else max_workers
+        self.pool_block = pool_block
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.idle_timeout = idle_timeout
+        self.max_tenants = max_tenants
+        self.client_kwargs = client_kwargs
+        self.evicted = 0
+        self._adapter: HTTPAdapter = None
+        self._tenants: OrderedDict[str, _Tenant] = OrderedDict()
+        self._ready: deque[_Tenant] = deque()
+        self._workers: list[threading.Thread] = []
+        self._closed = False
+        self._last_eviction = time.monotonic()
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        """ :return: Number of tenants currently held by the pool """
+        with self._lock:
+            return len(self._tenants)
+
+    def __contains__(self, api_key: str) -> bool:
+        with self._lock:
+            return api_key in self._tenants
+
+    def client(self, api_key: str) -> LexofficeClient:
+        """ Get the client of a tenant, creating it on first use.
+
+        Calls made on the client directly are not scheduled by the pool, but count as activity of the tenant.
+
+        :param api_key: API key of the tenant
+        """
+        with self._lock:
+            return self._tenant(api_key).client
+
+    def submit(self, api_key: str, function: Callable, *args, **kwargs) -> Future:
+        """ Queue a call of a tenant to be run by the worker threads.
+
+        :param api_key: API key of the tenant
+        :param function: Called with the client of the tenant and the other arguments,
+            e.g. LexofficeClient.get_invoice
+        :return: Future of the result of the function
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('TenantPool is closed')
+            tenant = self._tenant(api_key)
+            if not tenant.queue:
+                self._ready.append(tenant)
+            tenant.queue.append((future, function, args, kwargs))
+            tenant.submitted += 1
+            if len(self._workers) < self.max_workers:
+                self._start_worker()
+            self._work.notify()
+        return future
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """ :return: Number of submitted, completed, queued and running calls of every tenant """
+        with self._lock:
+            return {api_key: {'submitted': tenant.submitted, 'completed': tenant.completed,
+                              'queued': len(tenant.queue), 'in_flight': tenant.in_flight}
+                    for api_key, tenant in self._tenants.items()}
+
+    def evict_idle(self) -> int:
+        """ Evict tenants that have been idle for longer than idle_timeout and, if there are more than max_tenants,
+        the least recently used idle ones. Called regularly by the pool, too.
+
+        :return: Number of evicted tenants
+        """
+        with self._lock:
+            return self._evict()
+
+    def close(self):
+        """ Run the queued calls, stop the worker threads and close all connections. """
+        with self._lock:
+            self._closed = True
+            self._work.notify_all()
+            workers = list(self._workers)
+        for worker in workers:
+            worker.join()
+        with self._lock:
+            for tenant in self._tenants.values():
+                tenant.client.close()
+            self._tenants.clear()
+            if self._adapter is not None:
+                self._adapter.close()
+                self._adapter = None
+
+    def _tenant(self, api_key: str) -> _Tenant:
+        tenant = self._tenants.get(api_key)
+        if tenant is None:
+            if self._adapter is None:
+                self._adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize,
+                                            pool_block=self.pool_block)
+            # The pool owns the rate budgets of its tenants, so they are released together with the tenant
+            rate_limiter = RateLimiter(self.rate_limit, self.burst) if self.rate_limit is not None else None
+            client = LexofficeClient(api_key, base_url=self.base_url, rate_limit=None, rate_limiter=rate_limiter,
+                                     adapter=self._adapter, **self.client_kwargs)
+            tenant = self._tenants[api_key] = _Tenant(client)
+        else:
+            self._tenants.move_to_end(api_key)
+        tenant.last_used = time.monotonic()
+        if self.max_tenants is not None and len(self._tenants) > self.max_tenants:
+            self._evict(keep=tenant)
+        elif self.idle_timeout is not None and tenant.last_used - self._last_eviction > self.idle_timeout / 2:
+            self._evict(keep=tenant)
+        return tenant
+
+    def _evict(self, keep: _Tenant = None) -> int:
+        now = time.monotonic()
+        self._last_eviction = now
+        excess = len(self._tenants) - self.max_tenants if self.max_tenants is not None else 0
+        evicted = []
+        # The tenants are ordered by their last use, so only the least recently used ones need to be checked
+        for api_key, tenant in self._tenants.items():
+            expired = self.idle_timeout is not None and now - tenant.last_used > self.idle_timeout
+            if not expired and len(evicted) >= excess:
+                break
+            if tenant.idle and tenant is not keep:
+                evicted.append(api_key)
+        for api_key in evicted:
+            self._tenants.pop(api_key).client.close()
+        self.evicted += len(evicted)
+        return len(evicted)
+
+    def _start_worker(self):
+        worker = threading.Thread(target=self._run, name=f'TenantPool-{len(self._workers)}', daemon=True)
+        self._workers.append(worker)
+        worker.start()
+
+    def _next(self) -> tuple:
+        """ :return: Next tenant in turn that may start a call and the call, or None if there is none """
+        for _ in range(len(self._ready)):
+            tenant = self._ready.popleft()
+            if tenant.in_flight < self.max_in_flight:
+                call = tenant.queue.popleft()
+                tenant.in_flight += 1
+                if tenant.queue:
+                    self._ready.append(tenant)
+                return tenant, call
+            self._ready.append(tenant)
+        return None
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while True:
+                    task = self._next()
+                    if task is not None:
+                        break
+                    if self._closed and not self._ready:
+                        self._work.notify_all()
+                        return
+                    self._work.wait()
+            tenant, (future, function, args, kwargs) = task
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(function(tenant.client, *args, **kwargs))
+                except BaseException as ex:
+                    future.set_exception(ex)
+            with self._lock:
+                tenant.in_flight -= 1
+                tenant.completed += 1
+                tenant.last_used = time.monotonic()
+                if self._tenants.get(tenant.client.api_key) is tenant:
+                    self._tenants.move_to_end(tenant.client.api_key)
+                # A call of this tenant may have been held back by max_in_flight
+                self._work.notify()
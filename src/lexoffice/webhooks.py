@@ -0,0 +1,351 @@
+""" Receiver for the events lexoffice posts to the callback URLs of event subscriptions.
+
+Instead of polling the voucherlist for changes, the client subscribes to events like 'invoice.changed' and
+lexoffice posts an Event to the receiver whenever one occurs. The receiver checks the X-Lxo-Signature of every
+request, answers at once and hands the events in batches to a worker thread. There an EventDispatcher drops the
+changed invoices from the cache and local store of the client, refetches them and runs incremental syncs, so
+only the changed resources are requested.
+"""
+import base64
+import binascii
+import json
+import threading
+import uuid
+from collections import deque
+from collections.abc import Callable, Iterable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Union
+from urllib.parse import urlparse
+from .api import LexofficeClient
+from .contacts import ContactCache
+from .datatypes import Event, VoucherType
+from .ratelimit import Priority
+from .sync import SyncEngine
+
+SIGNATURE_HEADER = 'X-Lxo-Signature'
+# Events are a few hundred bytes, larger requests are not read
+MAX_BODY_SIZE = 64 * 1024
+INVOICE_EVENTS = ('invoice.created', 'invoice.changed', 'invoice.deleted', 'invoice.status.changed')
+
+
+def load_public_key(pem: Union[str, bytes]):
+    """ Load the PEM encoded public key the events are signed with, as published by lexoffice (requires cryptography).
+    """
+    from cryptography.hazmat.primitives import serialization
+    if isinstance(pem, str):
+        pem = pem.encode()
+    return serialization.load_pem_public_key(pem)
+
+
+def verify_signature(public_key, body: bytes, signature: str) -> bool:
+    """ Check the X-Lxo-Signature of an event, the base64 encoded RSA signature (PKCS #1 v1.5, SHA-512) of the body.
+
+    :param public_key: Key returned by load_public_key()
+    :param body: Body of the request as received
+    :param signature: Value of the X-Lxo-Signature header
+    :return: True if the body has been signed with the private key of lexoffice
+    """
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+    if not signature:
+        return False
+    try:
+        public_key.verify(base64.b64decode(signature, validate=True), body, padding.PKCS1v15(), hashes.SHA512())
+    except (InvalidSignature, binascii.Error, ValueError):
+        return False
+    return True
+
+
+def subscribe(client: LexofficeClient, callback_url: str,
+              event_types: Iterable[str] = INVOICE_EVENTS) -> dict[str, uuid.UUID]:
+    """ Make sure the callback URL is subscribed to the event types, creating only the missing subscriptions.
+
+    :return: UUID of the subscription by event type
+    """
+    existing = {subscription.event_type: subscription.subscription_id
+                for subscription in client.get_event_subscriptions() if subscription.callback_url == callback_url}
+    return {event_type: existing[event_type] if event_type in existing
+            else client.create_event_subscription(event_type, callback_url) for event_type in event_types}
+
+
+def _resource_type(voucher_type: VoucherType) -> str:
+    """ :return: Resource type of the events concerning vouchers of the type, e.g. 'credit-note' for creditnote """
+    if voucher_type in (VoucherType.SALES_INVOICE, VoucherType.SALES_CREDIT_NOTE, VoucherType.PURCHASE_INVOICE,
+                        VoucherType.PURCHASE_CREDIT_NOTE):
+        return 'voucher'
+    return {
+        VoucherType.DOWN_PAYMENT_INVOICE: 'down-payment-invoice',
+        VoucherType.CREDIT_NOTE: 'credit-note',
+        VoucherType.ORDER_CONFIRMATION: 'order-confirmation',
+        VoucherType.DELIVERY_NOTE: 'delivery-note',
+    }.get(voucher_type, voucher_type.value)
+
+
+class EventDispatcher:
+    """ Turns batches of events into targeted invalidations and refetches.
+
+    Invoice events drop the invoice from the cache and local store of the client and changed invoices are
+    refetched, deleted resources of any type are removed together with their voucher. Sync engines run once per
+    batch if it contains events of their voucher type, so they update the vouchers in the store, e.g. after a
+    status change. Contact events refetch or remove the contact in a ContactCache.
+    All events of a batch are coalesced: an invoice changed several times is invalidated and refetched once.
+    """
+    client: LexofficeClient
+    refetch: bool
+    sync_engines: list[SyncEngine]
+    contacts: ContactCache
+    priority: Priority
+    events: int
+    invalidated: int
+    refetched: int
+    deleted: int
+    syncs: int
+    failed: dict[uuid.UUID, Exception]
+
+    def __init__(self, client: LexofficeClient, refetch: bool = True, sync_engines: Iterable[SyncEngine] = (),
+                 contacts: ContactCache = None, max_workers: int = 4, priority: Priority = Priority.NORMAL):
+        """ :param client: Client whose cache and store are kept up to date
+        :param refetch: If True, changed invoices are fetched again, else only dropped until they are requested
+        :param sync_engines: Engines run after events of their voucher type (optional)
+        :param contacts: Contact cache kept up to date by contact events (optional)
+        :param max_workers: Number of invoices refetched at the same time
+        :param priority: Priority class of the requests
+        """
+        self.client = client
+        self.refetch = refetch
+        self.sync_engines = list(sync_engines)
+        self.contacts = contacts
+        self.max_workers = max_workers
+        self.priority = priority
+        self.events = 0
+        self.invalidated = 0
+        self.refetched = 0
+        self.deleted = 0
+        self.syncs = 0
+        self.failed = {}
+
+    def __call__(self, events: list[Event]):
+        """ Handle a batch of events, as called by the WebhookReceiver. """
+        changed: set[uuid.UUID] = set()
+        deleted: set[uuid.UUID] = set()
+        contacts: dict[uuid.UUID, bool] = {}
+        resource_types = set()
+        for event in events:
+            self.events += 1
+            resource_types.add(event.resource_type)
+            if event.resource_id is None:
+                continue
+            if event.resource_type == 'contact':
+                contacts[event.resource_id] = event.event_type != 'contact.deleted'
+                continue
+            # The last event of a resource in the batch decides whether it still exists
+            if event.event_type.endswith('.deleted'):
+                changed.discard(event.resource_id)
+                deleted.add(event.resource_id)
+            elif event.resource_type == 'invoice':
+                deleted.discard(event.resource_id)
+                changed.add(event.resource_id)
+        for invoice_id in changed:
+            self._invalidate(invoice_id)
+        for voucher_id in deleted:
+            # Incremental syncs do not notice deleted vouchers
+            self._invalidate(voucher_id)
+            if self.client.store is not None:
+                self.client.store.delete_voucher(voucher_id)
+            self.deleted += 1
+        if self.refetch and changed:
+            for result in self.client.get_invoices(changed, max_workers=self.max_workers, priority=self.priority):
+                if result.ok:
+                    self.refetched += 1
+                    self.failed.pop(result.invoice_id, None)
+                else:
+                    self.failed[result.invoice_id] = result.error
+        if self.contacts is not None and contacts:
+            for contact_id, exists in contacts.items():
+                if not exists:
+                    self.contacts.remove(contact_id)
+            self.contacts.refresh(contact_id for contact_id, exists in contacts.items() if exists)
+        for engine in self.sync_engines:
+            if _resource_type(engine.voucher_type) in resource_types:
+                engine.sync()
+                self.syncs += 1
+
+    def _invalidate(self, invoice_id: uuid.UUID):
+        if self.client.cache is not None:
+            self.client.cache.invalidate(invoice_id)
+        if self.client.store is not None:
+            self.client.store.delete_invoice(invoice_id)
+        self.invalidated += 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        receiver: WebhookReceiver = self.server.receiver
+        if urlparse(self.path).path != receiver.path:
+            self._reply(404)
+            return
+        try:
+            length = int(self.headers.get('Content-Length'))
+        except (TypeError, ValueError):
+            self.close_connection = True
+            self._reply(411)
+            return
+        if length > MAX_BODY_SIZE:
+            self.close_connection = True
+            receiver._reject()
+            self._reply(413)
+            return
+        body = self.rfile.read(length)
+        if receiver.public_key is not None \
+                and not verify_signature(receiver.public_key, body, self.headers.get(SIGNATURE_HEADER)):
+            receiver._reject()
+            self._reply(401)
+            return
+        try:
+            content = json.loads(body)
+            event = Event(content)
+            if not event.event_type:
+                raise ValueError('Event without type')
+        except (ValueError, TypeError, AttributeError):
+            receiver._reject()
+            self._reply(400)
+            return
+        receiver._put(event)
+        self._reply(200)
+
+
+class WebhookReceiver:
+    """ Embeddable HTTP server receiving the events posted to the callback URL of event subscriptions.
+
+    Requests are answered as soon as the event has been verified and queued. A worker thread hands the queued
+    events in batches to the handler, e.g. an EventDispatcher, so slow refetches do not delay the responses and
+    bursts of events are coalesced. The server speaks plain HTTP, expose it through a TLS-terminating proxy.
+    """
+    handler: Callable[[list[Event]], None]
+    public_key: object
+    path: str
+    max_batch: int
+    batch_delay: float
+    received: int
+    rejected: int
+    dispatched: int
+    errors: int
+    last_error: Exception
+
+    def __init__(self, handler: Callable[[list[Event]], None], public_key=None, verify: bool = True,
+                 host: str = '127.0.0.1', port: int = 0, path: str = '/', max_batch: int = 100,
+                 batch_delay: float = 0.0):
+        """ :param handler: Called with every batch of received events
+        :param public_key: Public key of lexoffice as PEM or loaded by load_public_key() (requires cryptography)
+        :param verify: If False, events are accepted without checking their signature, e.g. in tests
+        :param host: Address the server listens on
+        :param port: Port the server listens on - 0 for a free port
+        :param path: Path of the callback URL
+        :param max_batch: Max. number of events handed to the handler at once
+        :param batch_delay: Seconds to wait for more events before a batch is handled, so bursts are coalesced
+        """
+        if verify and public_key is None:
+            raise ValueError('A public key is required to verify the events - pass verify=False to accept them '
+                             'unverified')
+        if isinstance(public_key, (str, bytes)):
+            public_key = load_public_key(public_key)
+        self.handler = handler
+        self.public_key = public_key if verify else None
+        self.path = path
+        self.max_batch = max_batch
+        self.batch_delay = batch_delay
+        self.received = 0
+        self.rejected = 0
+        self.dispatched = 0
+        self.errors = 0
+        self.last_error = None
+        self._queue: deque[Event] = deque()
+        self._busy = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.receiver = self
+        self._server_thread = threading.Thread(target=self._httpd.serve_forever, args=(0.05,), daemon=True,
+                                               name='lexoffice-webhooks')
+        self._worker = threading.Thread(target=self._work, daemon=True, name='lexoffice-webhooks-worker')
+
+    @property
+    def url(self) -> str:
+        """ URL the events are received at, behind a proxy the public callback URL differs """
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}{self.path}'
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self):
+        """ Start receiving events in background threads. """
+        self._server_thread.start()
+        self._worker.start()
+
+    def close(self):
+        """ Stop receiving events and wait until the received ones have been handled. """
+        # shutdown() waits for serve_forever() to return, which never ran if the receiver has not been started
+        if self._server_thread.is_alive():
+            self._httpd.shutdown()
+        self._httpd.server_close()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._worker.is_alive():
+            self._worker.join()
+
+    def flush(self, timeout: float = None) -> bool:
+        """ Wait until all received events have been handled.
+
+        :return: False if the timeout has passed before
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def _reject(self):
+        with self._condition:
+            self.rejected += 1
+
+    def _put(self, event: Event):
+        with self._condition:
+            self.received += 1
+            self._queue.append(event)
+            self._condition.notify_all()
+
+    def _work(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    return
+                if self.batch_delay and not self._closed:
+                    self._condition.wait_for(lambda: self._closed or len(self._queue) >= self.max_batch,
+                                             self.batch_delay)
+                batch = [self._queue.popleft() for _ in range(min(len(self._queue), self.max_batch))]
+                self._busy = True
+            try:
+                self.handler(batch)
+            except Exception as ex:
+                self.errors += 1
+                self.last_error = ex
+            with self._condition:
+                self._busy = False
+                self.dispatched += len(batch)
+                self._condition.notify_all()
@@ -0,0 +1,443 @@
+import base64
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import requests
+
+
+def make_voucher(index: int = 0) -> dict:
+    return {
+        "id": str(uuid.UUID(int=index + 1)),
+        "voucherType": "invoice",
+        "voucherStatus": "open",
+        "voucherNumber": f"RE{index:06d}",
+        "voucherDate": "2021-02-14T00:00:00.000+01:00",
+        "createdDate": "2021-03-03T16:52:21.000+01:00",
+        "updatedDate": "2021-03-03T16:52:21.000+01:00",
+        "dueDate": "2021-11-13T00:00:00.000+01:00",
+        "contactId": "777c7793-9fbb-4ec7-9254-0619c199761e",
+        "contactName": "Musterfrau, Erika",
+        "totalAmount": 99.8,
+        "openAmount": 74.8,
+        "currency": "EUR",
+        "archived": False
+    }
+
+
+def make_invoice(invoice_id: str, version: int = 0) -> dict:
+    return {
+        "id": invoice_id,
+        "organizationId": "aa93e8a8-2aa3-470b-b914-caad8a255dd8",
+        "createdDate": "2017-04-24T08:20:22.528+02:00",
+        "updatedDate": "2017-04-24T08:20:22.528+02:00",
+        "version": version,
+        "language": "de",
+        "archived": False,
+        "voucherStatus": "open",
+        "voucherNumber": "RE1019",
+        "voucherDate": "2017-02-22T00:00:00.000+01:00",
+        "dueDate": None,
+        "address": {
+            "contactId": "777c7793-9fbb-4ec7-9254-0619c199761e",
+            "name": "Bike & Ride GmbH & Co. KG",
+            "street": "Musterstraße 42",
+            "city": "Freiburg",
+            "zip": "79112",
+            "countryCode": "DE"
+        },
+        "lineItems": [
+            {
+                "id": "97b98491-e953-4dc9-97a9-ae437a8052b4",
+                "type": "material",
+                "name": "Abus Kabelschloss Primo 590",
+                "quantity": 2,
+                "unitName": "Stück",
+                "unitPrice": {
+                    "currency": "EUR",
+                    "netAmount": 13.4,
+                    "grossAmount": 15.95,
+                    "taxRatePercentage": 19
+                },
+                "discountPercentage": 50,
+                "lineItemAmount": 13.4
+            }
+        ],
+        "totalPrice": {
+            "currency": "EUR",
+            "totalNetAmount": 13.4,
+            "totalGrossAmount": 15.95,
+            "totalTaxAmount": 2.55,
+            "totalDiscountAbsolute": None,
+            "totalDiscountPercentage": None
+        }
+    }
+
+
+def make_contact(contact_id: str, index: int = 0, version: int = 0) -> dict:
+    return {
+        "id": contact_id,
+        "organizationId": "aa93e8a8-2aa3-470b-b914-caad8a255dd8",
+        "version": version,
+        "roles": {"customer": {"number": 10000 + index}},
+        "company": {
+            "name": f"Kunde {index} GmbH",
+            "taxNumber": "12345/12345",
+            "vatRegistrationId": "DE123456789",
+            "allowTaxFreeInvoices": False,
+            "contactPersons": [{"salutation": "Frau", "firstName": "Erika", "lastName": "Musterfrau",
+                                "primary": True, "emailAddress": "erika@example.org", "phoneNumber": "0815"}]
+        },
+        "addresses": {"billing": [{"supplement": None, "street": "Musterstraße 42", "zip": "01067",
+                                   "city": "Dresden", "countryCode": "DE"}]},
+        "emailAddresses": {"business": [f"kunde{index}@example.org"]},
+        "note": None,
+        "archived": False
+    }
+
+
+def make_event(event_type: str, resource_id: str, event_date: str = None) -> dict:
+    return {
+        "organizationId": "aa93e8a8-2aa3-470b-b914-caad8a255dd8",
+        "eventType": event_type,
+        "resourceId": resource_id,
+        "eventDate": event_date or datetime.now().astimezone().isoformat(timespec='milliseconds')
+    }
+
+
+def post_event(callback_url: str, event: dict, private_key=None, body: bytes = None) -> int:
+    """ Post an event to a webhook receiver like lexoffice does.
+
+    :param private_key: RSA key of the cryptography package the body is signed with (optional)
+    :param body: Send this body instead of the event, e.g. a tampered one after signing the event
+    :return: Status code of the response
+    """
+    data = json.dumps(event).encode()
+    headers = {'Content-Type': 'application/json'}
+    if private_key is not None:
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+        headers['X-Lxo-Signature'] = base64.b64encode(private_key.sign(data, padding.PKCS1v15(),
+                                                                       hashes.SHA512())).decode()
+    return requests.post(callback_url, data=body if body is not None else data, headers=headers).status_code
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: dict, etag: str = None):
+        if etag is not None and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        if etag is not None:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if self.headers.get('Connection', '').lower() == 'close':
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        bandwidth = self.server.bandwidth
+        if bandwidth is None:
+            self.wfile.write(data)
+            return
+        for i in range(0, len(data), 4096):
+            self.wfile.write(data[i:i + 4096])
+            self.wfile.flush()
+            time.sleep(4096 / bandwidth)
+
+    def _delay(self):
+        server = self.server
+        if server.latency or server.jitter:
+            with server.lock:
+                jitter = server.random.uniform(-server.jitter, server.jitter)
+            time.sleep(max(0.0, server.latency + jitter))
+
+    def _rate_limited(self) -> float:
+        """ :return: Seconds until the next request is allowed, 0 if this one is within the rate limit """
+        server = self.server
+        if server.rate_limit is None:
+            return 0.0
+        now = time.monotonic()
+        server.tokens = min(server.burst, server.tokens + (now - server.updated) * server.rate_limit)
+        server.updated = now
+        if server.tokens < 1:
+            return (1 - server.tokens) / server.rate_limit
+        server.tokens -= 1
+        return 0.0
+
+    def do_GET(self):
+        self._delay()
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            throttle = server.throttle > 0
+            if throttle:
+                server.throttle -= 1
+                retry = server.retry_after
+            else:
+                wait = self._rate_limited()
+                throttle = wait > 0
+                retry = f'{wait:.3f}'
+            error = None
+            error_body = None
+            if not throttle:
+                if server.fail > 0:
+                    server.fail -= 1
+                    error = server.fail_status
+                    error_body = server.fail_body
+                elif server.error_rate and server.random.random() < server.error_rate:
+                    error = server.error_status
+            status = 429 if throttle else error
+            if status is not None:
+                server.statuses[status] = server.statuses.get(status, 0) + 1
+        if throttle:
+            data = json.dumps({'status': 429, 'error': 'Too Many Requests', 'message': 'Rate limit exceeded'}).encode()
+            self.send_response(429)
+            self.send_header('Retry-After', retry)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        if error is not None and error_body is not None:
+            self.send_response(error)
+            self.send_header('Content-Length', str(len(error_body)))
+            self.end_headers()
+            self.wfile.write(error_body)
+            return
+        if error is not None:
+            self._send(error, {'message': 'Injected server error'})
+            return
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == '/v1/ping':
+            self._send(200, {'userEmail': 'test@example.org'})
+        elif url.path == '/v1/voucherlist':
+            page = int(query.get('page', ['0'])[0])
+            size = min(int(query.get('size', ['25'])[0]), self.server.max_page_size)
+            vouchers = self.server.vouchers
+            status = query.get('voucherStatus', ['any'])[0]
+            if status != 'any':
+                vouchers = [v for v in vouchers if v['voucherStatus'] in status.split(',')]
+            if query.get('sort') == ['updatedDate,DESC']:
+                vouchers = sorted(vouchers, key=lambda v: datetime.fromisoformat(v['updatedDate']), reverse=True)
+            total_pages = max(1, -(-len(vouchers) // size))
+            content = vouchers[page * size:(page + 1) * size]
+            self._send(200, {
+                'content': content,
+                'first': page == 0,
+                'last': page >= total_pages - 1,
+                'totalPages': total_pages,
+                'totalElements': len(vouchers),
+                'numberOfElements': len(content),
+                'size': size,
+                'number': page,
+                'sort': []
+            })
+        elif url.path.startswith('/v1/invoices/'):
+            invoice_id = url.path.rsplit('/', 1)[-1]
+            invoice = self.server.invoices.get(invoice_id)
+            if invoice is None:
+                self._send(404, {'message': f'Invoice {invoice_id} not found'})
+            else:
+                self._send(200, invoice, etag=f'"{invoice["version"]}"')
+        elif url.path == '/v1/contacts':
+            page = int(query.get('page', ['0'])[0])
+            size = min(int(query.get('size', ['25'])[0]), self.server.max_page_size)
+            contacts = list(self.server.contacts.values())
+            content = contacts[page * size:(page + 1) * size]
+            total_pages = max(1, -(-len(contacts) // size))
+            self._send(200, {
+                'content': content,
+                'first': page == 0,
+                'last': page >= total_pages - 1,
+                'totalPages': total_pages,
+                'totalElements': len(contacts),
+                'numberOfElements': len(content),
+                'size': size,
+                'number': page
+            })
+        elif url.path.startswith('/v1/contacts/'):
+            contact = self.server.contacts.get(url.path.rsplit('/', 1)[-1])
+            if contact is None:
+                self._send(404, {'message': 'Contact not found'})
+            else:
+                self._send(200, contact)
+        elif url.path == '/v1/event-subscriptions':
+            with self.server.lock:
+                self._send(200, {'content': list(self.server.subscriptions.values())})
+        elif url.path.startswith('/v1/event-subscriptions/'):
+            subscription = self.server.subscriptions.get(url.path.rsplit('/', 1)[-1])
+            if subscription is None:
+                self._send(404, {'message': 'Event subscription not found'})
+            else:
+                self._send(200, subscription)
+        else:
+            self._send(404, {'message': 'Not found'})
+
+    def do_POST(self):
+        with self.server.lock:
+            self.server.requests += 1
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        if urlparse(self.path).path != '/v1/event-subscriptions':
+            self._send(404, {'message': 'Not found'})
+            return
+        with self.server.lock:
+            if any(s['eventType'] == body['eventType'] and s['callbackUrl'] == body['callbackUrl']
+                   for s in self.server.subscriptions.values()):
+                self._send(409, {'message': 'Event subscription already exists'})
+                return
+            subscription_id = str(uuid.uuid4())
+            created = datetime.now().astimezone().isoformat(timespec='milliseconds')
+            self.server.subscriptions[subscription_id] = {
+                'subscriptionId': subscription_id,
+                'organizationId': 'aa93e8a8-2aa3-470b-b914-caad8a255dd8',
+                'createdDate': created,
+                'eventType': body['eventType'],
+                'callbackUrl': body['callbackUrl']
+            }
+        self._send(201, {'id': subscription_id, 'resourceUri': f'{self.path}/{subscription_id}',
+                         'createdDate': created, 'updatedDate': created, 'version': 0})
+
+    def do_DELETE(self):
+        with self.server.lock:
+            self.server.requests += 1
+            path = urlparse(self.path).path
+            subscription = None
+            if path.startswith('/v1/event-subscriptions/'):
+                subscription = self.server.subscriptions.pop(path.rsplit('/', 1)[-1], None)
+        if subscription is None:
+            self._send(404, {'message': 'Event subscription not found'})
+            return
+        self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+class StubServer:
+    """ Local stand-in for the lexoffice API, serving generated vouchers and invoices.
+
+    It answers /ping, /voucherlist, /invoices/{id}, /contacts and /event-subscriptions, posts events to the subscribed
+    callback URLs and can simulate network latency, the rate limit of the API (429 Too Many Requests with
+    Retry-After) and server errors.
+    """
+
+    def __init__(self, voucher_count: int = 3, latency: float = 0.0, jitter: float = 0.0, max_page_size: int = 250,
+                 rate_limit: float = None, burst: int = 2, error_rate: float = 0.0, error_status: int = 503,
+                 bandwidth: float = None, seed: int = None, contact_count: int = 0):
+        """ :param voucher_count: Number of vouchers (each with an invoice) served
+        :param latency: Delay in seconds before each response
+        :param jitter: Max. random deviation in seconds from the latency
+        :param max_page_size: Larger page sizes requested from /voucherlist and /contacts are reduced to this size
+        :param rate_limit: Max. requests per second before answering with 429 - None for no limit
+        :param burst: Max. number of requests accepted at once after an idle period
+        :param error_rate: Share of requests randomly answered with `error_status`
+        :param error_status: Status code of the injected server errors
+        :param bandwidth: Max. bytes per second of response bodies - None for no limit
+        :param seed: Seed for the jitter and the injected errors (optional)
+        :param contact_count: Number of contacts the vouchers are spread over - 0 for the one contact of make_voucher
+        """
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.lock = threading.Lock()
+        self.httpd.connections = 0
+        self.httpd.requests = 0
+        self.httpd.statuses = {}
+        self.httpd.throttle = 0
+        self.httpd.retry_after = '0'
+        self.httpd.fail = 0
+        self.httpd.fail_status = 500
+        self.httpd.fail_body = None
+        self.httpd.latency = latency
+        self.httpd.jitter = jitter
+        self.httpd.max_page_size = max_page_size
+        self.httpd.rate_limit = rate_limit
+        self.httpd.burst = burst
+        self.httpd.tokens = burst
+        self.httpd.updated = time.monotonic()
+        self.httpd.error_rate = error_rate
+        self.httpd.error_status = error_status
+        self.httpd.bandwidth = bandwidth
+        self.httpd.random = random.Random(seed)
+        self.httpd.vouchers = [make_voucher(i) for i in range(voucher_count)]
+        contact_ids = [str(uuid.UUID(int=2 ** 64 + i)) for i in range(contact_count)]
+        for i, voucher in enumerate(self.httpd.vouchers):
+            if contact_ids:
+                voucher['contactId'] = contact_ids[i % contact_count]
+                voucher['contactName'] = f'Kunde {i % contact_count} GmbH'
+        if not contact_ids:
+            contact_ids = [make_voucher()['contactId']]
+        self.httpd.contacts = {contact_id: make_contact(contact_id, i) for i, contact_id in enumerate(contact_ids)}
+        self.httpd.invoices = {v['id']: make_invoice(v['id']) for v in self.httpd.vouchers}
+        self.httpd.subscriptions = {}
+        self.thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address
+        return f'http://{host}:{port}/v1'
+
+    @property
+    def connections(self) -> int:
+        return self.httpd.connections
+
+    @property
+    def requests(self) -> int:
+        return self.httpd.requests
+
+    @property
+    def statuses(self) -> dict[int, int]:
+        """ Number of 429 and injected error responses by status code. """
+        return self.httpd.statuses
+
+    def throttle(self, count: int, retry_after: str = '0'):
+        """ Answer the next `count` requests with 429 Too Many Requests. """
+        with self.httpd.lock:
+            self.httpd.throttle = count
+            self.httpd.retry_after = retry_after
+
+    def fail(self, count: int, status: int = 500, body: bytes = None):
+        """ Answer the next `count` requests with the given server error.
+
+        :param body: Raw body of the error responses, e.g. b'' - None for a JSON body with a message
+        """
+        with self.httpd.lock:
+            self.httpd.fail = count
+            self.httpd.fail_status = status
+            self.httpd.fail_body = body
+
+    def emit(self, event_type: str, resource_id: str, private_key=None) -> list[int]:
+        """ Post an event to the callback URLs subscribed to its type.
+
+        :param private_key: RSA key the events are signed with (optional)
+        :return: Status codes of the responses
+        """
+        with self.httpd.lock:
+            urls = [s['callbackUrl'] for s in self.httpd.subscriptions.values() if s['eventType'] == event_type]
+        return [post_event(url, make_event(event_type, resource_id), private_key) for url in urls]
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,127 @@
+import importlib.util
+import random
+import unittest
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+
+from src.lexoffice.aggregation import VoucherAggregator, LineItemAggregator, cents_to_decimal
+from src.lexoffice.datatypes import Invoice, VoucherList
+from tests.stub_server import make_voucher, make_invoice
+
+has_numpy = importlib.util.find_spec('numpy') is not None
+MODES = [False, True] if has_numpy else [False]
+
+
+def random_vouchers(count: int) -> list[dict]:
+    rng = random.Random(3)
+    contacts = [str(uuid.uuid4()) for _ in range(4)]
+    vouchers = []
+    for i in range(count):
+        voucher = make_voucher(i)
+        voucher['contactId'] = rng.choice(contacts)
+        voucher['voucherStatus'] = rng.choice(['open', 'paid', 'overdue'])
+        voucher['currency'] = rng.choice(['EUR', 'EUR', 'USD'])
+        voucher['voucherDate'] = f'2021-{rng.randrange(1, 13):02d}-01T00:00:00.000+01:00'
+        voucher['totalAmount'] = rng.randrange(1, 10 ** 6) / 100
+        voucher['openAmount'] = voucher['totalAmount'] if voucher['voucherStatus'] != 'paid' else 0
+        vouchers.append(voucher)
+    return vouchers
+
+
+class TestVoucherAggregator(unittest.TestCase):
+
+    def setUp(self):
+        self.vouchers = random_vouchers(500)
+
+    def expected(self, *keys) -> dict:
+        groups = defaultdict(lambda: [0, Decimal(0), Decimal(0)])
+        names = {'month': 'voucherDate', 'contact_id': 'contactId', 'currency': 'currency',
+                 'voucher_status': 'voucherStatus'}
+        for voucher in self.vouchers:
+            key = tuple(voucher[names[key]][:7] if key == 'month' else voucher[names[key]] for key in keys)
+            group = groups[key]
+            group[0] += 1
+            group[1] += Decimal(str(voucher['totalAmount']))
+            group[2] += Decimal(str(voucher['openAmount']))
+        return {key: {'count': count, 'total_amount': int(total * 100), 'open_amount': int(open_ * 100)}
+                for key, (count, total, open_) in groups.items()}
+
+    def test_group_by_is_exact(self):
+        for use_numpy in MODES:
+            aggregator = VoucherAggregator(self.vouchers, use_numpy=use_numpy)
+            for keys in [(), ('contact_id',), ('month', 'currency'), ('contact_id', 'voucher_status', 'currency')]:
+                with self.subTest(use_numpy=use_numpy, keys=keys):
+                    self.assertEqual(self.expected(*keys), aggregator.group_by(*keys))
+
+    def test_float_sum_loses_cents(self):
+        vouchers = [make_voucher(i) for i in range(10)]
+        for voucher in vouchers:
+            voucher['totalAmount'] = 0.1
+        self.assertNotEqual(1.0, sum(voucher['totalAmount'] for voucher in vouchers))
+        for use_numpy in MODES:
+            with self.subTest(use_numpy=use_numpy):
+                totals = VoucherAggregator(vouchers, use_numpy=use_numpy).totals()
+                self.assertEqual(100, totals['total_amount'])
+                self.assertEqual(Decimal('1.00'), cents_to_decimal(totals['total_amount']))
+
+    def test_objects_and_dicts(self):
+        objects = VoucherList({'content': self.vouchers}).content
+        for use_numpy in MODES:
+            with self.subTest(use_numpy=use_numpy):
+                keys = ('month', 'voucher_status')
+                self.assertEqual(VoucherAggregator(self.vouchers, use_numpy=use_numpy).group_by(*keys),
+                                 VoucherAggregator(objects, use_numpy=use_numpy).group_by(*keys))
+
+    def test_due_month_and_missing_values(self):
+        vouchers = [make_voucher(i) for i in range(3)]
+        vouchers[0]['dueDate'] = None
+        vouchers[1]['openAmount'] = None
+        for use_numpy in MODES:
+            with self.subTest(use_numpy=use_numpy):
+                groups = VoucherAggregator(vouchers, use_numpy=use_numpy).group_by('due_month')
+                self.assertEqual({(None,): {'count': 1, 'total_amount': 9980, 'open_amount': 7480},
+                                  ('2021-11',): {'count': 2, 'total_amount': 19960, 'open_amount': 7480}}, groups)
+
+    def test_empty_and_unknown_key(self):
+        for use_numpy in MODES:
+            with self.subTest(use_numpy=use_numpy):
+                aggregator = VoucherAggregator([], use_numpy=use_numpy)
+                self.assertEqual({}, aggregator.group_by('contact_id'))
+                self.assertEqual({'count': 0, 'total_amount': 0, 'open_amount': 0}, aggregator.totals())
+                with self.assertRaises(ValueError):
+                    aggregator.group_by('customer')
+
+    @unittest.skipUnless(has_numpy, 'numpy is not installed')
+    def test_many_sparse_keys(self):
+        # More key combinations possible than records, so the group ids are made dense
+        vouchers = random_vouchers(2000)
+        for i, voucher in enumerate(vouchers):
+            voucher['contactName'] = f'Kunde {i}'
+        keys = ('contact_name', 'contact_id', 'month', 'currency', 'voucher_status')
+        self.assertEqual(VoucherAggregator(vouchers, use_numpy=False).group_by(*keys),
+                         VoucherAggregator(vouchers, use_numpy=True).group_by(*keys))
+
+
+class TestLineItemAggregator(unittest.TestCase):
+
+    def test_group_by_item_and_invoice_keys(self):
+        invoices = [make_invoice(str(uuid.uuid4())) for _ in range(3)]
+        invoices[2]['voucherDate'] = '2017-03-01T00:00:00.000+01:00'
+        invoices[2]['lineItems'].append({'type': 'text', 'name': 'Freitext', 'description': None})
+        item = invoices[0]['lineItems'][0]
+        amount = round(item['lineItemAmount'] * 100)
+        for use_numpy in MODES:
+            for data in (invoices, [Invoice(invoice) for invoice in invoices]):
+                with self.subTest(use_numpy=use_numpy, objects=not isinstance(data[0], dict)):
+                    aggregator = LineItemAggregator(data, use_numpy=use_numpy)
+                    self.assertEqual(4, len(aggregator))
+                    self.assertEqual({(item['name'], '2017-02'): {'count': 2, 'line_item_amount': 2 * amount},
+                                      (item['name'], '2017-03'): {'count': 1, 'line_item_amount': amount},
+                                      ('Freitext', '2017-03'): {'count': 1, 'line_item_amount': 0}},
+                                     aggregator.group_by('name', 'month'))
+                    self.assertIn(('text', 'open'), aggregator.group_by('type', 'voucher_status'))
+
+
+if __name__ == '__main__':
+    unittest.main()
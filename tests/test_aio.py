@@ -0,0 +1,75 @@
+import asyncio
+import unittest
+import uuid
+
+from requests.exceptions import RequestException
+from src.lexoffice.datatypes import VoucherType
+from src.lexoffice.exceptions import LexofficeException
+from src.lexoffice.ratelimit import RateLimiter
+from tests.stub_server import StubServer
+
+try:
+    from src.lexoffice.aio import AsyncLexofficeClient
+except ImportError:
+    AsyncLexofficeClient = None
+
+
+@unittest.skipIf(AsyncLexofficeClient is None, 'aiohttp is not installed')
+class TestAsyncLexofficeClient(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.server = StubServer(voucher_count=20)
+        self.server.__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    async def test_ping(self):
+        async with AsyncLexofficeClient('key', base_url=self.server.url, rate_limit=None) as client:
+            self.assertTrue(await client.ping())
+
+    async def test_concurrent_invoices(self):
+        async with AsyncLexofficeClient('key', base_url=self.server.url, rate_limit=None, limit=5) as client:
+            voucher_list = await client.get_voucherlist(VoucherType.INVOICE, size=20)
+            self.assertEqual(20, len(voucher_list.content))
+            invoices = await asyncio.gather(*[client.get_invoice(v.id) for v in voucher_list.content])
+        self.assertEqual([v.id for v in voucher_list.content], [i.id for i in invoices])
+        self.assertLessEqual(self.server.connections, 5)
+
+    async def test_rate_limit_and_retry(self):
+        limiter = RateLimiter(rate=100, burst=1)
+        async with AsyncLexofficeClient('key', base_url=self.server.url, rate_limiter=limiter) as client:
+            self.server.throttle(1, retry_after='0.1')
+            self.assertTrue(await client.ping())
+        self.assertEqual(1, limiter.throttled)
+        self.assertEqual(2, limiter.calls)
+
+    async def test_invoice_not_found(self):
+        async with AsyncLexofficeClient('key', base_url=self.server.url, rate_limit=None) as client:
+            with self.assertRaises(LexofficeException):
+                await client.get_invoice(uuid.uuid4())
+
+    async def test_error_without_json_body(self):
+        async with AsyncLexofficeClient('key', base_url=self.server.url, rate_limit=None) as client:
+            for body in (b'', b'<html>Bad Gateway</html>', b'[]'):
+                with self.subTest(body=body):
+                    self.server.fail(1, status=502, body=body)
+                    with self.assertRaises(LexofficeException) as context:
+                        await client.get_invoice(uuid.UUID(self.server.httpd.vouchers[0]['id']))
+                    self.assertEqual('status=502, msg=None', context.exception.msg)
+            self.server.fail(1, status=502, body=b'')
+            with self.assertRaises(RequestException):
+                await client.get_voucherlist(VoucherType.INVOICE)
+
+    async def test_observers(self):
+        events = []
+        async with AsyncLexofficeClient('key', base_url=self.server.url, rate_limit=None,
+                                        observers=[events.append]) as client:
+            voucher_list = await client.get_voucherlist(VoucherType.INVOICE, size=5)
+            await client.get_invoice(voucher_list.content[0].id)
+        self.assertEqual(['/voucherlist', '/invoices/{id}'], [e.endpoint for e in events])
+        self.assertTrue(all(e.status == 200 and e.bytes > 0 and e.parse_time > 0 for e in events))
+
+
+if __name__ == '__main__':
+    unittest.main()
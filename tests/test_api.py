@@ -1,4 +1,6 @@
 import os
+import threading
+import time
 import unittest
 import uuid
 
@@ -8,16 +10,35 @@ from src.lexoffice.datatypes import VoucherType, VoucherStatus
 
 from dotenv import load_dotenv
 
+from src.lexoffice.cache import InvoiceCache
 from src.lexoffice.exceptions import LexofficeException
+from src.lexoffice.ratelimit import RateLimiter
+from src.lexoffice.store import LocalStore
+from tests.stub_server import StubServer, make_invoice
 
 load_dotenv()
 
-# TODO: Write integration tests with fake API - until then theses tests will be ignored!
-@unittest.skip
+INVOICE_ID = 'ba41840a-cab7-40fc-97d2-60a10a2d57e3'
+
+
 class TestLexOfficeApi(unittest.TestCase):
+    """ Runs against the lexoffice API if API_KEY is set, else against the local stub server. """
 
     def setUp(self):
-        self.client = api.LexofficeClient(os.environ.get('API_KEY'))
+        api_key = os.environ.get('API_KEY')
+        self.server = None
+        if api_key:
+            self.client = api.LexofficeClient(api_key)
+        else:
+            self.server = StubServer(voucher_count=300)
+            self.server.httpd.invoices[INVOICE_ID] = make_invoice(INVOICE_ID)
+            self.server.__enter__()
+            self.client = api.LexofficeClient('key', base_url=self.server.url, rate_limit=None)
+
+    def tearDown(self):
+        self.client.close()
+        if self.server is not None:
+            self.server.__exit__(None, None, None)
 
     def test_ping(self):
         self.assertTrue(self.client.ping())
@@ -37,9 +58,8 @@ class TestLexOfficeApi(unittest.TestCase):
             self.assertTrue(voucher.voucher_status in valid_statuses, msg=f'{voucher.voucher_status.value} is not a valid status')
 
     def test_get_invoice(self):
-        invoice_id = 'ba41840a-cab7-40fc-97d2-60a10a2d57e3'
-        invoice = self.client.get_invoice(uuid.UUID(invoice_id))
-        self.assertEqual(invoice.id, uuid.UUID(invoice_id))
+        invoice = self.client.get_invoice(uuid.UUID(INVOICE_ID))
+        self.assertEqual(invoice.id, uuid.UUID(INVOICE_ID))
         self.assertIsNotNone(invoice.line_items)
 
     def test_different_invoices(self):
@@ -54,5 +74,245 @@ class TestLexOfficeApi(unittest.TestCase):
                 pass
 
 
+class TestLexofficeClientSession(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(voucher_count=5)
+        self.server.__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_connection_is_reused(self):
+        with api.LexofficeClient('key', base_url=self.server.url, rate_limit=None) as client:
+            self.assertTrue(client.ping())
+            voucher_list = client.get_voucherlist(VoucherType.INVOICE, size=5)
+            for voucher in voucher_list.content:
+                self.assertEqual(voucher.id, client.get_invoice(voucher.id).id)
+        self.assertEqual(7, self.server.requests)
+        self.assertEqual(1, self.server.connections)
+
+    def test_without_keep_alive(self):
+        with api.LexofficeClient('key', base_url=self.server.url, rate_limit=None, keep_alive=False) as client:
+            client.ping()
+            client.ping()
+        self.assertEqual(2, self.server.connections)
+
+    def test_shared_between_threads(self):
+        client = api.LexofficeClient('key', base_url=self.server.url, rate_limit=None, pool_maxsize=4, pool_block=True)
+        voucher_list = client.get_voucherlist(VoucherType.INVOICE, size=5)
+
+        def fetch():
+            for voucher in voucher_list.content:
+                client.get_invoice(voucher.id)
+
+        threads = [threading.Thread(target=fetch) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        client.close()
+        self.assertEqual(41, self.server.requests)
+        self.assertLessEqual(self.server.connections, 4)
+
+    def test_invoice_not_found(self):
+        with api.LexofficeClient('key', base_url=self.server.url, rate_limit=None) as client:
+            self.assertRaises(LexofficeException, client.get_invoice, uuid.uuid4())
+
+    def test_error_without_json_body(self):
+        self.assertEqual('status=502, msg=None', LexofficeException(None, 'x', status_code=502, body={}).msg)
+        with api.LexofficeClient('key', base_url=self.server.url, rate_limit=None) as client:
+            self.server.fail(1, status=502, body=b'')
+            with self.assertRaises(LexofficeException) as context:
+                client.get_invoice(uuid.UUID(self.server.httpd.vouchers[0]['id']))
+        self.assertEqual('status=502, msg=None', context.exception.msg)
+
+    def test_retry_after_too_many_requests(self):
+        limiter = RateLimiter(rate=100, burst=1)
+        with api.LexofficeClient('key', base_url=self.server.url, rate_limiter=limiter) as client:
+            self.server.throttle(2, retry_after='0.1')
+            self.assertTrue(client.ping())
+        self.assertEqual(3, self.server.requests)
+        self.assertEqual(2, limiter.throttled)
+        self.assertAlmostEqual(0.2, limiter.waited, delta=0.05)
+
+    def test_too_many_retries(self):
+        with api.LexofficeClient('key', base_url=self.server.url, rate_limit=None, max_retries=1) as client:
+            self.server.throttle(2)
+            self.assertFalse(client.ping())
+        self.assertEqual(2, self.server.requests)
+
+    def test_cached_invoice(self):
+        cache = InvoiceCache(ttl=None)
+        invoice_id = uuid.UUID(self.server.httpd.vouchers[0]['id'])
+        with api.LexofficeClient('key', base_url=self.server.url, rate_limit=None, cache=cache) as client:
+            invoice = client.get_invoice(invoice_id)
+            self.assertIs(invoice, client.get_invoice(invoice_id))
+            self.assertEqual(1, self.server.requests)
+            self.server.httpd.invoices[str(invoice_id)]['version'] = 1
+            self.assertEqual(1, client.get_invoice(invoice_id, version=1).version)
+        self.assertEqual(2, self.server.requests)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(2, cache.misses)
+
+    def test_revalidate_expired_invoice(self):
+        cache = InvoiceCache(ttl=0)
+        invoice_id = uuid.UUID(self.server.httpd.vouchers[0]['id'])
+        with api.LexofficeClient('key', base_url=self.server.url, rate_limit=None, cache=cache) as client:
+            invoice = client.get_invoice(invoice_id)
+            self.assertIs(invoice, client.get_invoice(invoice_id))
+        self.assertEqual(2, self.server.requests)
+        self.assertEqual(1, cache.revalidations)
+
+    def test_expired_invoice_is_revalidated_before_store(self):
+        cache = InvoiceCache(ttl=0)
+        store = LocalStore()
+        invoice_id = uuid.UUID(self.server.httpd.vouchers[0]['id'])
+        with api.LexofficeClient('key', base_url=self.server.url, rate_limit=None, cache=cache,
+                                 store=store) as client:
+            invoice = client.get_invoice(invoice_id)
+            self.assertIs(invoice, client.get_invoice(invoice_id))
+            self.assertEqual(1, cache.revalidations)
+            self.server.httpd.invoices[str(invoice_id)]['version'] = 1
+            self.assertEqual(1, client.get_invoice(invoice_id).version)
+            self.assertEqual('"1"', cache.etag(invoice_id))
+        self.assertEqual(3, self.server.requests)
+        self.assertEqual(1, store.get_invoice(invoice_id).version)
+        store.close()
+
+    def test_read_through_store(self):
+        store = LocalStore()
+        with api.LexofficeClient('key', base_url=self.server.url, rate_limit=None, store=store) as client:
+            voucher_list = client.get_voucherlist(VoucherType.INVOICE, size=5)
+            self.assertEqual(5, len(list(store.vouchers())))
+            invoice_id = voucher_list.content[0].id
+            client.get_invoice(invoice_id)
+        with api.LexofficeClient('key', base_url=self.server.url, rate_limit=None, store=store) as client:
+            self.assertEqual(invoice_id, client.get_invoice(invoice_id).id)
+            self.assertEqual(2, self.server.requests)
+            client.get_invoice(invoice_id, version=1)
+            self.assertEqual(3, self.server.requests)
+        store.close()
+
+
+class TestIterVouchers(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(voucher_count=12)
+        self.server.__enter__()
+        self.client = api.LexofficeClient('key', base_url=self.server.url, rate_limit=None)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__(None, None, None)
+
+    def test_all_pages(self):
+        vouchers = list(self.client.iter_vouchers(VoucherType.INVOICE, size=5))
+        expected = [uuid.UUID(v['id']) for v in self.server.httpd.vouchers]
+        self.assertEqual(expected, [v.id for v in vouchers])
+        self.assertEqual(3, self.server.requests)
+
+    def test_without_prefetch(self):
+        vouchers = self.client.iter_vouchers(VoucherType.INVOICE, size=5, prefetch=False)
+        for _ in range(5):
+            next(vouchers)
+        self.assertEqual(1, self.server.requests)
+        self.assertEqual(12, 5 + len(list(vouchers)))
+        self.assertEqual(3, self.server.requests)
+
+    def test_prefetch_next_page(self):
+        vouchers = self.client.iter_vouchers(VoucherType.INVOICE, size=5)
+        next(vouchers)
+        for _ in range(50):
+            if self.server.requests == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(2, self.server.requests)
+        vouchers.close()
+
+    def test_empty_list(self):
+        self.server.httpd.vouchers = []
+        self.assertEqual([], list(self.client.iter_vouchers(VoucherType.INVOICE)))
+
+
+class TestGetInvoices(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(voucher_count=30)
+        self.server.__enter__()
+        self.client = api.LexofficeClient('key', base_url=self.server.url, rate_limit=None)
+        self.ids = [uuid.UUID(v['id']) for v in self.server.httpd.vouchers]
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__(None, None, None)
+
+    def test_ordered(self):
+        results = list(self.client.get_invoices(iter(self.ids), max_workers=4, ordered=True))
+        self.assertEqual(self.ids, [r.invoice_id for r in results])
+        self.assertEqual(self.ids, [r.invoice.id for r in results])
+
+    def test_unordered(self):
+        results = list(self.client.get_invoices(self.ids, max_workers=4))
+        self.assertEqual(set(self.ids), {r.invoice.id for r in results})
+        self.assertEqual(30, self.server.requests)
+
+    def test_errors_are_returned(self):
+        missing = uuid.uuid4()
+        results = list(self.client.get_invoices(self.ids[:3] + [missing], ordered=True))
+        self.assertTrue(all(r.ok for r in results[:3]))
+        self.assertFalse(results[3].ok)
+        self.assertIsNone(results[3].invoice)
+        self.assertIsInstance(results[3].error, LexofficeException)
+
+    def test_rate_limit_is_respected(self):
+        limiter = RateLimiter(rate=50, burst=1)
+        client = api.LexofficeClient('key', base_url=self.server.url, rate_limiter=limiter)
+        start = time.monotonic()
+        self.assertEqual(10, len(list(client.get_invoices(self.ids[:10], max_workers=8))))
+        self.assertGreaterEqual(time.monotonic() - start, 0.17)
+        client.close()
+
+
+class TestServerConditions(unittest.TestCase):
+
+    def test_server_rate_limit(self):
+        with StubServer(rate_limit=20, burst=1) as server, \
+                api.LexofficeClient('key', base_url=server.url, rate_limit=None, max_retries=10) as client:
+            start = time.monotonic()
+            for _ in range(5):
+                self.assertTrue(client.ping())
+            self.assertGreaterEqual(time.monotonic() - start, 0.15)
+        self.assertGreater(server.statuses[429], 0)
+
+    def test_server_error(self):
+        with StubServer() as server, api.LexofficeClient('key', base_url=server.url, rate_limit=None) as client:
+            invoice_id = uuid.UUID(server.httpd.vouchers[0]['id'])
+            server.fail(1, status=503)
+            self.assertRaises(LexofficeException, client.get_invoice, invoice_id)
+            self.assertEqual(invoice_id, client.get_invoice(invoice_id).id)
+        self.assertEqual({503: 1}, server.statuses)
+
+    def test_error_rate(self):
+        with StubServer(error_rate=0.5, seed=1) as server, \
+                api.LexofficeClient('key', base_url=server.url, rate_limit=None) as client:
+            results = [client.ping() for _ in range(20)]
+        self.assertEqual(server.statuses[503], results.count(False))
+        self.assertTrue(0 < results.count(False) < 20)
+
+    def test_latency(self):
+        with StubServer(latency=0.05, jitter=0.01) as server, \
+                api.LexofficeClient('key', base_url=server.url, rate_limit=None) as client:
+            start = time.monotonic()
+            client.ping()
+            self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+    def test_max_page_size(self):
+        with StubServer(voucher_count=25, max_page_size=10) as server, \
+                api.LexofficeClient('key', base_url=server.url, rate_limit=None) as client:
+            self.assertEqual(10, len(client.get_voucherlist(VoucherType.INVOICE, size=250).content))
+            self.assertEqual(25, len(list(client.iter_vouchers(VoucherType.INVOICE, size=250))))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,96 @@
+import time
+import unittest
+import uuid
+from datetime import timedelta
+
+from src.lexoffice.cache import InvoiceCache
+from src.lexoffice.datatypes import Invoice
+from tests.stub_server import make_invoice
+
+
+def invoice(version: int = 0) -> Invoice:
+    return Invoice(make_invoice(str(uuid.uuid4()), version=version))
+
+
+class TestInvoiceCache(unittest.TestCase):
+
+    def test_hit_and_miss(self):
+        cache = InvoiceCache()
+        obj = invoice()
+        self.assertIsNone(cache.get(obj.id))
+        cache.put(obj.id, obj, size=100)
+        self.assertIs(obj, cache.get(obj.id))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+        self.assertEqual(100, cache.size)
+
+    def test_lru_eviction_by_entries(self):
+        cache = InvoiceCache(max_entries=2)
+        a, b, c = invoice(), invoice(), invoice()
+        cache.put(a.id, a)
+        cache.put(b.id, b)
+        cache.get(a.id)
+        cache.put(c.id, c)
+        self.assertIsNone(cache.get(b.id))
+        self.assertIs(a, cache.get(a.id))
+        self.assertEqual(1, cache.evictions)
+        self.assertEqual(2, len(cache))
+
+    def test_eviction_by_bytes(self):
+        cache = InvoiceCache(max_bytes=250)
+        objs = [invoice() for _ in range(3)]
+        for obj in objs:
+            cache.put(obj.id, obj, size=100)
+        self.assertEqual(2, len(cache))
+        self.assertEqual(200, cache.size)
+        self.assertIsNone(cache.get(objs[0].id))
+
+    def test_invoice_larger_than_max_bytes(self):
+        cache = InvoiceCache(max_bytes=250)
+        small, large = invoice(), invoice()
+        cache.put(small.id, small, size=100)
+        cache.put(large.id, large, size=300)
+        self.assertIsNone(cache.get(large.id))
+        self.assertIs(small, cache.get(small.id))
+        self.assertEqual(100, cache.size)
+        cache.put(small.id, small, size=300)
+        self.assertEqual((0, 0), (len(cache), cache.size))
+
+    def test_expiry(self):
+        cache = InvoiceCache(ttl=0.05)
+        a, b = invoice(), invoice()
+        cache.put(a.id, a)
+        cache.put(b.id, b, etag='"0"')
+        time.sleep(0.06)
+        self.assertIsNone(cache.get(a.id))
+        self.assertIsNone(cache.get(b.id))
+        self.assertIsNone(cache.etag(a.id))
+        self.assertEqual('"0"', cache.etag(b.id))
+        self.assertIs(b, cache.revalidate(b.id))
+        self.assertIs(b, cache.get(b.id))
+        self.assertEqual(1, cache.revalidations)
+
+    def test_outdated_version_and_date(self):
+        cache = InvoiceCache()
+        obj = invoice(version=2)
+        cache.put(obj.id, obj)
+        self.assertIs(obj, cache.get(obj.id, version=2))
+        self.assertIs(obj, cache.get(obj.id, updated_date=obj.updated_date))
+        self.assertIsNone(cache.get(obj.id, updated_date=obj.updated_date + timedelta(seconds=1)))
+        self.assertEqual(0, len(cache))
+        cache.put(obj.id, obj)
+        self.assertIsNone(cache.get(obj.id, version=3))
+
+    def test_invalidate(self):
+        cache = InvoiceCache()
+        obj = invoice(version=2)
+        cache.put(obj.id, obj)
+        self.assertFalse(cache.invalidate(obj.id, version=1))
+        self.assertTrue(cache.invalidate(obj.id, version=3))
+        self.assertFalse(cache.invalidate(obj.id))
+        cache.put(obj.id, obj)
+        self.assertTrue(cache.invalidate(obj.id))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import importlib.util
+import unittest
+import uuid
+from decimal import Decimal
+
+from src.lexoffice import columnar
+from src.lexoffice.datatypes import VoucherList, Invoice
+from tests.stub_server import make_voucher, make_invoice
+
+has_numpy = importlib.util.find_spec('numpy') is not None
+has_pandas = importlib.util.find_spec('pandas') is not None
+has_pyarrow = importlib.util.find_spec('pyarrow') is not None
+
+
+class TestColumnar(unittest.TestCase):
+
+    def setUp(self):
+        vouchers = [make_voucher(i) for i in range(3)]
+        vouchers[1]['dueDate'] = None
+        vouchers[2]['voucherStatus'] = 'paid'
+        self.page = {'content': vouchers, 'first': True, 'last': True, 'totalPages': 1, 'totalElements': 3,
+                     'numberOfElements': 3, 'size': 25, 'number': 0, 'sort': []}
+        self.voucher_list = VoucherList(self.page)
+        self.invoice = make_invoice(str(uuid.uuid4()))
+        self.invoice['lineItems'].append({'type': 'text', 'name': 'Freitext', 'description': None})
+
+    def test_voucher_columns(self):
+        columns = columnar.voucher_columns(self.voucher_list.content)
+        self.assertEqual(['open', 'open', 'paid'], columns['voucher_status'])
+        self.assertEqual(columns['voucher_status'], columnar.voucher_columns(self.page['content'])['voucher_status'])
+        self.assertIsNone(columns['due_date'][1])
+
+    def test_line_item_columns(self):
+        columns = columnar.line_item_columns([Invoice(self.invoice)])
+        self.assertEqual(columns, columnar.line_item_columns([self.invoice]))
+        self.assertEqual([self.invoice['id']] * 2, columns['invoice_id'])
+        self.assertEqual(['material', 'text'], columns['type'])
+        self.assertEqual([13.4, None], columns['net_amount'])
+
+    @unittest.skipUnless(has_numpy, 'numpy is not installed')
+    def test_to_numpy(self):
+        arrays = self.voucher_list.to_numpy()
+        self.assertEqual('datetime64[ms]', str(arrays['due_date'].dtype))
+        self.assertTrue(str(arrays['due_date'][1]) == 'NaT')
+        self.assertEqual('float64', str(arrays['total_amount'].dtype))
+        self.assertEqual(Decimal('99.8'), self.voucher_list.to_numpy(decimal=True)['total_amount'][0])
+        self.assertEqual(1613257200000, arrays['voucher_date'][0].astype('int64'))
+
+    @unittest.skipUnless(has_numpy, 'numpy is not installed')
+    def test_dates_from_json(self):
+        self.page['content'][0]['voucherDate'] = '2021-02-14T00:00:00.000-03:30'
+        self.page['content'][2]['voucherDate'] = '2021-02-14T00:00:00+01:00'
+        from_json = columnar.vouchers_to_numpy(self.page['content'])
+        from_objects = VoucherList(self.page).to_numpy()
+        for name in ('voucher_date', 'created_date', 'updated_date', 'due_date'):
+            self.assertEqual(list(from_objects[name].view('int64')), list(from_json[name].view('int64')))
+
+    @unittest.skipUnless(has_pandas, 'pandas is not installed')
+    def test_to_pandas(self):
+        df = self.voucher_list.to_pandas()
+        self.assertEqual(3, len(df))
+        self.assertEqual('category', str(df['voucher_status'].dtype))
+        self.assertIn('overdue', list(df['voucher_status'].cat.categories))
+        self.assertEqual('UTC', str(df['voucher_date'].dt.tz))
+        self.assertAlmostEqual(299.4, df['total_amount'].sum())
+        items = columnar.line_items_to_pandas([self.invoice])
+        self.assertEqual(['material', 'text'], list(items['type']))
+
+    @unittest.skipUnless(has_pyarrow, 'pyarrow is not installed')
+    def test_to_arrow(self):
+        table = self.voucher_list.to_arrow(decimal=True)
+        self.assertEqual(3, table.num_rows)
+        self.assertEqual('decimal128(18, 2)', str(table.schema.field('open_amount').type))
+        self.assertTrue(str(table.schema.field('voucher_type').type).startswith('dictionary'))
+        self.assertEqual(2, columnar.line_items_to_arrow([self.invoice]).num_rows)
+
+    @unittest.skipUnless(has_pyarrow, 'pyarrow is not installed')
+    def test_unit_prices_keep_four_decimals(self):
+        self.invoice['lineItems'][0]['unitPrice']['netAmount'] = 1.2345
+        for invoice in (self.invoice, Invoice(self.invoice)):
+            table = columnar.line_items_to_arrow([invoice], decimal=True)
+            self.assertEqual('decimal128(18, 4)', str(table.schema.field('net_amount').type))
+            self.assertEqual('decimal128(18, 2)', str(table.schema.field('line_item_amount').type))
+            self.assertEqual(Decimal('1.2345'), table.column('net_amount')[0].as_py())
+
+
+if __name__ == '__main__':
+    unittest.main()
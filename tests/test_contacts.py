@@ -0,0 +1,169 @@
+import unittest
+import uuid
+
+from src.lexoffice.api import LexofficeClient
+from src.lexoffice.contacts import ContactCache
+from src.lexoffice.datatypes import Contact, VoucherList
+from src.lexoffice.webhooks import EventDispatcher, WebhookReceiver, subscribe
+from tests.stub_server import StubServer, make_contact
+
+
+class TestContact(unittest.TestCase):
+
+    def test_to_dict_round_trip(self):
+        contact = Contact(make_contact(str(uuid.uuid4()), 7))
+        self.assertEqual(10007, contact.customer_number)
+        self.assertIsNone(contact.vendor_number)
+        self.assertEqual('Kunde 7 GmbH', contact.name)
+        self.assertEqual('01067', contact.billing_addresses[0].zip)
+        self.assertEqual(contact.to_dict(), Contact(contact.to_dict()).to_dict())
+
+    def test_person_name(self):
+        data = make_contact(str(uuid.uuid4()))
+        del data['company']
+        data['person'] = {'salutation': 'Herr', 'firstName': 'Max', 'lastName': 'Mustermann'}
+        data['roles'] = {'vendor': {}}
+        contact = Contact(data)
+        self.assertEqual('Mustermann, Max', contact.name)
+        self.assertEqual((None, 0), (contact.customer_number, contact.vendor_number))
+        self.assertEqual({'vendor': {}}, contact.to_dict()['roles'])
+
+
+class TestContactsEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(voucher_count=30, contact_count=12, max_page_size=5)
+        self.server.__enter__()
+        self.client = LexofficeClient('key', base_url=self.server.url, rate_limit=None)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__(None, None, None)
+
+    def test_get_contact(self):
+        contact_id = next(iter(self.server.httpd.contacts))
+        contact = self.client.get_contact(uuid.UUID(contact_id))
+        self.assertEqual((uuid.UUID(contact_id), 10000, 'Kunde 0 GmbH', 'Erika'),
+                         (contact.id, contact.customer_number, contact.name,
+                          contact.company.contact_persons[0].first_name))
+        self.assertIsNone(self.client.get_contact(uuid.uuid4()))
+
+    def test_get_contacts_pages(self):
+        contact_list = self.client.get_contacts(page=2, size=5)
+        self.assertEqual((3, 12, 2, True), (contact_list.total_pages, contact_list.total_elements,
+                                             contact_list.number_of_elements, contact_list.last))
+        requests_before = self.server.requests
+        contacts = list(self.client.iter_contacts(size=5))
+        self.assertEqual(3, self.server.requests - requests_before)
+        self.assertEqual(list(self.server.httpd.contacts), [str(contact.id) for contact in contacts])
+
+
+class TestContactCache(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(voucher_count=600, contact_count=300)
+        self.server.__enter__()
+        self.client = LexofficeClient('key', base_url=self.server.url, rate_limit=None)
+        self.cache = ContactCache(self.client)
+        self.vouchers = VoucherList({'content': self.server.httpd.vouchers}).content
+        self.contact_ids = [uuid.UUID(contact_id) for contact_id in self.server.httpd.contacts]
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__(None, None, None)
+
+    def test_join_loads_contacts_in_bulk(self):
+        requests_before = self.server.requests
+        pairs = self.cache.join(self.vouchers)
+        # 300 contacts in 2 pages instead of 300 single requests
+        self.assertEqual(2, self.server.requests - requests_before)
+        self.assertEqual(600, len(pairs))
+        self.assertTrue(all(contact.id == voucher.contact_id for voucher, contact in pairs))
+        self.assertEqual(pairs[0][0].contact_name, pairs[0][1].name)
+        self.assertEqual((1, 300), (self.cache.loads, len(self.cache)))
+        requests_before = self.server.requests
+        self.cache.join(self.vouchers)
+        self.assertEqual(requests_before, self.server.requests)
+
+    def test_few_missing_contacts_are_fetched_singly(self):
+        self.cache.load()
+        new_id = str(uuid.uuid4())
+        self.server.httpd.contacts[new_id] = make_contact(new_id, 300)
+        requests_before = self.server.requests
+        contacts = self.cache.resolve([uuid.UUID(new_id), self.contact_ids[0]])
+        self.assertEqual(1, self.server.requests - requests_before)
+        self.assertEqual({uuid.UUID(new_id), self.contact_ids[0]}, set(contacts))
+        self.assertEqual((1, 1), (self.cache.loads, self.cache.fetched))
+
+    def test_unknown_contacts_are_not_requested_again(self):
+        self.cache.load()
+        unknown = uuid.uuid4()
+        self.assertEqual({}, self.cache.resolve([unknown, None]))
+        requests_before = self.server.requests
+        self.assertEqual({}, self.cache.resolve([unknown]))
+        self.assertEqual(requests_before, self.server.requests)
+
+    def test_load_keeps_unchanged_contacts(self):
+        self.cache.load()
+        unchanged = self.cache.get(self.contact_ids[0])
+        changed_id, removed_id = self.contact_ids[1], self.contact_ids[2]
+        self.server.httpd.contacts[str(changed_id)]['version'] += 1
+        del self.server.httpd.contacts[str(removed_id)]
+        changes = self.cache.load()
+        self.assertEqual(([], [changed_id], [removed_id]), (changes.added, changes.changed, changes.removed))
+        self.assertIs(unchanged, self.cache.get(self.contact_ids[0]))
+        self.assertEqual(1, self.cache.get(changed_id).version)
+        self.assertNotIn(removed_id, self.cache)
+
+    def test_refresh_and_remove(self):
+        self.cache.load()
+        contact_id = self.contact_ids[5]
+        self.server.httpd.contacts[str(contact_id)]['version'] += 1
+        del self.server.httpd.contacts[str(self.contact_ids[6])]
+        changes = self.cache.refresh([contact_id, contact_id, self.contact_ids[6]])
+        self.assertEqual(([contact_id], [self.contact_ids[6]]), (changes.changed, changes.removed))
+        self.assertEqual(2, self.cache.fetched)
+        self.assertTrue(self.cache.remove(contact_id))
+        self.assertFalse(self.cache.remove(contact_id))
+        self.assertEqual(298, len(self.cache))
+
+
+class TestContactEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(voucher_count=10, contact_count=5)
+        self.server.__enter__()
+        self.client = LexofficeClient('key', base_url=self.server.url, rate_limit=None)
+        self.contacts = ContactCache(self.client)
+        self.contacts.load()
+        self.dispatcher = EventDispatcher(self.client, contacts=self.contacts)
+        self.receiver = WebhookReceiver(self.dispatcher, verify=False)
+        self.receiver.start()
+        subscribe(self.client, self.receiver.url, ['contact.changed', 'contact.deleted'])
+        self.contact_ids = list(self.server.httpd.contacts)
+
+    def tearDown(self):
+        self.receiver.close()
+        self.client.close()
+        self.server.__exit__(None, None, None)
+
+    def test_changed_contact_is_refetched_once(self):
+        contact = self.server.httpd.contacts[self.contact_ids[0]]
+        contact['version'] += 1
+        contact['company']['name'] = 'Umbenannt GmbH'
+        self.receiver.batch_delay = 0.3
+        for _ in range(3):
+            self.server.emit('contact.changed', self.contact_ids[0])
+        self.assertTrue(self.receiver.flush(5))
+        self.assertEqual(1, self.contacts.fetched)
+        self.assertEqual('Umbenannt GmbH', self.contacts.get(uuid.UUID(self.contact_ids[0])).name)
+
+    def test_deleted_contact_is_removed(self):
+        self.server.emit('contact.deleted', self.contact_ids[1])
+        self.receiver.flush(5)
+        self.assertNotIn(uuid.UUID(self.contact_ids[1]), self.contacts)
+        self.assertEqual((4, 0), (len(self.contacts), self.contacts.fetched))
+
+
+if __name__ == '__main__':
+    unittest.main()
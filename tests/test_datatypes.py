@@ -1,6 +1,7 @@
 import unittest
 import uuid
 from src.lexoffice import datatypes as dt
+from tests.stub_server import make_invoice
 
 
 class TestAddress(unittest.TestCase):
@@ -664,5 +665,32 @@ class TestInvoice(unittest.TestCase):
         self.assertIsNone(obj.due_date)
 
 
+class TestLazyInvoice(unittest.TestCase):
+
+    def setUp(self):
+        self.invoice = make_invoice(str(uuid.uuid4()))
+
+    def test_same_as_eager(self):
+        self.assertEqual(dt.Invoice(self.invoice).to_dict(), dt.Invoice(self.invoice, lazy=True).to_dict())
+
+    def test_parsed_on_access(self):
+        self.invoice['createdDate'] = 'invalid'
+        obj = dt.Invoice(self.invoice, lazy=True)
+        self.assertEqual('open', obj.voucher_status)
+        self.assertEqual(15.95, obj.total_price.total_gross_amount)
+        self.assertRaises(ValueError, getattr, obj, 'created_date')
+
+    def test_memoized(self):
+        obj = dt.Invoice(self.invoice, lazy=True)
+        self.assertIs(obj.address, obj.address)
+        self.assertIs(obj.line_items, obj.line_items)
+        self.assertIsNone(obj.due_date)
+
+    def test_assignment(self):
+        obj = dt.Invoice(self.invoice, lazy=True)
+        obj.due_date = obj.voucher_date
+        self.assertEqual(obj.voucher_date, obj.due_date)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,83 @@
+import importlib.util
+import json
+import unittest
+import uuid
+
+from src.lexoffice.datatypes import Invoice, Type, VoucherStatus, VoucherList
+from src.lexoffice.decoding import JsonDecoder, OrjsonDecoder, MsgspecDecoder, get_decoder
+from tests.stub_server import make_voucher, make_invoice
+
+DECODERS = [JsonDecoder]
+if importlib.util.find_spec('orjson') is not None:
+    DECODERS.append(OrjsonDecoder)
+if importlib.util.find_spec('msgspec') is not None:
+    DECODERS.append(MsgspecDecoder)
+
+
+class TestDecoders(unittest.TestCase):
+
+    def setUp(self):
+        vouchers = [make_voucher(i) for i in range(3)]
+        vouchers[1]['dueDate'] = None
+        vouchers[2]['totalAmount'] = 5
+        self.page = {'content': vouchers, 'first': True, 'last': True, 'totalPages': 1, 'totalElements': 3,
+                     'numberOfElements': 3, 'size': 25, 'number': 0, 'sort': []}
+        self.invoice = make_invoice(str(uuid.uuid4()))
+        self.invoice['address']['zip'] = 'D-79112'
+        self.invoice['lineItems'].append({'id': None, 'type': 'bundle', 'name': 'Set', 'description': None})
+        self.invoice['lineItems'].append({'type': 'custom', 'name': 'Montage', 'quantity': 1.5, 'unitName': 'h',
+                                          'unitPrice': {'currency': 'EUR', 'netAmount': 50, 'grossAmount': 59.5,
+                                                        'taxRatePercentage': 19},
+                                          'discountPercentage': 0, 'lineItemAmount': 75})
+
+    def test_voucherlist(self):
+        expected = VoucherList(self.page).to_dict()
+        for decoder in DECODERS:
+            with self.subTest(decoder.name):
+                voucher_list = decoder().voucherlist(json.dumps(self.page).encode())
+                self.assertEqual(expected, voucher_list.to_dict())
+                self.assertEqual(VoucherStatus.OPEN, voucher_list.content[0].voucher_status)
+                self.assertIsInstance(voucher_list.content[2].total_amount, int)
+
+    def test_invoice(self):
+        expected = Invoice(self.invoice).to_dict()
+        for decoder in DECODERS:
+            with self.subTest(decoder.name):
+                invoice = decoder().invoice(json.dumps(self.invoice).encode())
+                self.assertEqual(expected, invoice.to_dict())
+                self.assertEqual(0, invoice.address.zip)
+                self.assertEqual(Type.UNDEFINED, invoice.line_items[1].type)
+                self.assertEqual(75, invoice.line_items[2].line_item_amount)
+
+    def test_lazy_invoice(self):
+        for decoder in DECODERS:
+            with self.subTest(decoder.name):
+                invoice = decoder().invoice(json.dumps(self.invoice).encode(), lazy=True)
+                self.assertEqual(Invoice(self.invoice).to_dict(), invoice.to_dict())
+
+    def test_schema_mismatch(self):
+        # Values the schema does not accept are handled like by the datatypes constructors
+        self.invoice['version'] = '3'
+        self.invoice['address'] = {}
+        self.page['content'][0]['voucherNumber'] = 1019
+        for decoder in DECODERS:
+            with self.subTest(decoder.name):
+                invoice = decoder().invoice(json.dumps(self.invoice).encode())
+                self.assertEqual('3', invoice.version)
+                self.assertIsNone(invoice.address.contact_id)
+                voucher_list = decoder().voucherlist(json.dumps(self.page).encode())
+                self.assertEqual(1019, voucher_list.content[0].voucher_number)
+
+    def test_invalid_voucher_type(self):
+        self.page['content'][0]['voucherType'] = 'unknown'
+        for decoder in DECODERS:
+            with self.subTest(decoder.name), self.assertRaises(ValueError):
+                decoder().voucherlist(json.dumps(self.page).encode())
+
+    def test_get_decoder(self):
+        self.assertIsInstance(get_decoder('json'), JsonDecoder)
+        self.assertEqual(DECODERS[-1].name, get_decoder().name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import csv
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import unittest
+import uuid
+from decimal import Decimal
+
+from src.lexoffice.api import LexofficeClient
+from src.lexoffice.columnar import INVOICE_SCHEMA, LINE_ITEM_SCHEMA, invoice_columns, line_item_columns
+from src.lexoffice.datatypes import Invoice
+from src.lexoffice.export import ExportWriter, CsvWriter, JsonlWriter, ParquetWriter, open_writer, \
+    export_invoices, export_to_directory
+from tests.stub_server import StubServer, make_invoice
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+class TestWriters(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.invoice = make_invoice(str(uuid.uuid4()))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_csv_objects_and_dicts(self):
+        from_dicts, from_objects = io.StringIO(), io.StringIO()
+        with CsvWriter(from_dicts, INVOICE_SCHEMA) as writer:
+            writer.write(invoice_columns([self.invoice]))
+        with CsvWriter(from_objects, INVOICE_SCHEMA) as writer:
+            writer.write(invoice_columns([Invoice(self.invoice)]))
+        self.assertEqual(from_dicts.getvalue(), from_objects.getvalue())
+        rows = list(csv.DictReader(io.StringIO(from_dicts.getvalue())))
+        self.assertEqual(self.invoice['voucherDate'], rows[0]['voucher_date'])
+        self.assertEqual('', rows[0]['due_date'])
+        self.assertEqual(1, writer.rows)
+
+    def test_jsonl(self):
+        path = os.path.join(self.directory.name, 'invoices.jsonl')
+        with open_writer(path, INVOICE_SCHEMA) as writer:
+            self.assertIsInstance(writer, JsonlWriter)
+            writer.write(invoice_columns([Invoice(self.invoice)] * 2))
+        with open(path, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(2, len(rows))
+        self.assertEqual(self.invoice['address']['name'], rows[0]['name'])
+        self.assertEqual(list(INVOICE_SCHEMA), list(rows[0]))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            open_writer(os.path.join(self.directory.name, 'invoices.xlsx'), INVOICE_SCHEMA)
+
+    @unittest.skipUnless(HAS_PYARROW, 'pyarrow is not installed')
+    def test_parquet_row_groups(self):
+        import pyarrow.parquet as pq
+        path = os.path.join(self.directory.name, 'invoices.parquet')
+        with ParquetWriter(path, INVOICE_SCHEMA, row_group_size=4) as writer:
+            for _ in range(5):
+                writer.write(invoice_columns([self.invoice] * 2))
+                self.assertLess(len(writer._buffer['id']), 4)
+        self.assertEqual(3, writer.row_groups)
+        parquet = pq.ParquetFile(path)
+        self.assertEqual([4, 4, 2], [parquet.metadata.row_group(i).num_rows for i in range(3)])
+        table = parquet.read()
+        self.assertEqual(10, table.num_rows)
+        self.assertEqual(79112, table.column('zip')[0].as_py())
+
+    def test_writer_is_abstract(self):
+        with self.assertRaises(TypeError):
+            ExportWriter(INVOICE_SCHEMA)
+
+    @unittest.skipUnless(HAS_PYARROW, 'pyarrow is not installed')
+    def test_parquet_decimal_line_items(self):
+        import pyarrow.parquet as pq
+        self.invoice['lineItems'][0]['unitPrice']['netAmount'] = 1.2345
+        path = os.path.join(self.directory.name, 'line_items.parquet')
+        with ParquetWriter(path, LINE_ITEM_SCHEMA, decimal=True) as writer:
+            writer.write(line_item_columns([self.invoice, Invoice(self.invoice)]))
+        table = pq.read_table(path)
+        self.assertEqual([Decimal('1.2345')] * 2, table.column('net_amount').to_pylist())
+        self.assertEqual('decimal128(18, 2)', str(table.schema.field('line_item_amount').type))
+
+    @unittest.skipUnless(HAS_PYARROW, 'pyarrow is not installed')
+    def test_parquet_empty(self):
+        import pyarrow.parquet as pq
+        path = os.path.join(self.directory.name, 'line_items.parquet')
+        ParquetWriter(path, LINE_ITEM_SCHEMA).close()
+        table = pq.read_table(path)
+        self.assertEqual(0, table.num_rows)
+        self.assertEqual(list(LINE_ITEM_SCHEMA), table.column_names)
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(voucher_count=23, max_page_size=5)
+        self.server.__enter__()
+        self.client = LexofficeClient('key', base_url=self.server.url, rate_limit=None)
+        self.directory = tempfile.TemporaryDirectory()
+        self.line_items = sum(len(invoice['lineItems']) for invoice in self.server.httpd.invoices.values())
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__(None, None, None)
+        self.directory.cleanup()
+
+    def read_csv(self, name: str) -> list[dict]:
+        with open(os.path.join(self.directory.name, f'{name}.csv'), encoding='utf-8', newline='') as f:
+            return list(csv.DictReader(f))
+
+    def test_csv(self):
+        result = export_to_directory(self.client, self.directory.name, batch_size=4)
+        self.assertEqual((23, 23, self.line_items), (result.vouchers, result.invoices, result.line_items))
+        invoices = self.read_csv('invoices')
+        self.assertEqual({v['id'] for v in self.server.httpd.vouchers}, {row['id'] for row in invoices})
+        self.assertEqual(self.line_items, len(self.read_csv('line_items')))
+        self.assertEqual(23, len(self.read_csv('vouchers')))
+
+    def test_failed_invoice(self):
+        missing = self.server.httpd.vouchers[3]['id']
+        del self.server.httpd.invoices[missing]
+        with CsvWriter(io.StringIO(), INVOICE_SCHEMA) as invoices:
+            result = export_invoices(self.client, invoices, batch_size=10)
+        self.assertEqual([uuid.UUID(missing)], list(result.failed))
+        self.assertEqual(22, invoices.rows)
+
+    @unittest.skipUnless(HAS_PYARROW, 'pyarrow is not installed')
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+        result = export_to_directory(self.client, self.directory.name, format='parquet', batch_size=4)
+        self.assertEqual(23, result.invoices)
+        self.assertEqual(self.line_items, pq.read_table(os.path.join(self.directory.name, 'line_items.parquet'))
+                         .num_rows)
+        vouchers = pq.read_table(os.path.join(self.directory.name, 'vouchers.parquet'))
+        self.assertEqual(23, vouchers.num_rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import random
+import unittest
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from src.lexoffice.datatypes import Voucher, VoucherStatus, VoucherType
+from src.lexoffice.index import VoucherIndex, _SortedIndex
+from tests.stub_server import make_voucher
+
+START = datetime(2021, 1, 1, tzinfo=timezone(timedelta(hours=1)))
+CONTACTS = [str(uuid.uuid4()) for _ in range(5)]
+
+
+def random_voucher(rng: random.Random, index: int) -> Voucher:
+    voucher = make_voucher(index)
+    voucher['contactId'] = rng.choice(CONTACTS)
+    voucher['voucherStatus'] = rng.choice([status.value for status in VoucherStatus])
+    voucher['voucherType'] = rng.choice(['invoice', 'salesinvoice', 'creditnote'])
+    for key in ('voucherDate', 'updatedDate', 'dueDate'):
+        voucher[key] = (START + timedelta(days=rng.randrange(60))).isoformat(timespec='milliseconds')
+    if rng.random() < 0.2:
+        voucher['dueDate'] = None
+    return Voucher(voucher)
+
+
+def in_range(value: datetime, date_range: tuple) -> bool:
+    start, end = date_range
+    return value is not None and (start is None or start <= value) and (end is None or value < end)
+
+
+class TestVoucherIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(7)
+        self.vouchers = [random_voucher(self.rng, i) for i in range(300)]
+        self.index = VoucherIndex(self.vouchers)
+
+    def assertFinds(self, expected, **conditions):
+        self.assertEqual(sorted(voucher.id for voucher in expected),
+                         sorted(voucher.id for voucher in self.index.find(**conditions)))
+
+    def test_find_matches_scan(self):
+        contact = uuid.UUID(CONTACTS[0])
+        open_statuses = [VoucherStatus.OPEN, VoucherStatus.OVERDUE]
+        due = (None, START + timedelta(days=30))
+        self.assertFinds([v for v in self.vouchers if v.contact_id == contact and v.voucher_status in open_statuses
+                          and in_range(v.due_date, due)],
+                         contact_id=contact, status=open_statuses, due_date=due)
+        updated = (START + timedelta(days=50), None)
+        self.assertFinds([v for v in self.vouchers if v.voucher_type == VoucherType.INVOICE
+                          and in_range(v.updated_date, updated)],
+                         voucher_type=VoucherType.INVOICE, updated_date=updated)
+        dates = (START + timedelta(days=10), START + timedelta(days=12))
+        self.assertFinds([v for v in self.vouchers if v.voucher_status == VoucherStatus.PAID
+                          and in_range(v.voucher_date, dates) and in_range(v.due_date, (None, None))],
+                         status=VoucherStatus.PAID, voucher_date=dates, due_date=(None, None))
+        self.assertFinds(self.vouchers)
+        self.assertEqual([], self.index.find(contact_id=uuid.uuid4(), status=VoucherStatus.OPEN))
+
+    def test_range_is_sorted_and_half_open(self):
+        start, end = START + timedelta(days=5), START + timedelta(days=9)
+        found = self.index.find(voucher_date=(start, end))
+        self.assertEqual(sorted(v.voucher_date for v in found), [v.voucher_date for v in found])
+        self.assertTrue(all(start <= v.voucher_date < end for v in found))
+        self.assertEqual(len([v for v in self.vouchers if start <= v.voucher_date < end]), len(found))
+
+    def test_add_replaces_voucher(self):
+        old = self.vouchers[0]
+        data = old.to_dict()
+        data['voucherStatus'] = 'voided' if old.voucher_status != VoucherStatus.VOIDED else 'paid'
+        data['dueDate'] = None
+        new = Voucher(data)
+        self.index.add(new)
+        self.assertEqual(300, len(self.index))
+        self.assertIs(new, self.index.get(old.id))
+        self.assertNotIn(old, self.index.find(status=old.voucher_status))
+        self.assertIn(new, self.index.find(status=new.voucher_status))
+        self.assertNotIn(old, self.index.find(due_date=(None, None)))
+        self.assertEqual(sum(v.due_date is not None for v in self.vouchers[1:]),
+                         len(self.index.find(due_date=(None, None))))
+
+    def test_update_pages(self):
+        index = VoucherIndex()
+        for start in range(0, 300, 25):
+            index.update(self.vouchers[start:start + 25])
+        changed = [random_voucher(self.rng, i) for i in range(0, 300, 3)]
+        index.update(changed)
+        expected = self.vouchers[:]
+        for i, voucher in zip(range(0, 300, 3), changed):
+            expected[i] = voucher
+        self.index = index
+        self.assertEqual(300, len(index))
+        for status in VoucherStatus:
+            with self.subTest(status):
+                self.assertFinds([v for v in expected if v.voucher_status == status], status=status)
+        updated = (START + timedelta(days=20), START + timedelta(days=40))
+        self.assertFinds([v for v in expected if in_range(v.updated_date, updated)], updated_date=updated)
+
+    def test_remove(self):
+        voucher = self.vouchers[5]
+        self.assertIs(voucher, self.index.remove(voucher.id))
+        self.assertIsNone(self.index.remove(voucher.id))
+        self.assertNotIn(voucher.id, self.index)
+        self.assertNotIn(voucher, self.index.find(contact_id=voucher.contact_id))
+        self.assertNotIn(voucher, self.index.find(voucher_date=(None, None)))
+        self.assertEqual(299, len(list(self.index)))
+
+
+class TestSmallBlocks(TestVoucherIndex):
+    """ Same tests with blocks of a few vouchers, so vouchers of one date span several blocks. """
+
+    def setUp(self):
+        patcher = mock.patch.object(_SortedIndex, 'LOAD', 4)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+    def test_blocks_are_split_and_removed(self):
+        index = VoucherIndex()
+        for voucher in self.vouchers:
+            index.add(voucher)
+        blocks = index._sorted['voucher_date']._keys
+        self.assertTrue(all(0 < len(block) <= 8 for block in blocks))
+        for voucher in self.vouchers[:290]:
+            index.remove(voucher.id)
+        self.assertEqual(sorted(v.voucher_date for v in self.vouchers[290:]),
+                         [v.voucher_date for v in index.find(voucher_date=(None, None))])
+        self.assertTrue(all(block for block in index._sorted['voucher_date']._keys))
+
+
+if __name__ == '__main__':
+    unittest.main()
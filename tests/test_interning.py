@@ -0,0 +1,137 @@
+import json
+import threading
+import unittest
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from src.lexoffice.api import LexofficeClient
+from src.lexoffice.datatypes import Invoice, VoucherList, VoucherType
+from src.lexoffice.decoding import get_decoder
+from src.lexoffice.interning import Interner
+from tests.stub_server import StubServer, make_voucher, make_invoice
+
+
+class TestInterner(unittest.TestCase):
+
+    def setUp(self):
+        self.interner = Interner()
+
+    def test_vouchers(self):
+        pages = [VoucherList({'content': [make_voucher(i) for i in range(start, start + 3)]}) for start in (0, 3)]
+        expected = [[voucher.to_dict() for voucher in page.content] for page in pages]
+        for page in pages:
+            self.interner.vouchers(page.content)
+        vouchers = pages[0].content + pages[1].content
+        for attribute in ('contact_id', 'contact_name', 'currency', 'voucher_date', 'due_date'):
+            with self.subTest(attribute):
+                self.assertEqual(1, len({id(getattr(voucher, attribute)) for voucher in vouchers}))
+        self.assertEqual(6, len({id(voucher.id) for voucher in vouchers}))
+        self.assertEqual(expected, [[voucher.to_dict() for voucher in page.content] for page in pages])
+
+    def test_contact_id_is_uuid(self):
+        voucher = VoucherList({'content': [make_voucher()]}).content[0]
+        self.assertEqual(uuid.UUID(make_voucher()['contactId']), voucher.contact_id)
+
+    def test_invoices(self):
+        invoices = [Invoice(make_invoice(str(uuid.uuid4()))) for _ in range(2)]
+        expected = [invoice.to_dict() for invoice in invoices]
+        for invoice in invoices:
+            self.interner.invoice(invoice)
+        self.assertIs(invoices[0].address, invoices[1].address)
+        self.assertIs(invoices[0].line_items[0].unit_price, invoices[1].line_items[0].unit_price)
+        self.assertIs(invoices[0].line_items[0].name, invoices[1].line_items[0].name)
+        self.assertIs(invoices[0].total_price.currency, invoices[1].total_price.currency)
+        self.assertEqual(expected, [invoice.to_dict() for invoice in invoices])
+
+    def test_different_values_are_kept_apart(self):
+        invoices = [make_invoice(str(uuid.uuid4())) for _ in range(2)]
+        invoices[1]['address']['street'] = 'Andere Straße 1'
+        invoices[1]['lineItems'][0]['unitPrice']['netAmount'] = float(invoices[0]['lineItems'][0]['unitPrice']
+                                                                      ['netAmount'])
+        invoices = [Invoice(invoice) for invoice in invoices]
+        expected = [invoice.to_dict() for invoice in invoices]
+        for invoice in invoices:
+            self.interner.invoice(invoice)
+        self.assertIsNot(invoices[0].address, invoices[1].address)
+        self.assertIs(invoices[0].address.city, invoices[1].address.city)
+        self.assertEqual(expected, [invoice.to_dict() for invoice in invoices])
+
+    def test_datetime_time_zones(self):
+        winter = datetime(2021, 2, 14, tzinfo=timezone(timedelta(hours=1)))
+        utc = winter.astimezone(timezone.utc)
+        self.assertIs(winter, self.interner.intern_datetime(winter))
+        self.assertIs(utc, self.interner.intern_datetime(utc))
+        self.assertIs(winter, self.interner.intern_datetime(winter.replace()))
+
+    def test_lazy_invoice_is_skipped(self):
+        invoice = Invoice(make_invoice(str(uuid.uuid4())), lazy=True)
+        self.interner.invoice(invoice)
+        self.assertEqual(0, len(self.interner))
+
+    def test_max_size(self):
+        interner = Interner(max_size=10)
+        interner.vouchers(VoucherList({'content': [make_voucher(i) for i in range(3)]}).content)
+        self.assertEqual(5, len(interner))
+        interner.invoice(Invoice(make_invoice(str(uuid.uuid4()))))
+        self.assertEqual(0, len(interner))
+
+    def test_concurrent_size_checks(self):
+        interner = Interner(max_size=50)
+        errors = []
+
+        def work(offset: int):
+            try:
+                for i in range(2000):
+                    # New time zones add tables while other threads count or clear them
+                    tz = timezone(timedelta(minutes=(offset * 2000 + i) % 1400))
+                    interner.intern_datetime(datetime(2021, 1, 1, tzinfo=tz))
+                    interner.intern(f'{offset}-{i}')
+                    interner._check_size()
+            except Exception as ex:
+                errors.append(ex)
+
+        threads = [threading.Thread(target=work, args=(offset,)) for offset in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        self.assertLessEqual(len(interner), 50)
+
+    def test_len_counts_distinct_values(self):
+        self.interner.intern('a')
+        self.interner.intern('a')
+        self.interner.intern(None)
+        self.interner.intern_datetime(datetime(2021, 1, 1, tzinfo=timezone.utc))
+        self.interner.intern_datetime(datetime(2021, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual(3, len(self.interner))
+        self.interner.clear()
+        self.assertEqual(0, len(self.interner))
+
+
+class TestClientInterning(unittest.TestCase):
+
+    def test_pages_share_values(self):
+        with StubServer(voucher_count=20) as server:
+            with LexofficeClient('key', base_url=server.url, rate_limit=None, interner=Interner()) as client:
+                first = client.get_voucherlist(VoucherType.INVOICE, page=0, size=10)
+                streamed = list(client.get_voucherlist(VoucherType.INVOICE, page=1, size=10, stream=True))
+        self.assertIs(first.content[0].contact_name, streamed[-1].contact_name)
+        self.assertIs(first.content[0].contact_id, streamed[-1].contact_id)
+
+    def test_decoders(self):
+        body = json.dumps({'content': [make_voucher(i) for i in range(4)]}).encode()
+        for name in ('json', 'msgspec'):
+            with self.subTest(name):
+                try:
+                    decoder = get_decoder(name)
+                except ImportError:
+                    continue
+                interner = Interner()
+                vouchers = decoder.voucherlist(body).content
+                interner.vouchers(vouchers)
+                self.assertEqual(1, len({id(voucher.contact_id) for voucher in vouchers}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import uuid
+
+from src.lexoffice.api import LexofficeClient
+from src.lexoffice.cache import InvoiceCache
+from src.lexoffice.datatypes import VoucherType
+from src.lexoffice.exceptions import LexofficeException
+from src.lexoffice.metrics import PrometheusObserver, RequestEvent, Histogram
+from src.lexoffice.ratelimit import RateLimiter
+from tests.stub_server import StubServer
+
+
+class TestRequestEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(voucher_count=5)
+        self.server.__enter__()
+        self.events = []
+        self.client = LexofficeClient('key', base_url=self.server.url, rate_limit=None,
+                                      observers=[self.events.append])
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__(None, None, None)
+
+    def test_events(self):
+        voucher_list = self.client.get_voucherlist(VoucherType.INVOICE, size=5)
+        self.client.get_invoice(voucher_list.content[0].id)
+        self.assertEqual(['/voucherlist', '/invoices/{id}'], [e.endpoint for e in self.events])
+        for event in self.events:
+            self.assertEqual(200, event.status)
+            self.assertGreater(event.bytes, 0)
+            self.assertGreater(event.network_time, 0)
+            self.assertGreater(event.parse_time, 0)
+            self.assertGreaterEqual(event.latency, event.network_time + event.parse_time)
+            self.assertEqual(0, event.retries)
+
+    def test_retries_and_rate_limit_wait(self):
+        self.client.rate_limiter = RateLimiter(rate=100, burst=1)
+        self.server.throttle(2, retry_after='0.05')
+        self.client.ping()
+        event = self.events[0]
+        self.assertEqual(2, event.retries)
+        self.assertEqual(200, event.status)
+        self.assertAlmostEqual(0.1, event.rate_limit_wait, delta=0.03)
+
+    def test_error(self):
+        with self.assertRaises(LexofficeException):
+            self.client.get_invoice(uuid.uuid4())
+        self.assertEqual(404, self.events[0].status)
+        self.assertIsInstance(self.events[0].error, LexofficeException)
+
+    def test_no_event_for_cache_hits(self):
+        self.client.cache = InvoiceCache()
+        invoice_id = uuid.UUID(self.server.httpd.vouchers[0]['id'])
+        self.client.get_invoice(invoice_id)
+        self.client.get_invoice(invoice_id)
+        self.assertEqual(1, len(self.events))
+
+
+class TestPrometheusObserver(unittest.TestCase):
+
+    def test_histogram_buckets(self):
+        histogram = Histogram('h', 'Help.', ('endpoint',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value, ('/ping',))
+        lines = list(histogram.render())
+        self.assertIn('h_bucket{endpoint="/ping",le="0.1"} 2', lines)
+        self.assertIn('h_bucket{endpoint="/ping",le="1.0"} 3', lines)
+        self.assertIn('h_bucket{endpoint="/ping",le="+Inf"} 4', lines)
+        self.assertIn('h_sum{endpoint="/ping"} 2.65', lines)
+        self.assertIn('h_count{endpoint="/ping"} 4', lines)
+
+    def test_render(self):
+        observer = PrometheusObserver()
+        with StubServer(voucher_count=2) as server, \
+                LexofficeClient('key', base_url=server.url, rate_limit=None, observers=[observer]) as client:
+            for voucher in server.httpd.vouchers:
+                client.get_invoice(uuid.UUID(voucher['id']))
+            self.assertRaises(LexofficeException, client.get_invoice, uuid.uuid4())
+        text = observer.render()
+        self.assertIn('# TYPE lexoffice_request_duration_seconds histogram', text)
+        self.assertIn('lexoffice_requests_total{endpoint="/invoices/{id}",status="200"} 2', text)
+        self.assertIn('lexoffice_requests_total{endpoint="/invoices/{id}",status="404"} 1', text)
+        self.assertIn('lexoffice_parse_seconds_count{endpoint="/invoices/{id}"} 3', text)
+        self.assertIn('lexoffice_errors_total{endpoint="/invoices/{id}",exception="LexofficeException"} 1', text)
+
+    def test_event_without_status(self):
+        observer = PrometheusObserver(prefix='test')
+        event = RequestEvent('/ping')
+        event.error = ConnectionError()
+        observer(event)
+        self.assertIn('test_requests_total{endpoint="/ping",status="None"} 1', observer.render())
+
+
+if __name__ == '__main__':
+    unittest.main()
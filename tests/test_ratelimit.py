@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+import unittest
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from src.lexoffice.api import LexofficeClient
+from src.lexoffice.ratelimit import RateLimiter, Priority, shared_rate_limiter, retry_after
+from tests.stub_server import StubServer
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_burst_is_not_delayed(self):
+        limiter = RateLimiter(rate=5, burst=3)
+        for _ in range(3):
+            self.assertEqual(0, limiter.acquire())
+        self.assertAlmostEqual(0.2, limiter.acquire(), delta=0.05)
+
+    def test_rate_is_enforced_across_threads(self):
+        limiter = RateLimiter(rate=20, burst=1)
+        start = time.monotonic()
+        threads = [threading.Thread(target=limiter.acquire) for _ in range(9)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - start, 0.35)
+        self.assertEqual(9, limiter.calls)
+        self.assertAlmostEqual(1.8, limiter.waited, delta=0.1)
+        self.assertAlmostEqual(0.2, limiter.average_wait, delta=0.01)
+
+    def test_block(self):
+        limiter = RateLimiter(rate=100, burst=5)
+        limiter.block(0.2)
+        self.assertAlmostEqual(0.2, limiter.acquire(), delta=0.05)
+        self.assertEqual(1, limiter.throttled)
+
+    def test_shared_per_api_key(self):
+        self.assertIs(shared_rate_limiter('key-a'), shared_rate_limiter('key-a'))
+        self.assertIsNot(shared_rate_limiter('key-a'), shared_rate_limiter('key-b'))
+
+
+class TestPriorities(unittest.TestCase):
+
+    def wait_for_queue(self, limiter: RateLimiter, count: int):
+        while sum(stats.queued for stats in limiter.stats.values()) < count:
+            time.sleep(0.001)
+
+    def test_interactive_preempts_queued_background(self):
+        limiter = RateLimiter(rate=20, burst=1)
+        limiter.acquire()
+        order = []
+
+        def call(priority: Priority, name: str):
+            limiter.acquire(priority)
+            order.append(name)
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            for i in range(4):
+                executor.submit(call, Priority.BACKGROUND, f'background-{i}')
+            self.wait_for_queue(limiter, 4)
+            executor.submit(call, Priority.NORMAL, 'normal')
+            executor.submit(call, Priority.INTERACTIVE, 'interactive')
+            self.wait_for_queue(limiter, 6)
+            self.assertEqual(4, limiter.stats[Priority.BACKGROUND].queued)
+        # The first background call may have taken the token before the others arrived
+        self.assertIn(order.index('interactive'), (0, 1))
+        self.assertEqual(order.index('interactive') + 1, order.index('normal'))
+        self.assertEqual([f'background-{i}' for i in range(4)], [name for name in order if 'background' in name])
+
+    def test_stats(self):
+        limiter = RateLimiter(rate=50, burst=1)
+        self.assertEqual(0, limiter.acquire(Priority.INTERACTIVE))
+        self.assertAlmostEqual(0.02, limiter.acquire(Priority.BACKGROUND), delta=0.01)
+        interactive, background = limiter.stats[Priority.INTERACTIVE], limiter.stats[Priority.BACKGROUND]
+        self.assertEqual((1, 0, 1), (interactive.calls, interactive.queued, interactive.max_queued))
+        self.assertEqual(0, interactive.max_wait)
+        self.assertEqual(background.waited, background.max_wait)
+        self.assertEqual(0, limiter.stats[Priority.NORMAL].calls)
+        self.assertEqual(2, limiter.calls)
+        report = limiter.report().splitlines()
+        self.assertEqual(3, len(report))
+        self.assertTrue(report[0].startswith('interactive'))
+        self.assertIn('1 calls', report[2])
+
+    def test_async(self):
+        limiter = RateLimiter(rate=20, burst=1)
+        order = []
+
+        async def call(priority: Priority, name: str):
+            await limiter.acquire_async(priority)
+            order.append(name)
+
+        async def run():
+            await limiter.acquire_async()
+            background = [asyncio.ensure_future(call(Priority.BACKGROUND, f'background-{i}')) for i in range(3)]
+            await asyncio.sleep(0)
+            cancelled = asyncio.ensure_future(call(Priority.INTERACTIVE, 'cancelled'))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            await asyncio.gather(call(Priority.INTERACTIVE, 'interactive'), *background)
+
+        asyncio.run(run())
+        self.assertEqual(['interactive', 'background-0', 'background-1', 'background-2'], order)
+        self.assertEqual(0, sum(stats.queued for stats in limiter.stats.values()))
+
+    def test_client(self):
+        with StubServer(voucher_count=10) as server:
+            ids = [uuid.UUID(voucher['id']) for voucher in server.httpd.vouchers]
+            client = LexofficeClient('key', base_url=server.url, rate_limiter=RateLimiter(rate=20, burst=1))
+            with client:
+                results = client.get_invoices(ids[:8], max_workers=4, priority=Priority.BACKGROUND)
+                next(results)
+                self.wait_for_queue(client.rate_limiter, 3)
+                start = time.monotonic()
+                client.get_invoice(ids[9], priority=Priority.INTERACTIVE)
+                latency = time.monotonic() - start
+                self.assertEqual(7, len(list(results)))
+            stats = client.rate_limiter.stats
+            self.assertEqual((8, 1), (stats[Priority.BACKGROUND].calls, stats[Priority.INTERACTIVE].calls))
+            self.assertLess(latency, 0.1)
+            self.assertLess(stats[Priority.INTERACTIVE].max_wait, stats[Priority.BACKGROUND].max_wait)
+
+
+class TestRetryAfter(unittest.TestCase):
+
+    def test_seconds(self):
+        self.assertEqual(3, retry_after('3', default=1))
+
+    def test_http_date(self):
+        date = datetime.now(timezone.utc) + timedelta(seconds=30)
+        self.assertAlmostEqual(30, retry_after(format_datetime(date, usegmt=True), default=1), delta=1.5)
+
+    def test_missing_or_invalid(self):
+        self.assertEqual(1, retry_after(None, default=1))
+        self.assertEqual(1, retry_after('soon', default=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+import asyncio
+import threading
+import time
+import unittest
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from src.lexoffice.api import LexofficeClient
+from src.lexoffice.datatypes import VoucherType
+from src.lexoffice.exceptions import LexofficeException
+from src.lexoffice.ratelimit import RateLimiter, Priority
+from src.lexoffice.singleflight import SingleFlight, AsyncSingleFlight
+from tests.stub_server import StubServer
+
+try:
+    from src.lexoffice.aio import AsyncLexofficeClient
+except ImportError:
+    AsyncLexofficeClient = None
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.single_flight = SingleFlight()
+        self.release = threading.Event()
+        self.runs = 0
+
+    def slow(self, value):
+        self.runs += 1
+        self.release.wait(5)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def run_concurrently(self, keys: list, value) -> list:
+        with ThreadPoolExecutor(max_workers=len(keys)) as executor:
+            futures = [executor.submit(self.single_flight.do, key, self.slow, value) for key in keys]
+            while self.single_flight.calls + self.single_flight.coalesced < len(keys):
+                threading.Event().wait(0.01)
+            self.release.set()
+            return [future.exception() or future.result() for future in futures]
+
+    def test_coalesce(self):
+        result = object()
+        self.assertEqual([result] * 5, self.run_concurrently(['a'] * 5, result))
+        self.assertEqual(1, self.runs)
+        self.assertEqual((1, 4), (self.single_flight.calls, self.single_flight.coalesced))
+
+    def test_different_keys(self):
+        self.run_concurrently(['a', 'b', 'a'], 1)
+        self.assertEqual(2, self.runs)
+        self.assertEqual(1, self.single_flight.coalesced)
+
+    def test_error_is_shared(self):
+        error = ValueError('failed')
+        self.assertEqual([error] * 3, self.run_concurrently(['a'] * 3, error))
+        self.assertEqual(1, self.runs)
+
+    def test_sequential_calls_are_not_coalesced(self):
+        self.release.set()
+        self.single_flight.do('a', self.slow, 1)
+        self.single_flight.do('a', self.slow, 1)
+        self.assertEqual(2, self.runs)
+
+
+class TestAsyncSingleFlight(unittest.IsolatedAsyncioTestCase):
+
+    async def test_coalesce(self):
+        single_flight = AsyncSingleFlight()
+        runs = []
+
+        async def slow(value):
+            runs.append(value)
+            await asyncio.sleep(0.05)
+            return value
+
+        results = await asyncio.gather(*[single_flight.do('a', slow, 1) for _ in range(5)],
+                                       single_flight.do('b', slow, 2))
+        self.assertEqual([1] * 5 + [2], results)
+        self.assertEqual([1, 2], runs)
+        self.assertEqual((2, 4), (single_flight.calls, single_flight.coalesced))
+        self.assertEqual(1, await single_flight.do('a', slow, 1))
+        self.assertEqual(3, single_flight.calls)
+
+    async def test_cancelled_caller(self):
+        single_flight = AsyncSingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return 'done'
+
+        first = asyncio.ensure_future(single_flight.do('a', slow))
+        second = asyncio.ensure_future(single_flight.do('a', slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.assertEqual('done', await second)
+
+
+class TestClientSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(voucher_count=5, latency=0.1)
+        self.server.__enter__()
+        self.client = LexofficeClient('key', base_url=self.server.url, rate_limit=None, single_flight=True)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__(None, None, None)
+
+    def concurrently(self, function, *args, count: int = 8) -> list:
+        barrier = threading.Barrier(count)
+
+        def call():
+            barrier.wait()
+            return function(*args)
+
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            return list(executor.map(lambda _: call(), range(count)))
+
+    def test_same_invoice(self):
+        invoice_id = uuid.UUID(self.server.httpd.vouchers[0]['id'])
+        invoices = self.concurrently(self.client.get_invoice, invoice_id)
+        self.assertTrue(all(invoice is invoices[0] for invoice in invoices))
+        self.assertEqual(1, self.server.requests)
+        self.assertEqual(7, self.client.single_flight.coalesced)
+
+    def test_same_voucherlist(self):
+        pages = self.concurrently(self.client.get_voucherlist, VoucherType.INVOICE, None, 0, 5)
+        self.assertEqual(5, len(pages[0].content))
+        self.assertEqual(1, self.server.requests)
+
+    def test_error(self):
+        results = self.concurrently(lambda: self._error(uuid.UUID(int=99)), count=4)
+        self.assertTrue(all(isinstance(result, LexofficeException) for result in results))
+        self.assertEqual(1, self.server.requests)
+
+    def test_interactive_does_not_join_background_flight(self):
+        limiter = RateLimiter(rate=5, burst=1)
+        invoice_id = uuid.UUID(self.server.httpd.vouchers[0]['id'])
+        finished = {}
+
+        def get(priority: Priority):
+            client.get_invoice(invoice_id, priority=priority)
+            finished[priority] = time.monotonic()
+
+        with LexofficeClient('key', base_url=self.server.url, rate_limiter=limiter, single_flight=True) as client:
+            limiter.acquire()
+            background = threading.Thread(target=get, args=(Priority.BACKGROUND,))
+            background.start()
+            while limiter.stats[Priority.BACKGROUND].queued == 0:
+                time.sleep(0.001)
+            get(Priority.INTERACTIVE)
+            background.join()
+            self.assertEqual(0, client.single_flight.coalesced)
+        # The interactive request got the next token ahead of the queued background flight
+        self.assertLess(finished[Priority.INTERACTIVE], finished[Priority.BACKGROUND])
+        self.assertEqual(2, self.server.requests)
+
+    def _error(self, invoice_id: uuid.UUID):
+        try:
+            self.client.get_invoice(invoice_id)
+        except LexofficeException as ex:
+            return ex
+
+
+@unittest.skipIf(AsyncLexofficeClient is None, 'aiohttp is not installed')
+class TestAsyncClientSingleFlight(unittest.IsolatedAsyncioTestCase):
+
+    async def test_same_invoice(self):
+        with StubServer(voucher_count=2, latency=0.05) as server:
+            invoice_id = uuid.UUID(server.httpd.vouchers[0]['id'])
+            async with AsyncLexofficeClient('key', base_url=server.url, rate_limit=None,
+                                            single_flight=True) as client:
+                invoices = await asyncio.gather(*[client.get_invoice(invoice_id) for _ in range(6)])
+                self.assertEqual(5, client.single_flight.coalesced)
+            self.assertEqual(1, server.requests)
+        self.assertTrue(all(invoice is invoices[0] for invoice in invoices))
+
+
+if __name__ == '__main__':
+    unittest.main()
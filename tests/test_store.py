@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+import uuid
+from datetime import datetime
+
+from src.lexoffice.datatypes import Voucher, Invoice, VoucherStatus, VoucherType
+from src.lexoffice.store import LocalStore
+from tests.stub_server import make_voucher, make_invoice
+
+
+class TestLocalStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = LocalStore()
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_voucher_roundtrip(self):
+        voucher = Voucher(make_voucher(1))
+        self.store.put_voucher(voucher)
+        stored = self.store.get_voucher(voucher.id)
+        self.assertEqual(voucher.to_dict(), stored.to_dict())
+        self.assertIsNone(self.store.get_voucher(uuid.uuid4()))
+
+    def test_invoice_roundtrip(self):
+        invoice = Invoice(make_invoice(str(uuid.uuid4()), version=3))
+        self.store.put_invoice(invoice)
+        stored = self.store.get_invoice(invoice.id)
+        self.assertEqual(invoice.to_dict(), stored.to_dict())
+        self.assertEqual(79112, stored.address.zip)
+        self.assertEqual(13.4, stored.line_items[0].unit_price.net_amount)
+        self.assertEqual(15.95, stored.total_price.total_gross_amount)
+        self.assertEqual(1, len(list(self.store.invoices(contact_id=invoice.address.contact_id))))
+        self.store.delete_invoice(invoice.id)
+        self.assertIsNone(self.store.get_invoice(invoice.id))
+
+    def test_query_vouchers(self):
+        dicts = [make_voucher(i) for i in range(6)]
+        dicts[0]['voucherStatus'] = 'paid'
+        dicts[1]['contactId'] = None
+        dicts[2]['dueDate'] = '2021-01-01T00:00:00.000+01:00'
+        dicts[3]['updatedDate'] = '2022-01-01T00:00:00.000+01:00'
+        self.store.put_vouchers(Voucher(d) for d in dicts)
+        self.assertEqual(6, len(list(self.store.vouchers(voucher_type=VoucherType.INVOICE))))
+        self.assertEqual(1, len(list(self.store.vouchers(status=[VoucherStatus.PAID]))))
+        self.assertEqual(5, len(list(self.store.vouchers(status=[VoucherStatus.OPEN, VoucherStatus.OVERDUE]))))
+        self.assertEqual(5, len(list(self.store.vouchers(contact_id=dicts[0]['contactId']))))
+        due = list(self.store.vouchers(due_before=datetime.fromisoformat('2021-06-01T00:00:00+00:00')))
+        self.assertEqual([dicts[2]['id']], [str(v.id) for v in due])
+        updated = list(self.store.vouchers(updated_since=datetime.fromisoformat('2021-12-01T00:00:00+00:00')))
+        self.assertEqual([dicts[3]['id']], [str(v.id) for v in updated])
+
+    def test_persisted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'lexoffice.db')
+            voucher = Voucher(make_voucher(1))
+            with LocalStore(path) as store:
+                store.put_voucher(voucher)
+            with LocalStore(path) as store:
+                self.assertEqual(voucher.id, store.get_voucher(voucher.id).id)
+
+
+if __name__ == '__main__':
+    unittest.main()
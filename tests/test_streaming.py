@@ -0,0 +1,129 @@
+import json
+import unittest
+
+from requests.exceptions import RequestException
+from src.lexoffice.api import LexofficeClient
+from src.lexoffice.datatypes import VoucherType, VoucherStatus
+from src.lexoffice.store import LocalStore
+from src.lexoffice.streaming import VoucherListParser
+from tests.stub_server import StubServer, make_voucher
+
+try:
+    from src.lexoffice.aio import AsyncLexofficeClient
+except ImportError:
+    AsyncLexofficeClient = None
+
+
+class TestVoucherListParser(unittest.TestCase):
+
+    def setUp(self):
+        vouchers = [make_voucher(i) for i in range(5)]
+        vouchers[0]['contactName'] = 'Müller, Jürgen'
+        vouchers[1]['totalAmount'] = 1234
+        self.page = {'first': True, 'content': vouchers, 'last': True, 'totalPages': 1, 'totalElements': 5,
+                     'numberOfElements': 5, 'size': 25, 'number': 0, 'sort': [{'property': 'voucherdate'}]}
+        self.metadata = {key: value for key, value in self.page.items() if key != 'content'}
+
+    def parse(self, body: bytes, chunk_size: int) -> tuple[list, VoucherListParser]:
+        parser = VoucherListParser()
+        vouchers = []
+        for i in range(0, len(body), chunk_size):
+            vouchers += parser.feed(body[i:i + chunk_size])
+        vouchers += parser.close()
+        return vouchers, parser
+
+    def test_chunk_sizes(self):
+        body = json.dumps(self.page, indent=2, ensure_ascii=False).encode()
+        for chunk_size in (1, 2, 7, 64, len(body)):
+            with self.subTest(chunk_size=chunk_size):
+                vouchers, parser = self.parse(body, chunk_size)
+                self.assertEqual(self.page['content'], vouchers)
+                self.assertEqual(self.metadata, parser.metadata)
+                self.assertTrue(parser.done)
+
+    def test_vouchers_before_end_of_page(self):
+        body = json.dumps(self.page).encode()
+        parser = VoucherListParser()
+        first_voucher = body.index(b'}', body.index(b'"content"')) + 1
+        self.assertEqual([self.page['content'][0]], parser.feed(body[:first_voucher + 1]))
+        self.assertFalse(parser.done)
+
+    def test_empty_content(self):
+        self.page['content'] = []
+        vouchers, parser = self.parse(json.dumps(self.page).encode(), 3)
+        self.assertEqual([], vouchers)
+        self.assertEqual(self.metadata, parser.metadata)
+
+    def test_incomplete_body(self):
+        body = json.dumps(self.page).encode()
+        with self.assertRaises(ValueError):
+            self.parse(body[:-20], 16)
+
+
+class TestStreamingVoucherList(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(voucher_count=60)
+        self.server.__enter__()
+        self.events = []
+        self.client = LexofficeClient('key', base_url=self.server.url, rate_limit=None,
+                                      observers=[self.events.append])
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__(None, None, None)
+
+    def test_stream(self):
+        expected = self.client.get_voucherlist(VoucherType.INVOICE, page=1, size=25)
+        stream = self.client.get_voucherlist(VoucherType.INVOICE, page=1, size=25, stream=True)
+        self.assertIsNone(stream.total_pages)
+        vouchers = list(stream)
+        self.assertEqual([v.to_dict() for v in expected.content], [v.to_dict() for v in vouchers])
+        self.assertTrue(stream.complete)
+        self.assertEqual((3, 60, 25, False), (stream.total_pages, stream.total_elements, stream.size, stream.last))
+        self.assertEqual(self.events[0].bytes, self.events[1].bytes)
+        self.assertGreater(self.events[1].parse_time, 0)
+
+    def test_close_early(self):
+        stream = self.client.get_voucherlist(VoucherType.INVOICE, size=50, stream=True)
+        self.assertEqual(make_voucher(0)['id'], str(next(iter(stream)).id))
+        stream.close()
+        self.assertFalse(stream.complete)
+        self.assertEqual(1, len(self.events))
+        self.assertEqual(1, len(self.client.get_voucherlist(VoucherType.INVOICE, size=1).content))
+
+    def test_error(self):
+        self.server.fail(1, status=500)
+        stream = self.client.get_voucherlist(VoucherType.INVOICE, stream=True)
+        with self.assertRaises(RequestException):
+            list(stream)
+        self.assertIsInstance(self.events[0].error, RequestException)
+
+    def test_store(self):
+        self.client.store = LocalStore()
+        list(self.client.get_voucherlist(VoucherType.INVOICE, status=[VoucherStatus.OPEN], size=25, stream=True))
+        self.assertEqual(25, len(list(self.client.store.vouchers())))
+
+
+@unittest.skipIf(AsyncLexofficeClient is None, 'aiohttp is not installed')
+class TestAsyncStreamingVoucherList(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.server = StubServer(voucher_count=30)
+        self.server.__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    async def test_stream(self):
+        async with AsyncLexofficeClient('key', base_url=self.server.url, rate_limit=None) as client:
+            expected = await client.get_voucherlist(VoucherType.INVOICE, size=20)
+            stream = await client.get_voucherlist(VoucherType.INVOICE, size=20, stream=True)
+            vouchers = [voucher async for voucher in stream]
+        self.assertEqual([v.id for v in expected.content], [v.id for v in vouchers])
+        self.assertEqual(2, stream.total_pages)
+        self.assertFalse(stream.last)
+
+
+if __name__ == '__main__':
+    unittest.main()
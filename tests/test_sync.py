@@ -0,0 +1,95 @@
+import unittest
+import uuid
+
+from src.lexoffice.api import LexofficeClient
+from src.lexoffice.store import LocalStore
+from src.lexoffice.sync import SyncEngine
+from tests.stub_server import StubServer
+
+
+class TestSyncEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(voucher_count=12)
+        self.server.__enter__()
+        for i, voucher in enumerate(self.server.httpd.vouchers):
+            voucher['updatedDate'] = f'2021-03-{i + 1:02d}T12:00:00.000+01:00'
+        self.client = LexofficeClient('key', base_url=self.server.url, rate_limit=None)
+        self.store = LocalStore()
+        self.engine = SyncEngine(self.client, self.store)
+
+    def tearDown(self):
+        self.store.close()
+        self.client.close()
+        self.server.__exit__(None, None, None)
+
+    def update(self, index: int, day: int):
+        voucher = self.server.httpd.vouchers[index]
+        voucher['updatedDate'] = f'2021-04-{day:02d}T12:00:00.000+01:00'
+        self.server.httpd.invoices[voucher['id']]['updatedDate'] = voucher['updatedDate']
+        self.server.httpd.invoices[voucher['id']]['version'] += 1
+
+    def test_initial_sync(self):
+        result = self.engine.sync()
+        self.assertEqual(12, len(result.added))
+        self.assertEqual([], result.changed)
+        self.assertEqual(12, len(list(self.store.vouchers())))
+        self.assertEqual(12, len(list(self.store.invoices())))
+        self.assertEqual(self.store.get_watermark(self.engine.name), result.watermark)
+
+    def test_incremental_sync(self):
+        self.engine.sync()
+        requests = self.server.requests
+        result = self.engine.sync()
+        self.assertEqual(([], [], []), (result.added, result.changed, result.removed))
+        # Only the first page is requested and no invoices
+        self.assertEqual(requests + 1, self.server.requests)
+
+        self.update(3, day=1)
+        self.update(7, day=2)
+        requests = self.server.requests
+        result = self.engine.sync()
+        changed = [uuid.UUID(self.server.httpd.vouchers[i]['id']) for i in (7, 3)]
+        self.assertEqual(changed, result.changed)
+        self.assertEqual(requests + 3, self.server.requests)
+        self.assertEqual(1, self.store.get_invoice(changed[0]).version)
+
+    def test_new_voucher(self):
+        self.engine.sync()
+        self.server.httpd.vouchers.append(dict(self.server.httpd.vouchers[0], id=str(uuid.uuid4()),
+                                               updatedDate='2021-05-01T12:00:00.000+01:00'))
+        new_id = self.server.httpd.vouchers[-1]['id']
+        self.server.httpd.invoices[new_id] = dict(self.server.httpd.invoices[self.server.httpd.vouchers[0]['id']],
+                                                  id=new_id)
+        result = self.engine.sync()
+        self.assertEqual([uuid.UUID(new_id)], result.added)
+        self.assertIsNotNone(self.store.get_invoice(new_id))
+
+    def test_full_sync_reports_removed(self):
+        self.engine.sync()
+        removed = self.server.httpd.vouchers.pop(5)
+        result = self.engine.sync(full=True)
+        self.assertEqual([uuid.UUID(removed['id'])], result.removed)
+        self.assertIsNone(self.store.get_voucher(removed['id']))
+        self.assertIsNone(self.store.get_invoice(removed['id']))
+
+    def test_failed_invoice_keeps_watermark(self):
+        self.engine.sync()
+        watermark = self.store.get_watermark(self.engine.name)
+        self.update(2, day=3)
+        invoice_id = self.server.httpd.vouchers[2]['id']
+        invoice = self.server.httpd.invoices.pop(invoice_id)
+        result = self.engine.sync()
+        self.assertEqual(1, len(result.failed))
+        self.assertEqual(watermark, self.store.get_watermark(self.engine.name))
+        # The voucher is stored already, the invoice is still fetched again by the next run
+        self.server.httpd.invoices[invoice_id] = invoice
+        result = self.engine.sync()
+        self.assertEqual(({}, []), (result.failed, result.changed))
+        self.assertEqual(1, self.store.get_invoice(uuid.UUID(invoice_id)).version)
+        self.assertEqual({}, self.store.get_pending_invoices(self.engine.name))
+        self.assertLess(watermark, self.store.get_watermark(self.engine.name))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import threading
+import time
+import unittest
+import uuid
+
+from src.lexoffice.api import LexofficeClient
+from src.lexoffice.datatypes import VoucherType
+from src.lexoffice.tenants import TenantPool
+from tests.stub_server import StubServer
+
+
+class TestTenantPool(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(voucher_count=5)
+        self.server.__enter__()
+        self.invoice_id = uuid.UUID(self.server.httpd.vouchers[0]['id'])
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_clients_share_connections(self):
+        with TenantPool(base_url=self.server.url, rate_limit=None) as pool:
+            self.assertEqual(0, len(pool))
+            first, second = pool.client('a'), pool.client('b')
+            self.assertIs(first, pool.client('a'))
+            self.assertEqual('Bearer b', second.headers['Authorization'])
+            first.get_invoice(self.invoice_id)
+            second.get_invoice(self.invoice_id)
+            first.get_voucherlist(VoucherType.INVOICE, size=2)
+            self.assertEqual(2, len(pool))
+        self.assertEqual(3, self.server.requests)
+        self.assertEqual(1, self.server.connections)
+
+    def test_rate_budget_per_tenant(self):
+        with TenantPool(base_url=self.server.url, rate_limit=1000, burst=5) as pool:
+            first, second = pool.client('a'), pool.client('b')
+            self.assertIsNot(first.rate_limiter, second.rate_limiter)
+            self.assertEqual(5, first.rate_limiter.burst)
+
+    def test_submit(self):
+        with TenantPool(base_url=self.server.url, rate_limit=None) as pool:
+            invoice = pool.submit('a', LexofficeClient.get_invoice, self.invoice_id).result(5)
+            self.assertEqual(self.invoice_id, invoice.id)
+            failed = pool.submit('a', LexofficeClient.get_invoice, uuid.UUID(int=99))
+            self.assertIsNotNone(failed.exception(5))
+            self.assertEqual({'submitted': 2, 'completed': 2, 'queued': 0, 'in_flight': 0}, pool.stats()['a'])
+        with self.assertRaises(RuntimeError):
+            pool.submit('a', LexofficeClient.get_invoice, self.invoice_id)
+
+    def test_fair_scheduling(self):
+        release = threading.Event()
+        order = []
+
+        def call(client, i):
+            release.wait(5)
+            order.append((client.api_key, i))
+
+        with TenantPool(base_url=self.server.url, max_workers=1) as pool:
+            futures = [pool.submit('bulk', call, i) for i in range(20)]
+            futures += [pool.submit('small', call, i) for i in range(2)]
+            release.set()
+        self.assertTrue(all(future.done() for future in futures))
+        self.assertEqual(22, len(order))
+        self.assertEqual([('bulk', i) for i in range(20)], [item for item in order if item[0] == 'bulk'])
+        self.assertLessEqual(order.index(('small', 1)), 4)
+
+    def test_max_in_flight(self):
+        running = {'bulk': 0, 'small': 0}
+        peak = dict(running)
+        lock = threading.Lock()
+
+        def call(client):
+            with lock:
+                running[client.api_key] += 1
+                peak[client.api_key] = max(peak[client.api_key], running[client.api_key])
+            time.sleep(0.01)
+            with lock:
+                running[client.api_key] -= 1
+
+        with TenantPool(base_url=self.server.url, max_workers=4, max_in_flight=2) as pool:
+            futures = [pool.submit('bulk', call) for _ in range(20)] + [pool.submit('small', call)]
+            small = futures[-1]
+            small.result(5)
+            self.assertFalse(all(future.done() for future in futures[:-1]))
+        self.assertEqual(2, peak['bulk'])
+
+    def test_idle_eviction(self):
+        with TenantPool(base_url=self.server.url, idle_timeout=0.05) as pool:
+            client = pool.client('a')
+            pool.client('b')
+            time.sleep(0.1)
+            pool.client('b')
+            self.assertNotIn('a', pool)
+            self.assertIn('b', pool)
+            self.assertEqual(1, pool.evicted)
+            self.assertIsNot(client, pool.client('a'))
+            time.sleep(0.1)
+            self.assertEqual(2, pool.evict_idle())
+            self.assertEqual(0, len(pool))
+
+    def test_max_tenants(self):
+        with TenantPool(base_url=self.server.url, max_tenants=2, idle_timeout=None) as pool:
+            for api_key in ('a', 'b', 'a', 'c'):
+                pool.client(api_key)
+            self.assertEqual(2, len(pool))
+            self.assertNotIn('b', pool)
+
+    def test_busy_tenants_are_kept(self):
+        release = threading.Event()
+        with TenantPool(base_url=self.server.url, max_tenants=1, idle_timeout=None) as pool:
+            future = pool.submit('a', lambda client: release.wait(5))
+            pool.client('b')
+            self.assertIn('a', pool)
+            self.assertIn('b', pool)
+            release.set()
+            future.result(5)
+            pool.client('c')
+            self.assertEqual(1, len(pool))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,227 @@
+import importlib.util
+import json
+import threading
+import unittest
+import uuid
+from datetime import datetime, timedelta
+
+import requests
+
+from src.lexoffice.api import LexofficeClient
+from src.lexoffice.cache import InvoiceCache
+from src.lexoffice.datatypes import Event, VoucherStatus
+from src.lexoffice.exceptions import LexofficeException
+from src.lexoffice.store import LocalStore
+from src.lexoffice.sync import SyncEngine
+from src.lexoffice.webhooks import EventDispatcher, WebhookReceiver, MAX_BODY_SIZE, subscribe
+from tests.stub_server import StubServer, make_event, post_event
+
+HAS_CRYPTOGRAPHY = importlib.util.find_spec('cryptography') is not None
+
+
+class TestEventSubscriptions(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer()
+        self.server.__enter__()
+        self.client = LexofficeClient('key', base_url=self.server.url, rate_limit=None)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__(None, None, None)
+
+    def test_create_get_delete(self):
+        subscription_id = self.client.create_event_subscription('invoice.changed', 'https://example.org/hook')
+        subscription = self.client.get_event_subscription(subscription_id)
+        self.assertEqual(('invoice.changed', 'https://example.org/hook'),
+                         (subscription.event_type, subscription.callback_url))
+        self.assertEqual([subscription_id], [s.subscription_id for s in self.client.get_event_subscriptions()])
+        self.assertTrue(self.client.delete_event_subscription(subscription_id))
+        self.assertFalse(self.client.delete_event_subscription(subscription_id))
+        self.assertEqual([], self.client.get_event_subscriptions())
+        with self.assertRaises(LexofficeException):
+            self.client.get_event_subscription(subscription_id)
+
+    def test_subscribe_creates_missing_subscriptions(self):
+        first = subscribe(self.client, 'https://example.org/hook', ['invoice.changed'])
+        both = subscribe(self.client, 'https://example.org/hook', ['invoice.changed', 'invoice.deleted'])
+        self.assertEqual(first['invoice.changed'], both['invoice.changed'])
+        self.assertEqual(2, len(self.client.get_event_subscriptions()))
+        with self.assertRaises(LexofficeException):
+            self.client.create_event_subscription('invoice.changed', 'https://example.org/hook')
+
+
+class TestWebhookReceiver(unittest.TestCase):
+
+    def setUp(self):
+        self.batches = []
+        self.receiver = WebhookReceiver(self.batches.append, verify=False, path='/events')
+        self.receiver.start()
+        self.event = make_event('invoice.changed', str(uuid.uuid4()))
+
+    def tearDown(self):
+        self.receiver.close()
+
+    def test_events_are_handled(self):
+        self.assertEqual(200, post_event(self.receiver.url, self.event))
+        self.assertTrue(self.receiver.flush(5))
+        self.assertEqual(1, len(self.batches))
+        event = self.batches[0][0]
+        self.assertIsInstance(event, Event)
+        self.assertEqual(('invoice', uuid.UUID(self.event['resourceId'])), (event.resource_type, event.resource_id))
+        self.assertEqual(Event(self.event).to_dict(), event.to_dict())
+
+    def test_invalid_requests(self):
+        base = self.receiver.url.rsplit('/', 1)[0]
+        self.assertEqual(404, post_event(base + '/other', self.event))
+        self.assertEqual(400, post_event(self.receiver.url, self.event, body=b'{"eventType": '))
+        self.assertEqual(400, post_event(self.receiver.url, self.event, body=b'[]'))
+        self.assertEqual(400, post_event(self.receiver.url, self.event, body=json.dumps(
+            dict(self.event, resourceId='no-uuid')).encode()))
+        self.assertEqual(413, post_event(self.receiver.url, self.event, body=b' ' * (MAX_BODY_SIZE + 1)))
+        self.assertEqual(4, self.receiver.rejected)
+        self.assertEqual(0, self.receiver.received)
+
+    def test_burst_is_batched(self):
+        self.receiver.close()
+        self.receiver = WebhookReceiver(self.batches.append, verify=False, batch_delay=0.3, max_batch=4)
+        self.receiver.start()
+        for _ in range(6):
+            post_event(self.receiver.url, self.event)
+        self.assertTrue(self.receiver.flush(5))
+        self.assertEqual([4, 2], [len(batch) for batch in self.batches])
+
+    def test_handler_error_is_counted(self):
+        def fail(events):
+            raise RuntimeError('refetch failed')
+        self.receiver.handler = fail
+        post_event(self.receiver.url, self.event)
+        self.receiver.flush(5)
+        self.assertEqual(1, self.receiver.errors)
+        self.assertIsInstance(self.receiver.last_error, RuntimeError)
+        self.receiver.handler = self.batches.append
+        post_event(self.receiver.url, self.event)
+        self.receiver.flush(5)
+        self.assertEqual(1, len(self.batches))
+
+    def test_close_without_start(self):
+        receiver = WebhookReceiver(self.batches.append, verify=False)
+        closer = threading.Thread(target=receiver.close, daemon=True)
+        closer.start()
+        closer.join(5)
+        self.assertFalse(closer.is_alive())
+
+    def test_public_key_is_required(self):
+        with self.assertRaises(ValueError):
+            WebhookReceiver(self.batches.append)
+
+
+@unittest.skipUnless(HAS_CRYPTOGRAPHY, 'cryptography is not installed')
+class TestSignatures(unittest.TestCase):
+
+    def setUp(self):
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        self.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        pem = self.private_key.public_key().public_bytes(serialization.Encoding.PEM,
+                                                         serialization.PublicFormat.SubjectPublicKeyInfo)
+        self.batches = []
+        self.receiver = WebhookReceiver(self.batches.append, public_key=pem)
+        self.receiver.start()
+        self.event = make_event('invoice.deleted', str(uuid.uuid4()))
+
+    def tearDown(self):
+        self.receiver.close()
+
+    def test_signed_event_is_accepted(self):
+        self.assertEqual(200, post_event(self.receiver.url, self.event, self.private_key))
+        self.receiver.flush(5)
+        self.assertEqual(1, len(self.batches))
+
+    def test_unsigned_and_tampered_events_are_rejected(self):
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        tampered = json.dumps(dict(self.event, resourceId=str(uuid.uuid4()))).encode()
+        other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.assertEqual(401, post_event(self.receiver.url, self.event))
+        self.assertEqual(401, post_event(self.receiver.url, self.event, self.private_key, body=tampered))
+        self.assertEqual(401, post_event(self.receiver.url, self.event, other_key))
+        self.assertEqual(401, requests.post(self.receiver.url, json=self.event,
+                                            headers={'X-Lxo-Signature': 'not base64!'}).status_code)
+        self.assertEqual(4, self.receiver.rejected)
+        self.assertEqual([], self.batches)
+
+
+class TestEventDispatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(voucher_count=5)
+        self.server.__enter__()
+        self.store = LocalStore()
+        self.client = LexofficeClient('key', base_url=self.server.url, rate_limit=None, cache=InvoiceCache(),
+                                      store=self.store)
+        self.engine = SyncEngine(self.client, self.store)
+        self.engine.sync()
+        self.dispatcher = EventDispatcher(self.client, sync_engines=[self.engine])
+        self.receiver = WebhookReceiver(self.dispatcher, verify=False)
+        self.receiver.start()
+        subscribe(self.client, self.receiver.url, ['invoice.changed', 'invoice.deleted', 'invoice.status.changed'])
+        self.voucher = self.server.httpd.vouchers[2]
+        self.invoice_id = uuid.UUID(self.voucher['id'])
+
+    def tearDown(self):
+        self.receiver.close()
+        self.client.close()
+        self.store.close()
+        self.server.__exit__(None, None, None)
+
+    def change_invoice(self):
+        invoice = self.server.httpd.invoices[self.voucher['id']]
+        invoice['version'] += 1
+        invoice['voucherStatus'] = 'paid'
+        self.voucher['voucherStatus'] = 'paid'
+        self.voucher['updatedDate'] = (datetime.fromisoformat(self.voucher['updatedDate'])
+                                       + timedelta(days=1)).isoformat(timespec='milliseconds')
+
+    def test_changed_invoice_is_refetched_once(self):
+        self.assertEqual(0, self.client.get_invoice(self.invoice_id).version)
+        self.change_invoice()
+        self.receiver.batch_delay = 0.3
+        for _ in range(3):
+            self.assertEqual([200], self.server.emit('invoice.changed', self.voucher['id']))
+        self.assertTrue(self.receiver.flush(5))
+        self.assertEqual((3, 1, 1), (self.dispatcher.events, self.dispatcher.refetched, self.dispatcher.syncs))
+        requests_before = self.server.requests
+        self.assertEqual(1, self.client.get_invoice(self.invoice_id).version)
+        self.assertEqual(1, self.store.get_invoice(self.invoice_id).version)
+        self.assertEqual(requests_before, self.server.requests)
+
+    def test_status_change_syncs_voucher(self):
+        self.change_invoice()
+        self.server.emit('invoice.status.changed', self.voucher['id'])
+        self.receiver.flush(5)
+        self.assertEqual(VoucherStatus.PAID, self.store.get_voucher(self.invoice_id).voucher_status)
+        self.assertEqual(1, self.dispatcher.syncs)
+
+    def test_deleted_invoice_is_dropped(self):
+        self.client.get_invoice(self.invoice_id)
+        del self.server.httpd.invoices[self.voucher['id']]
+        self.server.httpd.vouchers.remove(self.voucher)
+        self.server.emit('invoice.deleted', self.voucher['id'])
+        self.receiver.flush(5)
+        self.assertEqual(1, self.dispatcher.deleted)
+        self.assertIsNone(self.store.get_invoice(self.invoice_id))
+        self.assertIsNone(self.store.get_voucher(self.invoice_id))
+        self.assertIsNone(self.client.cache.get(self.invoice_id))
+        self.assertEqual({}, self.dispatcher.failed)
+
+    def test_failed_refetch_is_recorded(self):
+        self.dispatcher.sync_engines = []
+        del self.server.httpd.invoices[self.voucher['id']]
+        self.server.emit('invoice.changed', self.voucher['id'])
+        self.receiver.flush(5)
+        self.assertIn(self.invoice_id, self.dispatcher.failed)
+        self.assertEqual(0, self.receiver.errors)
+
+
+if __name__ == '__main__':
+    unittest.main()